@@ -0,0 +1,117 @@
+# 執行後端效能比較：pandas vs. Polars vs. Arrow（只比較已安裝的後端）
+# - 欄位投影讀取、單欄彙總（n / 總和 / 直方圖）、類別次數、分塊串流
+# - 各後端的結果與 pandas 比對（n / 直方圖 / 類別次數需完全相同，總和允許浮點誤差）
+#
+# 在專案根目錄執行：python -m scripts.bench.backend_bench --rows 5000000 [--path data.csv --column age]
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.backends import BACKEND_LABELS, available_backends, get_backend
+
+
+def make_csv(path, rows, seed=0):
+    """產生測試用 CSV：id、數值欄位 value（含 1% 空值）、類別欄位 group"""
+    rng = np.random.default_rng(seed)
+    value = rng.normal(50, 20, rows).round(3)
+    value[rng.random(rows) < 0.01] = np.nan
+    frame = pd.DataFrame({
+        "id": np.arange(rows),
+        "value": value,
+        "group": np.array([f"g{i:03d}" for i in range(200)])[rng.integers(0, 200, rows)],
+    })
+    frame.to_csv(path, index=False)
+
+
+def timed(fn, repeat):
+    """重複 repeat 次取最快的一次（秒），回傳 (結果, 秒數)"""
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def _same(name, result, reference):
+    if name in ("read", "stream"):
+        return result == reference
+    if name == "categories":
+        return dict(zip(*result)) == dict(zip(*reference))
+    same = result["n"] == reference["n"] and np.isclose(result["sum"], reference["sum"], rtol=1e-9)
+    if "hist" in reference:
+        same = same and np.array_equal(result["hist"], reference["hist"])
+    return bool(same)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV 執行後端效能比較")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="未指定 --path 時產生的測試資料列數")
+    parser.add_argument("--path", default=None, help="使用既有的 CSV 檔")
+    parser.add_argument("--column", default="value", help="數值欄位")
+    parser.add_argument("--category-column", default="group", help="類別欄位")
+    parser.add_argument("--bounds", type=float, nargs=2, default=(0.0, 100.0))
+    parser.add_argument("--bins", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3, help="每項重複次數（取最快）")
+    parser.add_argument("--backends", nargs="+", default=None, help="要比較的後端（預設為全部已安裝的後端）")
+    args = parser.parse_args()
+
+    backends = args.backends or available_backends()
+    try:
+        instances = {name: get_backend(name) for name in backends}
+    except ValueError as e:
+        parser.error(str(e))
+    tmpdir = None
+    path = args.path
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "bench.csv")
+        print(f"產生測試資料：{args.rows:,} 列 ...")
+        make_csv(path, args.rows)
+
+    bounds = tuple(args.bounds)
+    cases = [
+        ("read", "欄位投影讀取 (read_csv)",
+         lambda b: len(b.read_csv(path, [args.column]))),
+        ("stats", "單欄彙總 (n / 總和)",
+         lambda b: b.column_stats(path, args.column, bounds)),
+        ("histogram", f"直方圖 ({args.bins} bins)",
+         lambda b: b.column_stats(path, args.column, bounds, args.bins)),
+        ("categories", "類別次數",
+         lambda b: b.category_counts(path, args.category_column)),
+        ("stream", "分塊串流 (iter_csv)",
+         lambda b: sum(len(block) for block in b.iter_csv(path, [args.column], 1_000_000))),
+    ]
+
+    results = {}
+    for name, backend in instances.items():
+        for key, _, fn in cases:
+            results[name, key] = timed(lambda: fn(backend), args.repeat)
+
+    print(f"{path}（{os.path.getsize(path) / 1e6:,.0f} MB）  repeat={args.repeat}，單位：秒（括號內為相對 pandas 的倍數）")
+    header = f"{'':<28}" + "".join(f"{BACKEND_LABELS[name]:>22}" for name in backends)
+    print(header)
+    for key, label, _ in cases:
+        line = f"{label:<28}"
+        reference, base = results.get(("pandas", key), (None, None))
+        for name in backends:
+            out, seconds = results[name, key]
+            cell = f"{seconds:.3f}"
+            if base is not None and name != "pandas":
+                cell += f" ({base / seconds:.1f}x)"
+                if not _same(key, out, reference):
+                    cell += " 結果不同!"
+            line += f"{cell:>22}"
+        print(line)
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
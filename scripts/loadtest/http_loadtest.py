@@ -0,0 +1,82 @@
+# DP HTTP 服務壓力測試：對本機服務送出大量查詢，回報延遲 p50 / p99 與吞吐量
+#
+# 先啟動服務：python -m src.service.server --port 8765
+# 再執行：    python scripts/loadtest/http_loadtest.py --dataset data.csv --column age --bounds 0 100
+
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def post_json(url, body, timeout=120):
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode("utf-8") or "{}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DP HTTP 服務壓力測試")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--dataset", required=True, help="要註冊的資料檔路徑（服務端可讀取）")
+    parser.add_argument("--column", required=True)
+    parser.add_argument("--bounds", nargs=2, type=float, default=[0.0, 100.0])
+    parser.add_argument("--query", default="mean")
+    parser.add_argument("--mechanism", default="laplace")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    status, body = post_json(f"{args.url}/datasets", {"path": args.dataset})
+    if status != 201:
+        raise SystemExit(f"註冊資料集失敗：{status} {body}")
+    dataset_id = body["id"]
+
+    # 暖機：第一次查詢會解析欄位，不列入統計
+    post_json(f"{args.url}/queries?wait=1", {
+        "dataset": dataset_id, "column": args.column, "query": args.query,
+        "mechanism": args.mechanism, "epsilon": 1.0, "bounds": args.bounds,
+    })
+
+    def one_request(i):
+        # 每個請求的 ε 都不同，避免被服務端的重複工作合併掉
+        spec = {
+            "dataset": dataset_id, "column": args.column, "query": args.query,
+            "mechanism": args.mechanism, "epsilon": 1.0 + i * 1e-6, "bounds": args.bounds,
+        }
+        while True:
+            start = time.perf_counter()
+            status, body = post_json(f"{args.url}/queries?wait=1", spec)
+            elapsed = time.perf_counter() - start
+            if status == 503:
+                time.sleep(0.05)  # 服務端佇列已滿：稍後重試
+                continue
+            return elapsed, status == 200 and body.get("ok", False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one_request, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    ok = sum(1 for r in results if r[1])
+    print(f"requests:    {args.requests}  (成功 {ok}, concurrency={args.concurrency})")
+    print(f"throughput:  {args.requests / wall:.1f} req/s")
+    print(f"latency p50: {np.percentile(latencies, 50):.2f} ms")
+    print(f"latency p99: {np.percentile(latencies, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# CSV 載入與彙總的執行後端
+#
+#   pandas    預設：pd.read_csv（C parser）+ numpy 彙總
+#   polars    選用：多執行緒 parser，lazy scan（欄位投影 / 過濾下推）+ 原生 clip / sum / count / 直方圖運算式
+#   pyarrow   選用：多執行緒 CSV reader，dataset scanner（欄位投影 / 過濾下推）+ pyarrow.compute 彙總
+#
+# 未安裝的後端不會被 import；選用未安裝的後端時丟出 ValueError。
+# 目前的後端為全域設定（與 rng 模式相同）：資料集建立時記下當時的後端，之後的載入 / 彙總都使用它。
+#
+#   from src.core.backends import get_backend, set_backend
+#   set_backend("polars")
+#   get_backend().column_stats("data.csv", "age", (0, 100), bins=10)
+
+import importlib
+import importlib.util
+import threading
+
+
+BACKENDS = ("pandas", "polars", "pyarrow")
+
+BACKEND_LABELS = {
+    "pandas": "pandas（預設）",
+    "polars": "Polars（多執行緒）",
+    "pyarrow": "Arrow（多執行緒）",
+}
+
+# 後端名稱 → (模組, 類別)
+_IMPLEMENTATIONS = {
+    "pandas": ("src.core.backends.pandas_backend", "PandasBackend"),
+    "polars": ("src.core.backends.polars_backend", "PolarsBackend"),
+    "pyarrow": ("src.core.backends.arrow_backend", "ArrowBackend"),
+}
+
+# 每個後端需要的套件
+_REQUIRES = {"pandas": "pandas", "polars": "polars", "pyarrow": "pyarrow"}
+
+_instances = {}
+_current = "pandas"
+_lock = threading.Lock()
+
+
+def available_backends():
+    """已安裝相依套件的後端名稱（依 BACKENDS 順序）"""
+    return [name for name in BACKENDS if importlib.util.find_spec(_REQUIRES[name]) is not None]
+
+
+def get_backend(name: str = None):
+    """取得後端實例（同名共用一個）；name 為 None 時回傳目前的後端"""
+    name = _current if name is None else name
+    if name not in BACKENDS:
+        raise ValueError(f"不支援的執行後端：{name}（可用：{', '.join(BACKENDS)}）")
+    with _lock:
+        if name not in _instances:
+            if importlib.util.find_spec(_REQUIRES[name]) is None:
+                raise ValueError(f"執行後端 {name} 需要安裝 {_REQUIRES[name]}")
+            module, cls = _IMPLEMENTATIONS[name]
+            _instances[name] = getattr(importlib.import_module(module), cls)()
+        return _instances[name]
+
+
+def set_backend(name: str):
+    """切換全域執行後端（只影響之後建立的資料集）"""
+    global _current
+    get_backend(name)  # 先確認可用
+    with _lock:
+        _current = name
+
+
+def backend_name() -> str:
+    return _current
@@ -0,0 +1,135 @@
+# Arrow 後端（選用）：pyarrow 的多執行緒 CSV reader + dataset scanner
+#
+# - 彙總以 pyarrow.dataset 掃描：只讀需要的欄位（projection push-down），空值在掃描時過濾（predicate push-down）
+# - clip / sum / count 使用 pyarrow.compute 的原生 kernel；直方圖在同一塊 Arrow buffer 上以 numpy 計算（zero-copy）
+# - Arrow 只以第一個區塊推斷型別，後面出現不合的值（例如數字欄位中的文字）會丟出 ArrowInvalid：
+#   彙總時目標欄位一律以字串讀取，再轉成 float64（非數值視為空值，與 pandas 路徑相同）；
+#   分塊串流以字串讀取後逐塊推斷型別（與 pandas 分塊讀取相同）；整份讀取 / 類別次數推斷失敗時改以字串重讀
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as pa_ds
+
+from src.core.backends.base import STATS_BLOCK_ROWS, Backend
+
+
+# 串流讀取時每次解析的位元組數（Arrow 以位元組分塊，之後再切成 block_rows 列）
+READ_BLOCK_BYTES = 16 * 1024 * 1024
+
+
+# 字串欄位推斷型別時依序嘗試的型別（都轉換失敗時維持字串）
+INFER_TYPES = (pa.int64(), pa.float64(), pa.bool_())
+
+
+def _string_columns(columns) -> "pa_csv.ConvertOptions":
+    """columns 一律以字串讀取（空字串等 null 值仍視為空值）"""
+    columns = list(columns)
+    return pa_csv.ConvertOptions(
+        include_columns=columns, column_types={c: pa.string() for c in columns}, strings_can_be_null=True
+    )
+
+
+def _as_float(array) -> "pa.Array":
+    """轉成 float64：先以 Arrow 原生 cast 轉換，字串含非數值時改以 pd.to_numeric 轉換（非數值視為空值）"""
+    try:
+        return pc.cast(array, pa.float64())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        values = pd.to_numeric(array.to_pandas(), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        return pa.array(values, from_pandas=True)
+
+
+def _infer_types(table):
+    """以字串讀入的 Table / RecordBatch 逐欄推斷型別（整欄都能轉換的第一個 INFER_TYPES，否則維持字串）"""
+    arrays = []
+    for array in table.columns:
+        for target in INFER_TYPES:
+            try:
+                array = pc.cast(array, target)
+                break
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+        arrays.append(array)
+    return type(table).from_arrays(arrays, names=table.schema.names)
+
+
+class ArrowBackend(Backend):
+    name = "pyarrow"
+    label = "Arrow"
+
+    def read_csv(self, path: str, columns=None):
+        convert = pa_csv.ConvertOptions(include_columns=None if columns is None else list(columns))
+        try:
+            return pa_csv.read_csv(path, convert_options=convert).to_pandas()
+        except pa.ArrowInvalid:
+            # 第一個區塊推斷的型別與後面的值不合：全部以字串讀取後再逐欄推斷
+            if columns is None:
+                columns = pa_csv.open_csv(path).schema.names
+            return _infer_types(pa_csv.read_csv(path, convert_options=_string_columns(columns))).to_pandas()
+
+    def iter_csv(self, path: str, columns, block_rows: int):
+        columns = list(columns)
+        reader = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=READ_BLOCK_BYTES),
+            convert_options=_string_columns(columns),
+        )
+        for batch in reader:
+            for start in range(0, batch.num_rows, block_rows):
+                yield _infer_types(batch.slice(start, block_rows)).to_pandas()[columns]
+
+    def _scan(self, path: str, column: str, block_rows: int, as_string: bool = False):
+        """
+        只讀一個欄位、空值在掃描時過濾的 record batch。
+        as_string=True 時該欄位以字串讀取（不依第一個區塊推斷型別，後面出現任何值都不會失敗）
+        """
+        csv_format = pa_ds.CsvFileFormat(
+            convert_options=pa_csv.ConvertOptions(column_types={column: pa.string()}, strings_can_be_null=True)
+        ) if as_string else "csv"
+        dataset = pa_ds.dataset(path, format=csv_format)
+        if column not in dataset.schema.names:
+            raise ValueError(f"找不到欄位：{column}")
+        return dataset.to_batches(columns=[column], filter=pa_ds.field(column).is_valid(), batch_size=block_rows)
+
+    def column_stats(self, path: str, column: str, bounds, bins=None, block_rows: int = STATS_BLOCK_ROWS) -> dict:
+        lower, upper = float(bounds[0]), float(bounds[1])
+        stats = {"n": 0, "sum": 0.0}
+        if bins is not None:
+            stats["hist"] = np.zeros(int(bins), dtype=np.int64)
+            stats["bin_edges"] = np.linspace(lower, upper, int(bins) + 1)
+        for batch in self._scan(path, column, block_rows, as_string=True):
+            values = _as_float(batch.column(0))
+            values = pc.filter(values, pc.invert(pc.is_nan(values)), null_selection_behavior="drop")
+            if len(values) == 0:
+                continue
+            clipped = pc.min_element_wise(pc.max_element_wise(values, lower), upper)
+            stats["n"] += len(clipped)
+            stats["sum"] += pc.sum(clipped).as_py()
+            if bins is not None:
+                stats["hist"] += np.histogram(clipped.to_numpy(zero_copy_only=False), bins=int(bins),
+                                              range=(lower, upper))[0]
+        return stats
+
+    def category_counts(self, path: str, column: str, block_rows: int = STATS_BLOCK_ROWS):
+        """
+        逐塊以 pc.value_counts 計次後合併（空值在掃描時過濾）。
+        推斷的型別與後面的值不合時改以字串重新計次（與 pandas 讀到混合型別欄位時相同，類別為字串）
+        """
+        try:
+            return self._category_counts(path, column, block_rows, as_string=False)
+        except pa.ArrowInvalid:
+            return self._category_counts(path, column, block_rows, as_string=True)
+
+    def _category_counts(self, path: str, column: str, block_rows: int, as_string: bool):
+        parts = []
+        for batch in self._scan(path, column, block_rows, as_string):
+            counted = pc.value_counts(batch.column(0))
+            if len(counted):
+                parts.append(pd.Series(counted.field("counts").to_numpy(),
+                                       index=counted.field("values").to_pandas()))
+        if not parts:
+            return np.array([], dtype=object), np.zeros(0, dtype=np.int64)
+        totals = pd.concat(parts).groupby(level=0, sort=False).sum()
+        return np.asarray(totals.index, dtype=object), totals.to_numpy(dtype=np.int64)
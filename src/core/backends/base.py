@@ -0,0 +1,39 @@
+# 執行後端的共同介面：CSV 載入（欄位投影 / 分塊）與單欄彙總（clip 後的 n / 總和 / 直方圖、類別次數）
+#
+# 對外一律回傳 pandas / numpy 物件，資料集與 engine 不需要知道實際由哪個後端解析
+
+
+# 彙總時每次讀取的列數（分塊讀取的後端記憶體只與這個值有關）
+STATS_BLOCK_ROWS = 1_000_000
+
+
+class Backend:
+    """
+    子類別需實作：
+
+    - read_csv(path, columns)                      → pd.DataFrame（只解析 columns；None 為全部欄位）
+    - iter_csv(path, columns, block_rows)          → 逐塊產生 pd.DataFrame（每塊最多 block_rows 列）
+    - column_stats(path, column, bounds, bins, block_rows)
+                                                   → {"n", "sum"(, "hist", "bin_edges")}，
+                                                     數值轉換規則與 dp.compute_stats 相同（非數值視為空值），
+                                                     直方圖區間與 np.histogram 相同
+    - category_counts(path, column, block_rows)    → (categories, counts)，空值不計
+    """
+
+    name = None
+    label = None
+
+    def read_csv(self, path: str, columns=None):
+        raise NotImplementedError
+
+    def iter_csv(self, path: str, columns, block_rows: int):
+        raise NotImplementedError
+
+    def column_stats(self, path: str, column: str, bounds, bins=None, block_rows: int = STATS_BLOCK_ROWS) -> dict:
+        raise NotImplementedError
+
+    def category_counts(self, path: str, column: str, block_rows: int = STATS_BLOCK_ROWS):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
@@ -0,0 +1,45 @@
+# pandas 後端（預設）：read_csv（C parser）解析後以 numpy 彙總
+# 多執行緒的 pyarrow parser 由 ArrowBackend 另外選用，這裡固定使用 C parser，結果與原本的載入方式相同
+
+import numpy as np
+import pandas as pd
+
+from src.core.backends.base import STATS_BLOCK_ROWS, Backend
+
+
+class PandasBackend(Backend):
+    name = "pandas"
+    label = "pandas"
+
+    def read_csv(self, path: str, columns=None):
+        return pd.read_csv(path, usecols=columns, engine="c")
+
+    def iter_csv(self, path: str, columns, block_rows: int):
+        columns = list(columns)
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=block_rows):
+            yield chunk[columns]
+
+    def column_stats(self, path: str, column: str, bounds, bins=None, block_rows: int = STATS_BLOCK_ROWS) -> dict:
+        """逐塊 clip 後累加 n / 總和（/ 直方圖）"""
+        lower, upper = float(bounds[0]), float(bounds[1])
+        stats = {"n": 0, "sum": 0.0}
+        if bins is not None:
+            stats["hist"] = np.zeros(int(bins), dtype=np.int64)
+            stats["bin_edges"] = np.linspace(lower, upper, int(bins) + 1)
+        for chunk in self.iter_csv(path, [column], block_rows):
+            values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            clipped = np.clip(values[~np.isnan(values)], lower, upper)
+            stats["n"] += int(clipped.size)
+            stats["sum"] += float(clipped.sum())
+            if bins is not None:
+                stats["hist"] += np.histogram(clipped, bins=int(bins), range=(lower, upper))[0]
+        return stats
+
+    def category_counts(self, path: str, column: str, block_rows: int = STATS_BLOCK_ROWS):
+        """逐塊累計類別次數（空值不計）"""
+        parts = [chunk[column].value_counts(dropna=True) for chunk in self.iter_csv(path, [column], block_rows)]
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return np.array([], dtype=object), np.zeros(0, dtype=np.int64)
+        totals = pd.concat(parts).groupby(level=0, sort=False).sum()
+        return np.asarray(totals.index, dtype=object), totals.to_numpy(dtype=np.int64)
@@ -0,0 +1,111 @@
+# Polars 後端（選用）：多執行緒 CSV parser + lazy scan
+#
+# - 彙總以 scan_csv 建立查詢計畫：只讀需要的欄位（projection push-down），
+#   空值 / NaN 的過濾下推到掃描階段（predicate push-down），clip / sum / count / 直方圖都是 Polars 原生運算式，
+#   結果只有幾個數字，整欄資料不會轉成 Python / pandas 物件
+# - 轉成 pandas 時逐欄 to_numpy()，不需要另外安裝 pyarrow
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from src.core.backends.base import STATS_BLOCK_ROWS, Backend
+
+
+# 型別推斷使用的列數；推斷的型別與後面的列不合時改為掃描整份檔案推斷
+INFER_SCHEMA_ROWS = 10_000
+
+
+def _with_schema_retry(run):
+    """run(infer_rows)：先以前 INFER_SCHEMA_ROWS 列推斷型別，失敗時改以整份檔案推斷重試"""
+    try:
+        return run(INFER_SCHEMA_ROWS)
+    except pl.exceptions.ComputeError:
+        return run(None)
+
+
+def _to_pandas(frame: "pl.DataFrame") -> pd.DataFrame:
+    return pd.DataFrame({name: frame.get_column(name).to_numpy() for name in frame.columns})
+
+
+def _histogram_index(values: "pl.Expr", lower: float, upper: float, bins: int) -> "pl.Expr":
+    """
+    每個值（已 clip 到 [lower, upper]）所在的區間編號，與 np.histogram 等寬區間的算法逐位相同：
+    先以 (v - lower) * bins / (upper - lower) 取整，再依 np.linspace 的區間邊界修正浮點誤差
+    """
+    step = (upper - lower) / bins
+    norm = bins / (upper - lower)
+    index = ((values - lower) * norm).cast(pl.Int64)
+    index = pl.when(index == bins).then(bins - 1).otherwise(index)
+    index = index - (values < index.cast(pl.Float64) * step + lower).cast(pl.Int64)
+    next_edge = pl.when(index == bins - 1).then(upper).otherwise((index + 1).cast(pl.Float64) * step + lower)
+    return index + ((values >= next_edge) & (index != bins - 1)).cast(pl.Int64)
+
+
+class PolarsBackend(Backend):
+    name = "polars"
+    label = "Polars"
+
+    def read_csv(self, path: str, columns=None):
+        columns = None if columns is None else list(columns)
+        frame = _with_schema_retry(lambda rows: pl.read_csv(path, columns=columns, infer_schema_length=rows))
+        return _to_pandas(frame)
+
+    def iter_csv(self, path: str, columns, block_rows: int):
+        columns = list(columns)
+
+        def open_reader(rows):
+            reader = pl.read_csv_batched(path, columns=columns, batch_size=block_rows, infer_schema_length=rows)
+            return reader, reader.next_batches(1)
+
+        # 型別推斷失敗通常在第一批就會發生，之後的批次沿用同一個 schema
+        reader, batches = _with_schema_retry(open_reader)
+        while batches:
+            for batch in batches:
+                for start in range(0, batch.height, block_rows):
+                    yield _to_pandas(batch.slice(start, block_rows).select(columns))
+            batches = reader.next_batches(1)
+
+    def _scan_numeric(self, path: str, column: str, rows):
+        """單一欄位轉成 float64（非數值轉為空值），空值與 NaN 在掃描時就過濾掉"""
+        value = pl.col(column).cast(pl.Float64, strict=False)
+        return (
+            pl.scan_csv(path, infer_schema_length=rows)
+            .select(value.alias("v"))
+            .filter(pl.col("v").is_not_null() & pl.col("v").is_not_nan())
+        )
+
+    def column_stats(self, path: str, column: str, bounds, bins=None, block_rows: int = STATS_BLOCK_ROWS) -> dict:
+        """clip / n / 總和 / 直方圖在同一個 lazy 查詢中完成（共用一次掃描）"""
+        lower, upper = float(bounds[0]), float(bounds[1])
+
+        def run(rows):
+            clipped = self._scan_numeric(path, column, rows).select(pl.col("v").clip(lower, upper))
+            queries = [clipped.select(pl.len().alias("n"), pl.col("v").sum().alias("sum"))]
+            if bins is not None:
+                queries.append(
+                    clipped.select(_histogram_index(pl.col("v"), lower, upper, int(bins)).alias("bin"))
+                    .group_by("bin").agg(pl.len().alias("count"))
+                )
+            return pl.collect_all(queries)
+
+        results = _with_schema_retry(run)
+        totals = results[0]
+        stats = {"n": int(totals["n"][0]), "sum": float(totals["sum"][0] or 0.0)}
+        if bins is not None:
+            hist = np.zeros(int(bins), dtype=np.int64)
+            hist[results[1]["bin"].to_numpy()] = results[1]["count"].to_numpy()
+            stats["hist"] = hist
+            stats["bin_edges"] = np.linspace(lower, upper, int(bins) + 1)
+        return stats
+
+    def category_counts(self, path: str, column: str, block_rows: int = STATS_BLOCK_ROWS):
+        """group_by 次數（空值在掃描時過濾），回傳 (categories, counts)"""
+        counts = _with_schema_retry(lambda rows: (
+            pl.scan_csv(path, infer_schema_length=rows)
+            .select(pl.col(column))
+            .filter(pl.col(column).is_not_null())
+            .group_by(column).agg(pl.len().alias("count"))
+            .collect()
+        ))
+        return counts[column].to_numpy().astype(object), counts["count"].to_numpy().astype(np.int64)
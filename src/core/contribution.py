@@ -0,0 +1,83 @@
+# 使用者層級 (user-level) 差分隱私的貢獻上限處理
+# 同一個人可能有很多列資料，先限制每人最多 k 列、每列 clip 到資料邊界，
+# 每人的總貢獻就被限制在 k 倍單列範圍內，敏感度才能以「一個人」而不是「一列」為單位計算。
+#
+# 全部以 factorize + 一次排序向量化完成，沒有逐使用者的 Python 迴圈。
+
+import numpy as np
+import pandas as pd
+
+from src.core.rng import noise_rng
+
+
+def cap_rows_per_user(user_ids, max_rows: int, rng=None):
+    """
+    每個使用者最多保留 max_rows 列（超過時隨機挑選要保留的列）。
+
+    user_ids: 每一列的使用者 ID（任意型別；空值的列視為無法歸屬而丟棄）
+    回傳 (keep, codes)：
+        keep:  bool 陣列，True 為保留的列
+        codes: 每一列的使用者編號 0..n_users-1（空值為 -1）
+    """
+    if max_rows < 1:
+        raise ValueError("每位使用者最多列數需 >= 1")
+    rng = rng if rng is not None else noise_rng()
+
+    codes, uniques = pd.factorize(pd.Series(user_ids), sort=False)
+    codes = codes.astype(np.int64, copy=False)
+    n = codes.size
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep, codes
+
+    # 排序鍵 = 使用者編號（高位）+ 隨機數（低位）：一次排序後同一使用者的列成為連續區段，
+    # 且區段內順序隨機（比「先打散再穩定排序」快約 3 倍）
+    shift = 62 - max(len(uniques), 1).bit_length()
+    key = (codes << shift) | rng.integers(0, 1 << shift, n, dtype=np.int64)
+    order = np.argsort(key)
+    sorted_codes = codes[order]
+
+    # 每一列在所屬區段內的名次 = 位置 - 區段起點
+    is_start = np.empty(n, dtype=bool)
+    is_start[0] = True
+    np.not_equal(sorted_codes[1:], sorted_codes[:-1], out=is_start[1:])
+    starts = np.flatnonzero(is_start)
+    lengths = np.diff(np.append(starts, n))
+    rank = np.arange(n) - np.repeat(starts, lengths)
+
+    keep[order] = (rank < max_rows) & (sorted_codes >= 0)
+    return keep, codes
+
+
+def user_level_stats(values, user_ids, bounds, max_rows: int, query_key: str, bins: int, rng=None):
+    """
+    使用者層級的充分統計量（格式同 engine.release_from_stats 所需，另加 rows_dropped）。
+
+    1. 數值或使用者 ID 為空的列先排除
+    2. 每位使用者最多保留 max_rows 列
+    3. 每列 clip 到 bounds
+
+    之後每位使用者對 sum / count / histogram 的影響都不超過單列的 max_rows 倍，
+    engine 依 max_rows 放大敏感度即可。
+    """
+    lo, hi = float(bounds[0]), float(bounds[1])
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    user_ids = pd.Series(user_ids).reset_index(drop=True)
+
+    valid = ~np.isnan(values) & user_ids.notna().to_numpy()
+    values = values[valid]
+    keep, codes = cap_rows_per_user(user_ids[valid], max_rows, rng)
+
+    # 每人最多 k 列、每列在 [min, max] 內 → 每人總和必定落在 k·[min, max] 的範圍，不需再另外 clip
+    clipped = np.clip(values[keep], lo, hi)
+
+    stats = {
+        "n": int(clipped.size),
+        "sum": float(clipped.sum()),
+        "rows_dropped": int(valid.size - clipped.size),
+    }
+    if query_key == "histogram":
+        hist, bin_edges = np.histogram(clipped, bins=bins, range=(lo, hi))
+        stats["hist"] = hist
+        stats["bin_edges"] = bin_edges
+    return stats
@@ -0,0 +1,147 @@
+# 多欄位的差分隱私共變異數 / 相關係數矩陣
+#
+# - 每一列視為 d 維向量，先把 L2 範數 clip 到 norm_bound（單列對結果的影響因此有上界）
+# - 分塊掃過資料：每塊一次矩陣乘法累加 XᵀX 與各欄總和，記憶體只與「塊大小 × d」有關，
+#   可串流處理 500 欄 × 千萬列
+# - 加噪：上三角（含對角線）一次抽出後鏡射成對稱雜訊，整個矩陣只加噪一次
+# - 後處理：投影成半正定矩陣，再換算成相關係數（不再花費隱私預算）
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.core.noise import noise_scale, sample_integer_noise, sample_noise
+from src.core.rng import noise_rng
+
+
+# 每塊的格數上限（列數 × 欄數）：float64 約 160 MB
+COV_BLOCK_CELLS = 20_000_000
+
+
+def block_rows_for(n_columns: int) -> int:
+    """依欄數決定每塊列數"""
+    return max(1, COV_BLOCK_CELLS // max(int(n_columns), 1))
+
+
+def iter_frame_blocks(df, columns, block_rows: int):
+    """DataFrame 依列切塊（不複製整份資料）"""
+    for start in range(0, len(df), block_rows):
+        yield df[list(columns)].iloc[start:start + block_rows]
+
+
+def empty_covariance_stats(d: int) -> dict:
+    return {
+        "n": 0,
+        "sum": np.zeros(d),
+        "xtx": np.zeros((d, d)),
+        "rows_dropped": 0,
+        "rows_clipped": 0,
+    }
+
+
+def covariance_stats(blocks, n_columns: int, norm_bound: float) -> dict:
+    """
+    掃過所有資料塊，回傳充分統計量：
+        n:            有效列數（任一欄為空值 / 非數值的列整列排除）
+        sum:          clip 後各欄總和（長度 d）
+        xtx:          clip 後的 XᵀX（d × d）
+        rows_dropped: 因缺值被排除的列數
+        rows_clipped: 範數超過 norm_bound 而被縮放的列數
+    """
+    stats = empty_covariance_stats(n_columns)
+    bound = float(norm_bound)
+    for block in blocks:
+        if isinstance(block, pd.DataFrame):
+            X = block.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            X = np.asarray(block, dtype=np.float64)
+        complete = ~np.isnan(X).any(axis=1)
+        stats["rows_dropped"] += int(X.shape[0] - complete.sum())
+        X = X[complete]
+        if X.shape[0] == 0:
+            continue
+
+        norms = np.sqrt(np.einsum("ij,ij->i", X, X))
+        over = norms > bound
+        if over.any():
+            X[over] *= (bound / norms[over])[:, None]
+        stats["rows_clipped"] += int(over.sum())
+
+        stats["n"] += X.shape[0]
+        stats["sum"] += X.sum(axis=0)
+        stats["xtx"] += X.T @ X
+    return stats
+
+
+def merge_covariance_stats(parts) -> dict:
+    """合併多份部分統計量（例如各分割檔各自掃描的結果）"""
+    parts = list(parts)
+    merged = empty_covariance_stats(parts[0]["sum"].size)
+    for part in parts:
+        for key in merged:
+            merged[key] = merged[key] + part[key]
+    return merged
+
+
+def nearest_psd(matrix):
+    """把負特徵值截成 0，得到最接近的半正定矩陣（雜訊可能讓共變異數矩陣不再半正定）"""
+    w, v = np.linalg.eigh((matrix + matrix.T) / 2)
+    return (v * np.maximum(w, 0.0)) @ v.T
+
+
+def correlation_from_covariance(cov):
+    std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(std, std)
+    corr = np.clip(np.nan_to_num(corr, nan=0.0), -1.0, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def release_covariance(stats: dict, norm_bound: float, epsilon: float, mech_key: str = "laplace",
+                       delta: float = 1e-5, rng=None) -> dict:
+    """
+    對充分統計量加噪並換算共變異數 / 相關係數。
+
+    ε（Gaussian 時 δ 也是）平均分給 n、各欄總和、XᵀX 三部分。單列範數 ≤ C 時：
+        n:    敏感度 1（整數雜訊）
+        sum:  L1 ≤ √d·C，L2 ≤ C
+        XᵀX:  上三角 (含對角線) 的 L1 ≤ (d + 1)·C² / 2，L2 ≤ C²
+    Laplace 的雜訊隨欄數線性成長，欄位多時建議使用 Gaussian。
+    """
+    rng = rng if rng is not None else noise_rng()
+    d = stats["sum"].size
+    bound = float(norm_bound)
+    eps_part = epsilon / 3
+    delta_part = delta / 3
+
+    if mech_key == "gaussian":
+        sens_sum = bound
+        sens_xtx = bound ** 2
+    else:
+        sens_sum = math.sqrt(d) * bound
+        sens_xtx = (d + 1) * bound ** 2 / 2
+
+    n_noisy = stats["n"] + sample_integer_noise(
+        mech_key, noise_scale(mech_key, eps_part, delta_part, 1.0), 1, rng
+    )[0]
+    n_noisy = max(int(n_noisy), 2)
+    sums = stats["sum"] + sample_noise(mech_key, noise_scale(mech_key, eps_part, delta_part, sens_sum), d, rng)
+
+    # 上三角一次抽出後鏡射，雜訊矩陣對稱
+    rows, cols = np.triu_indices(d)
+    upper = sample_noise(mech_key, noise_scale(mech_key, eps_part, delta_part, sens_xtx), rows.size, rng)
+    noise = np.zeros((d, d))
+    noise[rows, cols] = upper
+    noise[cols, rows] = upper
+    xtx = stats["xtx"] + noise
+
+    mean = sums / n_noisy
+    cov = nearest_psd((xtx - np.outer(sums, sums) / n_noisy) / (n_noisy - 1))
+    return {
+        "n": n_noisy,
+        "mean": mean,
+        "cov": cov,
+        "corr": correlation_from_covariance(cov),
+    }
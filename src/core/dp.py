@@ -0,0 +1,288 @@
+# 差分隱私統計的函式庫 API：所有參數明確傳入，不依賴 GUI 的 dp_settings
+#
+#   from src.core import dp
+#   dp.mean(values, epsilon=1.0, bounds=(0, 100))
+#   dp.histogram(values, epsilon=1.0, bounds=(0, 100), bins=20, mechanism="gaussian", delta=1e-6)
+#   dp.distinct_count(values, epsilon=1.0)                 # HyperLogLog sketch 估計相異值個數
+#   df.dp.mean("age", epsilon=1.0, bounds=(0, 100))       # pandas accessor
+#
+# - 回傳 ScalarResult / HistogramResult 物件；參數不合法時丟出 ValueError
+# - numpy 與雜訊模組延遲到第一次呼叫時才 import，import 本模組幾乎不花時間
+# - engine.run_dp_from_settings / release_from_stats 的 mean / sum / count / histogram 都經由這裡加噪
+# - pandas accessor 在 pandas 已載入時自動註冊；否則請呼叫 register_accessor()
+
+import sys
+
+
+MECHANISMS = ("laplace", "gaussian")
+
+DEFAULT_BINS = 10
+
+
+class DPResult:
+    """差分隱私統計結果的共同欄位"""
+
+    __slots__ = ("query", "epsilon", "mechanism", "delta", "bounds")
+
+    def __init__(self, query, epsilon, mechanism, delta, bounds):
+        self.query = query
+        self.epsilon = epsilon
+        self.mechanism = mechanism
+        self.delta = delta if mechanism == "gaussian" else None  # Laplace 不使用 δ
+        self.bounds = bounds
+
+    def to_payload(self) -> dict:
+        """轉成 engine / GUI 使用的 result payload"""
+        payload = {
+            "epsilon": self.epsilon,
+            "mechanism": self.mechanism,
+            "query": self.query,
+            "bounds": self.bounds,
+        }
+        if self.delta is not None:
+            payload["delta"] = self.delta
+        return payload
+
+    def _fields(self):
+        return ", ".join(f"{name}={getattr(self, name)!r}" for name in self._repr_fields)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._fields()})"
+
+
+class ScalarResult(DPResult):
+    """mean / sum / count / distinct 的結果"""
+
+    __slots__ = ("value",)
+    _repr_fields = ("query", "value", "epsilon", "mechanism", "delta", "bounds")
+
+    def __init__(self, query, value, epsilon, mechanism, delta, bounds):
+        super().__init__(query, epsilon, mechanism, delta, bounds)
+        self.value = float(value)
+
+    def __float__(self):
+        return self.value
+
+    def to_payload(self) -> dict:
+        payload = super().to_payload()
+        payload["value"] = self.value
+        return payload
+
+
+class HistogramResult(DPResult):
+    """histogram 的結果：counts 為雜訊次數（float 陣列），bin_edges 長度為 bins + 1"""
+
+    __slots__ = ("counts", "bin_edges")
+    _repr_fields = ("query", "epsilon", "mechanism", "delta", "bounds")
+
+    def __init__(self, counts, bin_edges, epsilon, mechanism, delta, bounds):
+        super().__init__("histogram", epsilon, mechanism, delta, bounds)
+        self.counts = counts
+        self.bin_edges = bin_edges
+
+    def to_payload(self) -> dict:
+        payload = super().to_payload()
+        payload["hist"] = self.counts
+        payload["bin_edges"] = self.bin_edges
+        return payload
+
+
+# =====================================================
+# 參數檢查 / 充分統計量
+# =====================================================
+
+def _check_params(epsilon, mechanism, delta, bounds):
+    mechanism = (mechanism or "").lower()
+    if mechanism not in MECHANISMS:
+        raise ValueError(f"不支援的機制：{mechanism}（可用：{', '.join(MECHANISMS)}）")
+    epsilon = float(epsilon)
+    if not epsilon > 0:
+        raise ValueError("epsilon 需為正數")
+    delta = float(delta)
+    if mechanism == "gaussian" and not 0 < delta < 1:
+        raise ValueError("Gaussian 機制的 delta 需介於 0 與 1 之間")
+    if bounds is not None:
+        lower, upper = float(bounds[0]), float(bounds[1])
+        if lower >= upper:
+            raise ValueError(f"資料邊界不合法：Min({lower}) 需小於 Max({upper})")
+        bounds = (lower, upper)
+    return epsilon, mechanism, delta, bounds
+
+
+def _as_float_array(values):
+    """轉成 float64 陣列並去掉空值；pandas 物件中的非數值視為空值"""
+    import numpy as np
+
+    if type(values).__module__.startswith("pandas"):
+        import pandas as pd
+
+        values = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[~np.isnan(values)]
+
+
+def compute_stats(values, bounds, bins=None) -> dict:
+    """
+    clip 後的充分統計量 {"n", "sum"(, "hist", "bin_edges")}，格式與資料來源的 compute_stats 相同。
+    bins 有指定時另外計算直方圖。
+    """
+    import numpy as np
+
+    clipped = np.clip(_as_float_array(values), bounds[0], bounds[1])
+    stats = {"n": int(clipped.size), "sum": float(clipped.sum())}
+    if bins is not None:
+        stats["hist"], stats["bin_edges"] = np.histogram(clipped, bins=int(bins), range=bounds)
+    return stats
+
+
+# =====================================================
+# 由充分統計量加噪
+# =====================================================
+
+def release(stats: dict, query: str, epsilon: float, bounds, mechanism: str = "laplace",
+            delta: float = 1e-5, sensitivity: int = 1, rng=None) -> DPResult:
+    """
+    對充分統計量加噪。query 為 mean / sum / count / histogram。
+    sensitivity 為每人最多貢獻的列數（列層級 DP 為 1；使用者層級時敏感度乘上此值）。
+
+    - mean：截斷 Laplace（結果限制在 [min, max]）或 Analytic Gaussian，敏感度 (max - min) / n
+    - sum：截斷 Laplace（結果限制在 [n·min, n·max]）或 Analytic Gaussian，敏感度 max - min
+    - count / histogram：離散 Laplace（結果不小於 0）或離散 Gaussian，整個陣列一次加噪
+    """
+    import numpy as np
+
+    from src.core.noise import add_integer_noise, noise_scale, sample_noise
+    from src.core.rng import noise_rng
+
+    epsilon, mechanism, delta, bounds = _check_params(epsilon, mechanism, delta, bounds)
+    rng = rng if rng is not None else noise_rng()
+    k = int(sensitivity)
+    n = int(stats["n"])
+
+    if query in ("count", "histogram"):
+        if query == "count":
+            counts = np.array([n], dtype=np.int64)
+        else:
+            counts = np.asarray(stats["hist"], dtype=np.int64)
+        noisy = add_integer_noise(counts, mechanism, epsilon, delta, sensitivity=k, rng=rng)
+        if mechanism == "laplace":
+            noisy = np.maximum(noisy, 0)
+        if query == "count":
+            return ScalarResult("count", noisy[0], epsilon, mechanism, delta, bounds)
+        return HistogramResult(noisy.astype(np.float64), np.asarray(stats["bin_edges"]),
+                               epsilon, mechanism, delta, bounds)
+
+    if query not in ("mean", "sum"):
+        raise ValueError(f"不支援的統計操作：{query}")
+    if bounds is None:
+        raise ValueError("mean / sum 需要資料邊界 bounds")
+    if n == 0:
+        raise ValueError("沒有有效的數值資料")
+
+    lower, upper = bounds
+    if query == "mean":
+        value = float(stats["sum"]) / n
+        scale = noise_scale(mechanism, epsilon, delta, k * (upper - lower) / n)
+        limits = (lower, upper)
+    else:
+        value = float(stats["sum"])
+        scale = noise_scale(mechanism, epsilon, delta, k * (upper - lower))
+        limits = (lower * n, upper * n)
+
+    value += float(sample_noise(mechanism, scale, 1, rng)[0])
+    if mechanism == "laplace":
+        # 與 diffprivlib 的 LaplaceTruncated 相同：結果截斷在可能的範圍內
+        value = min(max(value, limits[0]), limits[1])
+    return ScalarResult(query, value, epsilon, mechanism, delta, bounds)
+
+
+# =====================================================
+# 對陣列直接運算
+# =====================================================
+
+def mean(values, epsilon: float, bounds, mechanism: str = "laplace", delta: float = 1e-5, rng=None) -> ScalarResult:
+    """差分隱私平均值；空值與非數值略過，其餘 clip 到 bounds"""
+    return release(compute_stats(values, bounds), "mean", epsilon, bounds, mechanism, delta, rng=rng)
+
+
+def sum(values, epsilon: float, bounds, mechanism: str = "laplace", delta: float = 1e-5, rng=None) -> ScalarResult:
+    """差分隱私總和；空值與非數值略過，其餘 clip 到 bounds"""
+    return release(compute_stats(values, bounds), "sum", epsilon, bounds, mechanism, delta, rng=rng)
+
+
+def count(values, epsilon: float, mechanism: str = "laplace", delta: float = 1e-5, rng=None) -> ScalarResult:
+    """差分隱私筆數（有效數值的筆數）"""
+    stats = {"n": int(_as_float_array(values).size)}
+    return release(stats, "count", epsilon, None, mechanism, delta, rng=rng)
+
+
+def histogram(values, epsilon: float, bounds, bins: int = DEFAULT_BINS, mechanism: str = "laplace",
+              delta: float = 1e-5, rng=None) -> HistogramResult:
+    """差分隱私直方圖：bounds 範圍內等寬切成 bins 個區間"""
+    return release(compute_stats(values, bounds, bins), "histogram", epsilon, bounds, mechanism, delta, rng=rng)
+
+
+def distinct_count(values, epsilon: float, mechanism: str = "laplace", delta: float = 1e-5,
+                   precision: int = None, rng=None) -> ScalarResult:
+    """差分隱私相異值個數：空值略過，其餘雜湊進 HyperLogLog sketch（2^precision 個暫存器）後加噪估計"""
+    from src.core.hll import DEFAULT_PRECISION, HyperLogLog, release_distinct
+
+    epsilon, mechanism, delta, _ = _check_params(epsilon, mechanism, delta, None)
+    sketch = HyperLogLog(DEFAULT_PRECISION if precision is None else precision).update(values)
+    value = release_distinct(sketch, epsilon, mechanism, delta, rng=rng)
+    return ScalarResult("distinct", value, epsilon, mechanism, delta, None)
+
+
+# =====================================================
+# pandas accessor
+# =====================================================
+
+class DPAccessor:
+    """
+    df.dp.mean("age", epsilon=1.0, bounds=(0, 100))
+    series.dp.mean(epsilon=1.0, bounds=(0, 100))
+    """
+
+    def __init__(self, obj):
+        self._obj = obj
+
+    def _values(self, column):
+        if hasattr(self._obj, "columns"):
+            if column is None:
+                raise ValueError("DataFrame 需指定欄位")
+            return self._obj[column]
+        return self._obj
+
+    def mean(self, column=None, **kwargs) -> ScalarResult:
+        return mean(self._values(column), **kwargs)
+
+    def sum(self, column=None, **kwargs) -> ScalarResult:
+        return sum(self._values(column), **kwargs)
+
+    def count(self, column=None, **kwargs) -> ScalarResult:
+        return count(self._values(column), **kwargs)
+
+    def histogram(self, column=None, **kwargs) -> HistogramResult:
+        return histogram(self._values(column), **kwargs)
+
+    def distinct_count(self, column=None, **kwargs) -> ScalarResult:
+        return distinct_count(self._values(column), **kwargs)
+
+
+_accessor_registered = False
+
+
+def register_accessor():
+    """註冊 DataFrame / Series 的 .dp accessor（重複呼叫不會重複註冊）"""
+    global _accessor_registered
+    if _accessor_registered:
+        return
+    import pandas as pd
+
+    pd.api.extensions.register_dataframe_accessor("dp")(DPAccessor)
+    pd.api.extensions.register_series_accessor("dp")(DPAccessor)
+    _accessor_registered = True
+
+
+if "pandas" in sys.modules:
+    register_accessor()
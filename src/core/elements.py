@@ -1,5 +1,50 @@
 # 用於集中管理 GUI 的所有使用者設定參數
 
+class SettingsSnapshot:
+    """
+    送出運算工作當下的設定快照（不可變更）。
+    工作執行期間 GUI 再怎麼調整 dp_settings，都不會影響已送出的工作；
+    可 hash，因此也能拿來判斷兩個待執行工作是否相同。
+    """
+
+    __slots__ = ("epsilon", "mechanism", "delta", "query", "column",
+                 "sensitivity_min", "sensitivity_max", "user_column", "max_rows_per_user",
+                 "time_column", "time_bucket", "time_start", "time_end", "continual", "top_k", "feature_columns", "norm_bound", "column_bounds",
+                 "join_dataset", "join_keys", "join_column", "join_aggregate", "max_matches", "category_domains",
+                 "parallel_columns")
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SettingsSnapshot 不可修改，請重新由 dp_settings.snapshot() 建立")
+
+    def __delattr__(self, name):
+        raise AttributeError("SettingsSnapshot 不可修改")
+
+    def _key(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, SettingsSnapshot) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def replace(self, **changes):
+        """回傳修改部分欄位後的新快照（例如多欄位查詢拆成單一欄位）"""
+        values = self.get_all()
+        values.update(changes)
+        return SettingsSnapshot(**values)
+
+    def get_all(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"<SettingsSnapshot {self.get_all()}>"
+
+
 class DPSettings:
     """
     統一記錄使用者在 GUI 選擇的差分隱私相關設定。
@@ -15,6 +60,24 @@ class DPSettings:
         self.column = None   # 需檔案載入後才能填入
         self.sensitivity_min = None
         self.sensitivity_max = None
+        self.user_column = None      # 使用者 ID 欄位；None 表示每一列視為不同的人（列層級 DP）
+        self.max_rows_per_user = 1   # 使用者層級 DP：每人最多計入的列數
+        self.time_column = None      # 時間序列查詢：時間欄位
+        self.time_bucket = "每日 (Day)"
+        self.time_start = None       # 時間序列：公開的時間範圍起點（與資料邊界相同，不可取自資料本身）
+        self.time_end = None         # 時間序列：公開的時間範圍終點；持續發布模式可省略（使用目前時間）
+        self.continual = False       # 時間序列持續發布模式
+        self.top_k = 10              # 類別次數查詢：發布前 k 名
+        self.feature_columns = None  # 共變異數矩陣：參與的數值欄位；None 表示全部欄位
+        self.norm_bound = 1.0        # 共變異數矩陣：每列向量的 L2 範數上限
+        self.column_bounds = None    # 合成資料：數值欄位的 ((欄位, min, max), ...)；其餘欄位視為類別
+        self.join_dataset = None     # 關聯查詢：另一個已載入資料集的名稱（loaded_datasets）
+        self.join_keys = None        # 關聯查詢：(目前資料集的 key, 關聯資料集的 key)
+        self.join_column = None      # 關聯查詢：("left" 目前資料集 / "right" 關聯資料集, 數值欄位)
+        self.join_aggregate = "平均值 (Mean)"
+        self.max_matches = 1         # 關聯查詢：每個 key 兩邊各自最多保留的列數
+        self.category_domains = None # 類別欄位的公開類別清單 ((欄位, (類別, ...)), ...)；未列出的欄位以門檻篩選類別
+        self.parallel_columns = None # 多欄位查詢：(欄位, ...)；有指定時每個欄位各自發布一次（process pool 平行彙總）
 
     # ============
     # Setter 區段
@@ -39,6 +102,67 @@ class DPSettings:
         self.sensitivity_min = min_val
         self.sensitivity_max = max_val
 
+    def set_user_column(self, col):
+        self.user_column = col
+
+    def set_max_rows_per_user(self, value):
+        self.max_rows_per_user = value
+
+    def set_time_column(self, col):
+        self.time_column = col
+
+    def set_time_bucket(self, bucket: str):
+        self.time_bucket = bucket
+
+    def set_time_range(self, start, end):
+        """公開時間範圍（字串，格式檢查交給 Engine）；空字串視為未指定"""
+        self.time_start = start or None
+        self.time_end = end or None
+
+    def set_continual(self, enabled: bool):
+        self.continual = bool(enabled)
+
+    def set_top_k(self, value):
+        self.top_k = value
+
+    def set_feature_columns(self, columns):
+        self.feature_columns = tuple(columns) if columns else None
+
+    def set_norm_bound(self, value):
+        self.norm_bound = value
+
+    def set_column_bounds(self, bounds_by_column):
+        """bounds_by_column: {欄位: (min, max)}；存成 tuple 讓設定快照可 hash"""
+        if not bounds_by_column:
+            self.column_bounds = None
+            return
+        self.column_bounds = tuple((c, lo, hi) for c, (lo, hi) in bounds_by_column.items())
+
+    def set_join_dataset(self, name):
+        self.join_dataset = name
+
+    def set_join_keys(self, left_key, right_key):
+        self.join_keys = (left_key, right_key)
+
+    def set_join_column(self, side: str, column):
+        self.join_column = (side, column)
+
+    def set_join_aggregate(self, aggregate: str):
+        self.join_aggregate = aggregate
+
+    def set_max_matches(self, value):
+        self.max_matches = value
+
+    def set_category_domains(self, domains_by_column):
+        """domains_by_column: {欄位: [類別, ...]}；存成 tuple 讓設定快照可 hash，空清單的欄位略過"""
+        domains = tuple(
+            (c, tuple(str(label) for label in labels)) for c, labels in (domains_by_column or {}).items() if labels
+        )
+        self.category_domains = domains or None
+
+    def set_parallel_columns(self, columns):
+        self.parallel_columns = tuple(columns) if columns else None
+
     # ============
     # Getter 區段
     # ============
@@ -52,9 +176,31 @@ class DPSettings:
             "query": self.query,
             "column": self.column,
             "sensitivity_min": self.sensitivity_min,
-            "sensitivity_max": self.sensitivity_max
+            "sensitivity_max": self.sensitivity_max,
+            "user_column": self.user_column,
+            "max_rows_per_user": self.max_rows_per_user,
+            "time_column": self.time_column,
+            "time_bucket": self.time_bucket,
+            "time_start": self.time_start,
+            "time_end": self.time_end,
+            "continual": self.continual,
+            "top_k": self.top_k,
+            "feature_columns": self.feature_columns,
+            "norm_bound": self.norm_bound,
+            "column_bounds": self.column_bounds,
+            "join_dataset": self.join_dataset,
+            "join_keys": self.join_keys,
+            "join_column": self.join_column,
+            "join_aggregate": self.join_aggregate,
+            "max_matches": self.max_matches,
+            "category_domains": self.category_domains,
+            "parallel_columns": self.parallel_columns
         }
 
+    def snapshot(self) -> SettingsSnapshot:
+        """取得目前設定的不可變快照（送出運算工作時使用）"""
+        return SettingsSnapshot(**self.get_all())
+
     def __repr__(self):
         return f"<DPSettings {self.get_all()}>"
 
@@ -1,8 +1,29 @@
 import numpy as np
 import pandas as pd
-import diffprivlib.tools as dpt
-from diffprivlib.mechanisms import GaussianAnalytic
+from src.core import dp
+from src.core.contribution import cap_rows_per_user, user_level_stats
+from src.core.covariance import block_rows_for, covariance_stats, iter_frame_blocks, release_covariance
 from src.core.elements import dp_settings
+from src.core.hierarchy import HierarchicalHistogram
+from src.core.hll import DEFAULT_PRECISION, HyperLogLog, release_distinct, relative_error
+from src.core.join import join_stats, loaded_datasets
+from src.core.profiler import suggest_bounds_dp
+from src.core.synth import fit_synthesizer
+from src.core.timeseries import (
+    ContinualSeries, bucket_aggregates, bucket_range, get_continual_series, normalize_bucket, release_series
+)
+from src.core.topk import category_counts, release_top_k, release_top_k_thresholded, restrict_to_domain
+
+
+# 直方圖預設 bins 數量（之後可以改成由 GUI 設定）
+DEFAULT_BINS = 10
+
+# 階層直方圖（區間查詢）：16 叉樹、16^4 = 65536 個葉節點
+HIERARCHY_BRANCHING = 16
+HIERARCHY_LEAVES = HIERARCHY_BRANCHING ** 4
+
+# 相異值個數：sketch 暫存器數 2^DISTINCT_PRECISION（4 KB）
+DISTINCT_PRECISION = DEFAULT_PRECISION
 
 
 def _normalize_mechanism_name(mech_text: str) -> str:
@@ -22,9 +43,24 @@ def _normalize_mechanism_name(mech_text: str) -> str:
 def _normalize_query_name(query_text: str) -> str:
     """
     把 GUI 裡顯示的文字 (例如 '平均值 (Mean)', '總和 (Sum)') 
-    轉成內部統一使用的 key：'mean' / 'sum' / 'count' / 'histogram'
+    轉成內部統一使用的 key：'mean' / 'sum' / 'count' / 'histogram' / 'range' / 'distinct' ...
     """
     text = (query_text or "").lower()
+    if "synth" in text or "合成" in text:
+        return "synthetic"
+    if "cov" in text or "corr" in text or "共變異" in text or "相關" in text:
+        return "covariance"
+    if "join" in text or "關聯" in text:
+        return "join"
+    if "range" in text or "區間" in text:
+        return "range"
+    if "time" in text or "時間" in text:
+        return "timeseries"
+    if "top" in text or "前 k" in text or "類別" in text:
+        return "topk"
+    # 需在 count 之前判斷（'Distinct Count' 也含有 count）
+    if "distinct" in text or "相異" in text:
+        return "distinct"
     if "mean" in text or "平均" in text:
         return "mean"
     if "sum" in text or "總和" in text:
@@ -37,9 +73,523 @@ def _normalize_query_name(query_text: str) -> str:
     return "mean"
 
 
-def run_dp_from_settings(df: pd.DataFrame):
+def _read_settings(columns, column=None, bounds=None, settings=None):
+    """
+    讀取設定並做基本檢查。
+    settings 為 SettingsSnapshot；未指定時取 dp_settings 當下的快照。
+    column / bounds 可覆寫設定中的目標欄位與資料邊界（多欄位運算用）。
+
+    回傳 (params, error)：
+        - 成功時 params 為整理好的參數 dict，error 為 None
+        - 失敗時 params 為 None，error 為可直接回傳給 GUI 的錯誤 dict
+    """
+    if settings is None:
+        settings = dp_settings.snapshot()
+    cfg = settings.get_all()
+    epsilon = float(cfg["epsilon"])
+    mech_key = _normalize_mechanism_name(cfg["mechanism"])
+    query_key = _normalize_query_name(cfg["query"])
+    column = cfg["column"] if column is None else column
+    min_str, max_str = (cfg["sensitivity_min"], cfg["sensitivity_max"]) if bounds is None else bounds
+    try:
+        delta = float(cfg.get("delta", 1e-5))
+    except (ValueError, TypeError):
+        delta = 1e-5
+
+    feature_columns = None
+    norm_bound = None
+    # 合成資料：多個欄位，數值欄位各自的資料邊界，其餘欄位視為類別
+    column_bounds = None
+    # 關聯查詢：另一個已載入的資料集、兩邊的 key、數值欄位所在的一邊與每個 key 的配對上限
+    join_dataset = None
+    join_keys = None
+    join_column = None
+    join_aggregate = None
+    max_matches = None
+
+    # 共變異數矩陣：多個欄位 + 每列範數上限，不使用單一目標欄位與資料邊界
+    if query_key == "covariance":
+        column = None
+        feature_columns = tuple(cfg.get("feature_columns") or columns)
+        missing = [c for c in feature_columns if c not in columns]
+        if missing:
+            return None, {
+                "ok": False,
+                "message": f"找不到欄位：{', '.join(map(str, missing))}",
+                "result": None
+            }
+        if len(feature_columns) < 2:
+            return None, {
+                "ok": False,
+                "message": "共變異數矩陣至少需要兩個數值欄位",
+                "result": None
+            }
+        try:
+            norm_bound = float(cfg.get("norm_bound"))
+        except (TypeError, ValueError):
+            norm_bound = 0.0
+        if not norm_bound > 0:
+            return None, {
+                "ok": False,
+                "message": "請正確輸入範數上限（需為正數）",
+                "result": None
+            }
+
+    elif query_key == "synthetic":
+        column = None
+        feature_columns = tuple(cfg.get("feature_columns") or columns)
+        missing = [c for c in feature_columns if c not in columns]
+        if missing:
+            return None, {
+                "ok": False,
+                "message": f"找不到欄位：{', '.join(map(str, missing))}",
+                "result": None
+            }
+        if not feature_columns:
+            return None, {
+                "ok": False,
+                "message": "合成資料至少需要一個欄位",
+                "result": None
+            }
+        column_bounds = []
+        for name, lo, hi in cfg.get("column_bounds") or ():
+            if name not in feature_columns:
+                return None, {
+                    "ok": False,
+                    "message": f"資料邊界的欄位不在合成資料的欄位中：{name}",
+                    "result": None
+                }
+            try:
+                lo, hi = float(lo), float(hi)
+            except (TypeError, ValueError):
+                return None, {
+                    "ok": False,
+                    "message": f"欄位 {name} 的資料邊界需為數值",
+                    "result": None
+                }
+            if lo >= hi:
+                return None, {
+                    "ok": False,
+                    "message": f"欄位 {name} 的資料邊界不合法：Min({lo}) 需小於 Max({hi})",
+                    "result": None
+                }
+            column_bounds.append((name, lo, hi))
+        column_bounds = tuple(column_bounds)
+
+    elif query_key == "join":
+        join_dataset = cfg.get("join_dataset")
+        other = loaded_datasets.get(join_dataset) if join_dataset is not None else None
+        if other is None:
+            return None, {
+                "ok": False,
+                "message": "請先選擇要關聯的資料集",
+                "result": None
+            }
+        left_key, right_key = cfg.get("join_keys") or (None, None)
+        if left_key not in columns:
+            return None, {
+                "ok": False,
+                "message": f"找不到關聯鍵：{left_key}",
+                "result": None
+            }
+        if right_key not in other.columns:
+            return None, {
+                "ok": False,
+                "message": f"關聯資料集找不到關聯鍵：{right_key}",
+                "result": None
+            }
+        side, column = cfg.get("join_column") or ("left", None)
+        if side not in ("left", "right") or column not in (columns if side == "left" else other.columns):
+            return None, {
+                "ok": False,
+                "message": f"找不到數值欄位：{column}",
+                "result": None
+            }
+        join_aggregate = _normalize_query_name(cfg.get("join_aggregate"))
+        if join_aggregate not in ("mean", "sum", "count", "histogram"):
+            return None, {
+                "ok": False,
+                "message": "關聯查詢只支援平均值 / 總和 / 計數 / 直方圖",
+                "result": None
+            }
+        try:
+            max_matches = int(cfg.get("max_matches") or 1)
+        except (TypeError, ValueError):
+            max_matches = 0
+        if max_matches < 1:
+            return None, {
+                "ok": False,
+                "message": "每個關聯鍵最多配對列數需為正整數",
+                "result": None
+            }
+        join_keys = (left_key, right_key)
+        join_column = (side, column)
+
+    elif column is None:
+        return None, {
+            "ok": False,
+            "message": "請先在左側選擇目標欄位 (Column)",
+            "result": None
+        }
+
+    elif column not in columns:
+        return None, {
+            "ok": False,
+            "message": f"找不到欄位：{column}",
+            "result": None
+        }
+
+    # 類別次數 (top-k)、相異值個數、共變異數矩陣與合成資料不使用單一資料邊界
+    data_bounds = None
+    if query_key not in ("topk", "distinct", "covariance", "synthetic"):
+        try:
+            data_min = float(min_str)
+            data_max = float(max_str)
+        except (TypeError, ValueError):
+            return None, {
+                "ok": False,
+                "message": "請正確輸入資料邊界 Min / Max（需為數值）",
+                "result": None
+            }
+
+        if data_min >= data_max:
+            return None, {
+                "ok": False,
+                "message": f"資料邊界不合法：Min({data_min}) 需小於 Max({data_max})",
+                "result": None
+            }
+        data_bounds = (data_min, data_max)
+
+    # 使用者層級 DP：指定使用者 ID 欄位時，每人最多計入 max_rows_per_user 列
+    user_column = cfg.get("user_column")
+    max_rows_per_user = 1
+    if user_column is not None:
+        if user_column not in columns:
+            return None, {
+                "ok": False,
+                "message": f"找不到使用者欄位：{user_column}",
+                "result": None
+            }
+        if user_column == column:
+            return None, {
+                "ok": False,
+                "message": "使用者欄位不能與目標欄位相同",
+                "result": None
+            }
+        try:
+            max_rows_per_user = int(cfg.get("max_rows_per_user") or 1)
+        except (TypeError, ValueError):
+            max_rows_per_user = 0
+        if max_rows_per_user < 1:
+            return None, {
+                "ok": False,
+                "message": "每位使用者最多列數需為正整數",
+                "result": None
+            }
+
+    # 時間序列：需要時間欄位、分桶大小與公開時間範圍（持續發布模式的終點預設為目前時間）
+    time_column = None
+    time_bucket = None
+    time_range = None
+    if query_key == "timeseries":
+        time_column = cfg.get("time_column")
+        if time_column is None or time_column not in columns:
+            return None, {
+                "ok": False,
+                "message": "時間序列查詢請先選擇時間欄位",
+                "result": None
+            }
+        time_bucket = normalize_bucket(cfg.get("time_bucket"))
+        start, end = cfg.get("time_start"), cfg.get("time_end")
+        if end is None and cfg.get("continual"):
+            end = pd.Timestamp.now()
+        try:
+            time_range = (pd.Timestamp(start), pd.Timestamp(end))
+            if pd.isna(time_range[0]) or pd.isna(time_range[1]):
+                raise ValueError
+        except (TypeError, ValueError):
+            return None, {
+                "ok": False,
+                "message": "時間序列查詢請輸入公開的時間範圍（起 / 迄，例如 2024-01-01）",
+                "result": None
+            }
+
+    # 類別欄位的公開類別清單：{欄位: (類別, ...)}；
+    # top-k 的目標欄位 / 合成資料的類別欄位沒有清單時，以雜訊次數門檻篩選類別（需要 δ）
+    category_domains = {}
+    for entry in cfg.get("category_domains") or ():
+        try:
+            name, labels = entry
+            labels = tuple(str(label) for label in labels)
+        except (TypeError, ValueError):
+            return None, {
+                "ok": False,
+                "message": "公開類別清單格式錯誤，需為 (欄位, [類別, ...])",
+                "result": None
+            }
+        if labels:
+            category_domains[name] = labels
+    domain_threshold = False
+    if query_key == "topk":
+        domain_threshold = column not in category_domains
+    elif query_key == "synthetic":
+        bounded = {name for name, _, _ in column_bounds}
+        domain_threshold = any(c not in bounded and c not in category_domains for c in feature_columns)
+
+    top_k = None
+    if query_key == "topk":
+        try:
+            top_k = int(cfg.get("top_k") or 10)
+        except (TypeError, ValueError):
+            top_k = 0
+        if top_k < 1:
+            return None, {
+                "ok": False,
+                "message": "前 k 名的 k 需為正整數",
+                "result": None
+            }
+
+    params = {
+        "epsilon": epsilon,
+        "mechanism": mech_key,
+        "query": query_key,
+        "column": column,
+        "delta": delta,
+        "bounds": data_bounds,
+        "user_column": user_column,
+        "max_rows_per_user": max_rows_per_user,
+        "time_column": time_column,
+        "time_bucket": time_bucket,
+        "time_range": time_range,
+        "continual": bool(cfg.get("continual")) if query_key == "timeseries" else False,
+        "top_k": top_k,
+        "columns": feature_columns,
+        "norm_bound": norm_bound,
+        "column_bounds": column_bounds,
+        "join_dataset": join_dataset,
+        "join_keys": join_keys,
+        "join_column": join_column,
+        "join_aggregate": join_aggregate,
+        "max_matches": max_matches,
+        "category_domains": category_domains,
+        "domain_threshold": domain_threshold,
+    }
+    return params, None
+
+
+def _unsupported_on_source(params, source=None):
+    """彙總下推 / 平行運算的資料來源只提供 n / sum / hist，無法做使用者層級與時間序列查詢"""
+    if params["user_column"] is not None:
+        return "此資料來源尚不支援使用者層級差分隱私，請改用 CSV / XLSX"
+    if params["query"] == "timeseries":
+        return "此資料來源尚不支援時間序列查詢，請改用 CSV / XLSX"
+    if params["query"] == "topk" and not hasattr(source, "category_counts"):
+        return "此資料來源尚不支援類別次數查詢"
+    if params["query"] == "distinct" and not hasattr(source, "distinct_sketch"):
+        return "此資料來源尚不支援相異值個數查詢"
+    if params["query"] == "covariance" and not hasattr(source, "iter_blocks"):
+        return "此資料來源尚不支援共變異數矩陣"
+    if params["query"] == "join" and not hasattr(source, "iter_blocks"):
+        return "此資料來源尚不支援關聯查詢"
+    if params["query"] == "synthetic":
+        return "此資料來源尚不支援合成資料，請改用 CSV / XLSX"
+    return None
+
+
+def _stats_request(params):
+    """
+    回傳 (彙總用的查詢類型, bins)：
+    區間查詢的充分統計量就是 HIERARCHY_LEAVES 個 bin 的細直方圖，資料來源照 histogram 計算即可。
+    """
+    if params["query"] == "range":
+        return "histogram", HIERARCHY_LEAVES
+    return params["query"], DEFAULT_BINS
+
+
+def _ledger_replay(dataset, settings, ledger):
+    """
+    發布紀錄查詢：回傳 (dataset_hash, params, 結果)。
+    結果不是 None 時（設定錯誤，或相同查詢先前已發布）直接回傳；沒有 ledger 時 dataset_hash 為 None。
+    """
+    dataset_hash = getattr(dataset, "content_hash", None) if ledger is not None else None
+    if dataset_hash is None:
+        return None, None, None
+    params, error = _read_settings(dataset.columns, settings=settings)
+    if error is not None:
+        return dataset_hash, None, error
+    if params["query"] == "join":
+        # 關聯資料集的內容也是查詢的一部分；這次發布同時花費兩個資料集的預算
+        params["join_hash"] = getattr(loaded_datasets.get(params["join_dataset"]), "content_hash", None)
+    replay = ledger.lookup(dataset_hash, params, _stats_request(params)[1])
+    if replay is not None:
+        replay["replayed"] = True
+        replay["budget"] = ledger.budget(dataset_hash)
+        return dataset_hash, params, {
+            "ok": True,
+            "message": "相同查詢先前已發布，直接回傳當時的結果（未再花費隱私預算）",
+            "result": replay
+        }
+    return dataset_hash, params, None
+
+
+def _finish_release(dataset, result, ledger, dataset_hash, params):
+    """附上抽樣比例，並把新的發布寫入 ledger"""
+    # 區塊抽樣的資料集：結果只代表樣本，附上實際讀取比例
+    sample_fraction = getattr(dataset, "sample_fraction", None)
+    if sample_fraction is not None and result["ok"]:
+        result["result"]["sample_fraction"] = sample_fraction
+
+    if params is not None and result["ok"]:
+        ledger.record(dataset_hash, params, _stats_request(params)[1], result["result"])
+        if params.get("join_hash") is not None and params["join_hash"] != dataset_hash:
+            ledger.record(params["join_hash"], params, _stats_request(params)[1], result["result"])
+        result["result"]["budget"] = ledger.budget(dataset_hash)
+    return result
+
+
+def run_dp(dataset, settings=None, ledger=None):
+    """
+    依資料集型態選擇執行方式：
+    - 設定了 parallel_columns（多欄位查詢）→ run_dp_columns
+    - 可下推彙總的資料來源（有 compute_stats，例如 SQLiteSource）→ run_dp_on_source
+    - 其他（DataFrame / LazyDataset）→ run_dp_from_settings
+
+    ledger (ReleaseLedger) 有指定且資料集提供 content_hash 時：
+    - 完全相同的查詢直接回傳先前發布的結果，不讀資料、也不再花費隱私預算
+    - 新的發布會寫入 ledger 並累計該資料集的 ε / δ
+    """
+    if settings is None:
+        settings = dp_settings.snapshot()
+    if settings.parallel_columns:
+        return run_dp_columns(dataset, settings, ledger)
+
+    dataset_hash, params, replay = _ledger_replay(dataset, settings, ledger)
+    if replay is not None:
+        return replay
+
+    if hasattr(dataset, "compute_stats"):
+        result = run_dp_on_source(dataset, settings)
+    else:
+        result = run_dp_from_settings(dataset, settings)
+    return _finish_release(dataset, result, ledger, dataset_hash, params)
+
+
+# DP 邊界建議花費的 ε（記入發布紀錄，與一般查詢累計在同一個預算）
+BOUNDS_SUGGEST_EPSILON = 0.1
+
+
+def suggest_bounds(dataset, column, domain, epsilon: float = BOUNDS_SUGGEST_EPSILON, ledger=None):
+    """
+    DP 邊界建議（profiler.suggest_bounds_dp）：在公開的粗略範圍 domain 內估計分位數，花費 epsilon。
+    ledger 有指定且資料集提供 content_hash 時，這次花費的 ε 與一般查詢一樣寫入發布紀錄；
+    相同欄位 + 範圍 + ε 的建議直接回傳先前的結果，不再花費預算。
+    回傳 ((lower, upper), 該資料集累計預算或 None)
+    """
+    params = {
+        "epsilon": float(epsilon),
+        "mechanism": "exponential",
+        "query": "bounds",
+        "column": column,
+        "delta": 0.0,
+        "bounds": (float(domain[0]), float(domain[1])),
+    }
+    dataset_hash = getattr(dataset, "content_hash", None) if ledger is not None else None
+    if dataset_hash is not None:
+        replay = ledger.lookup(dataset_hash, params, 0)
+        if replay is not None:
+            return tuple(replay["suggested_bounds"]), ledger.budget(dataset_hash)
+
+    bounds = suggest_bounds_dp(dataset[column], params["bounds"], epsilon=params["epsilon"])
+    if dataset_hash is None:
+        return bounds, None
+    ledger.record(dataset_hash, params, 0, {
+        "epsilon": params["epsilon"],
+        "mechanism": params["mechanism"],
+        "query": "bounds",
+        "column": column,
+        "bounds": params["bounds"],
+        "suggested_bounds": list(bounds),
+    })
+    return bounds, ledger.budget(dataset_hash)
+
+
+# 多欄位查詢支援的查詢類型（每個欄位只需要 n / sum / hist）
+PARALLEL_QUERIES = ("mean", "sum", "count", "histogram", "range")
+
+
+def run_dp_columns(dataset, settings=None, ledger=None, max_workers=None):
+    """
+    多欄位查詢：settings.parallel_columns 的每個欄位各自發布一次（各自花費一次 ε，各自寫入 ledger）。
+    資料邊界取自 settings.column_bounds（未列出的欄位使用共同的資料邊界）。
+    - 可下推彙總的資料來源直接由資料來源計算
+    - DataFrame / LazyDataset：需要的欄位一次解析後放進 shared memory，
+      由 ParallelExecutor 的 process pool 分欄位 × row block 彙總
+    先前已發布的欄位直接重播，不讀資料。
+    回傳 {"ok", "message", "result": {"query", "columns": {欄位: 與 run_dp 相同格式的 dict}}}
     """
-    使用目前 dp_settings 裡的設定，對 df 做差分隱私統計。
+    if settings is None:
+        settings = dp_settings.snapshot()
+    query_key = _normalize_query_name(settings.query)
+    if query_key not in PARALLEL_QUERIES:
+        return {
+            "ok": False,
+            "message": "多欄位查詢只支援平均值 / 總和 / 計數 / 直方圖 / 區間查詢",
+            "result": None
+        }
+
+    columns = list(dict.fromkeys(settings.parallel_columns))
+    # 各欄位的資料邊界：column_bounds 有列出的欄位用自己的邊界，其餘使用共同的資料邊界
+    bounds_by_column = {name: (lo, hi) for name, lo, hi in settings.column_bounds or ()}
+    results = {}
+    pending = {}  # 欄位 -> (dataset_hash, params)
+    for column in columns:
+        lower, upper = bounds_by_column.get(column, (settings.sensitivity_min, settings.sensitivity_max))
+        single = settings.replace(column=column, parallel_columns=None, sensitivity_min=lower, sensitivity_max=upper)
+        dataset_hash, params, replay = _ledger_replay(dataset, single, ledger)
+        if replay is not None:
+            results[column] = replay
+        else:
+            pending[column] = (dataset_hash, params)
+
+    numeric = [c for c in pending if c in dataset.columns]
+    for column in pending:
+        if column not in dataset.columns:
+            results[column] = {
+                "ok": False,
+                "message": f"找不到欄位：{column}",
+                "result": None
+            }
+
+    if numeric:
+        if hasattr(dataset, "compute_stats"):
+            released = run_dp_for_columns(dataset, numeric, bounds_by_column, settings=settings)
+        else:
+            # 延遲 import：parallel 模組本身依賴 engine.merge_stats
+            from src.core.parallel import ParallelExecutor
+            try:
+                with ParallelExecutor(dataset, numeric, max_workers=max_workers) as executor:
+                    released = run_dp_for_columns(executor, numeric, bounds_by_column, settings=settings)
+            except Exception as e:
+                released = {c: {"ok": False, "message": f"平行彙總失敗：{e}", "result": None} for c in numeric}
+        for column, result in released.items():
+            dataset_hash, params = pending[column]
+            results[column] = _finish_release(dataset, result, ledger, dataset_hash, params)
+
+    n_ok = sum(1 for c in columns if results[c]["ok"])
+    return {
+        "ok": n_ok > 0,
+        "message": f"多欄位差分隱私運算完成（{n_ok} / {len(columns)} 個欄位成功）",
+        "result": {
+            "query": query_key,
+            "columns": {str(c): results[c] for c in columns},
+        }
+    }
+
+
+def run_dp_from_settings(df: pd.DataFrame, settings=None):
+    """
+    使用設定快照 settings（預設為 dp_settings 當下的設定），對 df 做差分隱私統計。
+    df 可以是 DataFrame 或 LazyDataset（只需提供 columns 與 df[column]）。
     
     回傳格式：
         {
@@ -48,220 +598,718 @@ def run_dp_from_settings(df: pd.DataFrame):
             "result":  {... 差分隱私結果 ...} 或 None
         }
     """
-    # 1. 讀取設定
-    cfg = dp_settings.get_all()
-    epsilon = float(cfg["epsilon"])
-    mech_key = _normalize_mechanism_name(cfg["mechanism"])
-    query_key = _normalize_query_name(cfg["query"])
-    column = cfg["column"]
-    min_str = cfg["sensitivity_min"]
-    max_str = cfg["sensitivity_max"]
+    # 1. 讀取設定 + 2. 基本檢查
+    params, error = _read_settings(df.columns, settings=settings)
+    if error is not None:
+        return error
+
+    if params["query"] == "timeseries":
+        return run_dp_time_series(df, params)
+
+    if params["query"] == "topk":
+        return run_dp_top_k(df, params)
+
+    if params["query"] == "distinct":
+        return run_dp_distinct(df, params)
+
+    if params["query"] == "join":
+        return run_dp_join(df, params)
+
+    if params["query"] == "covariance":
+        return run_dp_covariance(df, params)
+
+    if params["query"] == "synthetic":
+        return run_dp_synthetic(df, params)
+
+    if params["user_column"] is not None:
+        return run_dp_user_level(df, params)
+
+    # 3. 取出欄位資料（非數值視為空值），clip 在 [min, max] 後計算充分統計量
+    query_key, bins = _stats_request(params)
     try:
-        delta = float(cfg.get("delta", 1e-5))
-    except (ValueError, TypeError):
-        delta = 1e-5
+        stats = dp.compute_stats(df[params["column"]], params["bounds"], bins if query_key == "histogram" else None)
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"欄位轉換數值失敗：{e}",
+            "result": None
+        }
+
+    # 4. 加噪：與彙總下推路徑相同，經由 release_from_stats → dp.release
+    return _release_result(stats, params)
+
 
-    # 2. 基本檢查
-    if column is None:
+# =====================================================
+# 充分統計量 (sufficient statistics) 版本的運算流程
+# -----------------------------------------------------
+# 給「不需要整份資料載入記憶體」的資料來源使用：
+# 資料來源只需算出 n / clip 後總和 / 直方圖 counts，
+# 加噪則統一在這裡用 Python 完成。
+# =====================================================
+
+def merge_stats(parts):
+    """
+    合併多份部分充分統計量（例如各 row block / 各分割檔各自算出的結果）。
+    n 與 sum 直接相加；若有 hist 則逐 bin 相加（bin_edges 需相同）。
+    """
+    parts = list(parts)
+    merged = {
+        "n": sum(int(p["n"]) for p in parts),
+        "sum": float(sum(float(p["sum"]) for p in parts)),
+    }
+    hists = [p["hist"] for p in parts if p.get("hist") is not None]
+    if hists:
+        merged["hist"] = np.sum(hists, axis=0)
+        merged["bin_edges"] = next(p["bin_edges"] for p in parts if p.get("hist") is not None)
+    return merged
+
+
+def release_from_stats(stats: dict, params: dict):
+    """
+    對已經 clip 過的充分統計量加噪。
+
+    stats:
+        {
+            "n":         有效數值筆數,
+            "sum":       clip 後的總和,
+            "hist":      各 bin 的 count（僅 histogram 需要）,
+            "bin_edges": bin 邊界（僅 histogram 需要）
+        }
+    params: _read_settings() 回傳的參數
+
+    mean / sum / count / histogram 交給 dp.release（引擎與函式庫 API 共用同一套機制與敏感度），
+    range 發布階層直方圖；回傳填好結果的 result_payload，若不支援則丟出 ValueError。
+    使用者層級 DP 時（params 有 user_column），每人最多貢獻 k 列，敏感度乘上 k。
+    """
+    mech_key = params["mechanism"]
+    query_key = params["query"]
+    data_min, data_max = params["bounds"]
+    k = int(params.get("max_rows_per_user") or 1) if params.get("user_column") is not None else 1
+
+    if mech_key not in ("laplace", "gaussian"):
+        raise ValueError(f"不支援的機制：{mech_key}")
+
+    if query_key == "range":
+        # 階層直方圖：整棵樹一次加噪，之後的區間查詢都由發布的樹回答
+        result_payload = {
+            "epsilon": params["epsilon"],
+            "mechanism": mech_key,
+            "query": query_key,
+            "bounds": (data_min, data_max)
+        }
+        tree = HierarchicalHistogram.release(
+            stats["hist"], (data_min, data_max), params["epsilon"], mech_key, params["delta"],
+            branching=HIERARCHY_BRANCHING, sensitivity=k
+        )
+        result_payload.update(tree.to_payload())
+        result_payload["hist"], result_payload["bin_edges"] = tree.histogram(DEFAULT_BINS)
+        if mech_key == "gaussian":
+            result_payload["delta"] = params["delta"]
+    else:
+        result = dp.release(
+            stats, query_key, params["epsilon"], (data_min, data_max), mech_key, params["delta"], sensitivity=k
+        )
+        result_payload = result.to_payload()
+    result_payload["column"] = params["column"]
+
+    if params.get("user_column") is not None:
+        result_payload["user_column"] = params["user_column"]
+        result_payload["max_rows_per_user"] = k
+    return result_payload
+
+
+def run_dp_user_level(df, params: dict):
+    """
+    使用者層級差分隱私：先依 user_column 限制每人最多 max_rows_per_user 列，
+    再以放大 k 倍的敏感度加噪。結果另外回報因貢獻上限而丟棄的列數 rows_dropped。
+    """
+    query_key, bins = _stats_request(params)
+    try:
+        stats = user_level_stats(
+            df[params["column"]],
+            df[params["user_column"]],
+            params["bounds"],
+            params["max_rows_per_user"],
+            query_key,
+            bins
+        )
+    except Exception as e:
         return {
             "ok": False,
-            "message": "請先在左側選擇目標欄位 (Column)",
+            "message": f"使用者貢獻上限處理失敗：{e}",
             "result": None
         }
 
-    if column not in df.columns:
+    return _release_result(stats, params)
+
+
+def run_dp_time_series(df, params: dict):
+    """
+    時間序列：依 time_column 分桶，發布每桶的雜訊筆數與總和（各花費一半的 ε）。
+    桶涵蓋公開時間範圍 params["time_range"] 的每一桶（含沒有資料的桶），範圍外的列不計。
+    - 一般模式：所有桶一次加噪
+    - 持續發布模式：二元樹機制，資料更新後再次執行只會附加新結束的桶
+    使用者層級 DP 時先限制每人最多列數，敏感度乘上 k。
+    """
+    data_min, data_max = params["bounds"]
+    bucket = params["time_bucket"]
+    k = params["max_rows_per_user"] if params["user_column"] is not None else 1
+
+    try:
+        # 桶的起迄取自公開時間範圍，資料實際的最早 / 最晚時間不影響發布哪些桶
+        index = bucket_range(*params["time_range"], bucket)
+    except ValueError as e:
         return {
             "ok": False,
-            "message": f"找不到欄位：{column}",
+            "message": str(e),
             "result": None
         }
 
     try:
-        data_min = float(min_str)
-        data_max = float(max_str)
-    except (TypeError, ValueError):
+        keep = None
+        rows_dropped = None
+        if params["user_column"] is not None:
+            keep, codes = cap_rows_per_user(df[params["user_column"]], k)
+            rows_dropped = int((codes >= 0).sum() - keep.sum())
+        counts, sums = bucket_aggregates(
+            df[params["time_column"]], df[params["column"]], (data_min, data_max), index, keep
+        )
+    except Exception as e:
         return {
             "ok": False,
-            "message": "請正確輸入資料邊界 Min / Max（需為數值）",
+            "message": f"時間分桶失敗：{e}",
             "result": None
         }
 
-    if data_min >= data_max:
+    pending = None
+    try:
+        if params["continual"]:
+            key = (
+                getattr(df, "file_path", id(df)), params["column"], params["time_column"], bucket, index[0],
+                params["mechanism"], params["epsilon"], params["delta"], (data_min, data_max),
+                params["user_column"], k
+            )
+            stream = get_continual_series(key, lambda: ContinualSeries(
+                params["epsilon"], params["mechanism"], params["delta"], (data_min, data_max), k
+            ))
+            index, noisy_counts, noisy_sums, pending = stream.update(index, counts, sums)
+            if len(index) == 0:
+                return {
+                    "ok": False,
+                    "message": f"目前只有尚未結束的時間桶 {pending}，需等更新的資料出現後才會發布",
+                    "result": None
+                }
+        else:
+            noisy_counts, noisy_sums = release_series(
+                counts, sums, (data_min, data_max), params["epsilon"], params["mechanism"], params["delta"], k
+            )
+    except Exception as e:
         return {
             "ok": False,
-            "message": f"資料邊界不合法：Min({data_min}) 需小於 Max({data_max})",
+            "message": f"差分隱私運算失敗：{e}",
             "result": None
         }
 
-    # 3. 取出欄位資料，轉成數值並 clip 在 [min, max] 範圍內
+    result_payload = {
+        "epsilon": params["epsilon"],
+        "mechanism": params["mechanism"],
+        "query": "timeseries",
+        "column": params["column"],
+        "bounds": (data_min, data_max),
+        "time_column": params["time_column"],
+        "time_bucket": bucket,
+        "continual": params["continual"],
+        "series_index": [str(p) for p in index],
+        "series_start": index.start_time.strftime("%Y-%m-%d %H:%M").tolist(),
+        "series_count": noisy_counts,
+        "series_sum": noisy_sums,
+        # 平均為後處理：雜訊總和 / 雜訊筆數，並限制在資料邊界內
+        "series_mean": np.clip(noisy_sums / np.maximum(noisy_counts, 1.0), data_min, data_max),
+    }
+    if params["mechanism"] == "gaussian":
+        result_payload["delta"] = params["delta"]
+    if pending is not None:
+        result_payload["pending_bucket"] = str(pending)
+    if params["user_column"] is not None:
+        result_payload["user_column"] = params["user_column"]
+        result_payload["max_rows_per_user"] = k
+        result_payload["rows_dropped"] = rows_dropped
+
+    return {
+        "ok": True,
+        "message": "差分隱私時間序列運算完成",
+        "result": result_payload
+    }
+
+
+def run_dp_top_k(df, params: dict):
+    """
+    類別欄位的前 k 名次數：factorize + bincount 算出所有類別次數，
+    有公開類別清單時 one-shot Gumbel 選出前 k 名，再發布其雜訊次數（選取與次數各用一半的 ε）；
+    沒有清單時所有類別一次加噪，只發布達門檻的類別。
+    使用者層級 DP 時先限制每人最多列數，敏感度乘上 k。
+    """
     try:
-        series = pd.to_numeric(df[column], errors="coerce").dropna()
+        keep = None
+        rows_dropped = None
+        if params["user_column"] is not None:
+            keep, codes = cap_rows_per_user(df[params["user_column"]], params["max_rows_per_user"])
+            rows_dropped = int((codes >= 0).sum() - keep.sum())
+        categories, counts = category_counts(df[params["column"]], keep)
     except Exception as e:
         return {
             "ok": False,
-            "message": f"欄位轉換數值失敗：{e}",
+            "message": f"類別次數計算失敗：{e}",
             "result": None
         }
 
-    if series.empty:
+    result = _release_top_k(categories, counts, params)
+    if result["ok"] and rows_dropped is not None:
+        result["result"]["rows_dropped"] = rows_dropped
+    return result
+
+
+def _release_top_k(categories, counts, params: dict):
+    """
+    top-k 選取與加噪，包成 GUI 使用的 {"ok", "message", "result"} 格式。
+    目標欄位有公開類別清單時只在清單內選取；否則只發布雜訊次數達門檻的類別。
+    """
+    domain = params["category_domains"].get(params["column"])
+    k = params["max_rows_per_user"] if params["user_column"] is not None else 1
+    threshold = None
+    try:
+        if domain is not None:
+            categories, counts = restrict_to_domain(categories, counts, domain)
+            top_categories, noisy_counts = release_top_k(
+                categories, counts, params["top_k"], params["epsilon"],
+                params["mechanism"], params["delta"], contribution=k
+            )
+        else:
+            top_categories, noisy_counts, threshold = release_top_k_thresholded(
+                categories, counts, params["top_k"], params["epsilon"],
+                params["mechanism"], params["delta"], contribution=k
+            )
+    except Exception as e:
         return {
             "ok": False,
-            "message": "目標欄位沒有有效的數值資料",
+            "message": f"差分隱私運算失敗：{e}",
             "result": None
         }
 
-    arr = series.to_numpy()
-    clipped = np.clip(arr, data_min, data_max)
+    result_payload = {
+        "epsilon": params["epsilon"],
+        "mechanism": params["mechanism"],
+        "query": "topk",
+        "column": params["column"],
+        "bounds": None,
+        "top_k": params["top_k"],
+        "categories": [str(c) for c in top_categories],
+        "counts": noisy_counts,
+    }
+    if domain is not None:
+        result_payload["category_domain"] = list(domain)
+    else:
+        result_payload["threshold"] = threshold
+    if params["mechanism"] == "gaussian" or params["domain_threshold"]:
+        result_payload["delta"] = params["delta"]
+    if params["user_column"] is not None:
+        result_payload["user_column"] = params["user_column"]
+        result_payload["max_rows_per_user"] = k
+
+    message = "差分隱私類別次數運算完成"
+    if threshold is not None and not len(top_categories):
+        message += f"（沒有類別的雜訊次數達到門檻 {threshold}，可提供公開類別清單）"
+    return {
+        "ok": True,
+        "message": message,
+        "result": result_payload
+    }
+
+
+def run_dp_distinct(dataset, params: dict):
+    """
+    相異值個數：整欄一次雜湊進 HyperLogLog sketch，再對 sketch 的層級次數加噪後估計。
+    dataset 有 distinct_sketch(column, precision)（SQLiteSource / 分割檔 / 串流資料集）時由資料來源建 sketch，
+    否則視為 DataFrame / LazyDataset 直接取欄位。
+    使用者層級 DP 時先限制每人最多列數，敏感度乘上 k。
+    """
+    k = params["max_rows_per_user"] if params["user_column"] is not None else 1
+    rows_dropped = None
+    try:
+        if hasattr(dataset, "distinct_sketch"):
+            sketch = dataset.distinct_sketch(params["column"], DISTINCT_PRECISION)
+        else:
+            values = dataset[params["column"]]
+            if params["user_column"] is not None:
+                keep, codes = cap_rows_per_user(dataset[params["user_column"]], k)
+                rows_dropped = int((codes >= 0).sum() - keep.sum())
+                values = values.reset_index(drop=True)[np.asarray(keep, dtype=bool)]
+            sketch = HyperLogLog(DISTINCT_PRECISION).update(values)
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"相異值 sketch 建立失敗：{e}",
+            "result": None
+        }
 
-    # 4. 決定要使用的機制與統計操作
-    # ----------------------------------------------------
-    # Laplace：用 diffprivlib.tools
-    # Gaussian：先算非 DP 統計，再用 Gaussian 機制加噪
-    # ----------------------------------------------------
+    try:
+        value = release_distinct(sketch, params["epsilon"], params["mechanism"], params["delta"], sensitivity=k)
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"差分隱私運算失敗：{e}",
+            "result": None
+        }
 
-    # 統一回傳的結果容器
     result_payload = {
-        "epsilon": epsilon,
-        "mechanism": mech_key,
-        "query": query_key,
+        "epsilon": params["epsilon"],
+        "mechanism": params["mechanism"],
+        "query": "distinct",
+        "column": params["column"],
+        "bounds": None,
+        "value": value,
+        "registers": sketch.registers,
+        "sketch_bytes": sketch.nbytes,
+        "relative_error": relative_error(sketch.precision),
+    }
+    if params["mechanism"] == "gaussian":
+        result_payload["delta"] = params["delta"]
+    if params["user_column"] is not None:
+        result_payload["user_column"] = params["user_column"]
+        result_payload["max_rows_per_user"] = k
+        result_payload["rows_dropped"] = rows_dropped
+
+    return {
+        "ok": True,
+        "message": "差分隱私相異值個數運算完成",
+        "result": result_payload
+    }
+
+
+def run_dp_join(dataset, params: dict):
+    """
+    關聯查詢：dataset 與 loaded_datasets 中的另一個資料集依 key 做 inner join，
+    每個 key 兩邊各自最多保留 max_matches 列，再對關聯結果做 mean / sum / count / histogram。
+    任一列最多出現在 max_matches 個關聯結果列中，敏感度乘上 max_matches。
+    """
+    if params["user_column"] is not None:
+        return {
+            "ok": False,
+            "message": "關聯查詢尚不支援使用者層級差分隱私",
+            "result": None
+        }
+
+    other = loaded_datasets.get(params["join_dataset"])
+    if other is None:
+        return {
+            "ok": False,
+            "message": f"找不到關聯資料集：{params['join_dataset']}",
+            "result": None
+        }
+
+    aggregate = params["join_aggregate"]
+    side, column = params["join_column"]
+    k = params["max_matches"]
+    try:
+        stats = join_stats(
+            dataset, other, params["join_keys"][0], params["join_keys"][1], side, column,
+            params["bounds"], DEFAULT_BINS if aggregate == "histogram" else None, k
+        )
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"資料集關聯失敗：{e}",
+            "result": None
+        }
+
+    if stats["n"] == 0:
+        return {
+            "ok": False,
+            "message": "關聯後沒有有效的數值資料（請確認兩邊的關聯鍵）",
+            "result": None
+        }
+
+    try:
+        result = dp.release(
+            stats, aggregate, params["epsilon"], params["bounds"], params["mechanism"], params["delta"], sensitivity=k
+        )
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"差分隱私運算失敗：{e}",
+            "result": None
+        }
+
+    result_payload = result.to_payload()
+    result_payload.update({
+        "query": "join",
+        "join_aggregate": aggregate,
         "column": column,
-        "bounds": (data_min, data_max)
+        "join_dataset": params["join_dataset"],
+        "join_keys": list(params["join_keys"]),
+        "join_side": side,
+        "max_matches": k,
+        "rows_dropped": int(stats["rows_dropped"]),
+    })
+    return {
+        "ok": True,
+        "message": "差分隱私關聯查詢運算完成",
+        "result": result_payload
     }
 
-    # ========== Laplace 機制 ==========
-    if mech_key == "laplace":
-        try:
-            if query_key == "mean":
-                value = dpt.mean(
-                    clipped,
-                    epsilon=epsilon,
-                    bounds=(data_min, data_max)
-                )
-                result_payload["value"] = float(value)
-
-            elif query_key == "sum":
-                value = dpt.sum(
-                    clipped,
-                    epsilon=epsilon,
-                    bounds=(data_min, data_max)
-                )
-                result_payload["value"] = float(value)
-
-            elif query_key == "count":
-                # 計數可以用全為 1 的陣列配合 count_nonzero
-                ones = np.ones_like(clipped)
-                value = dpt.count_nonzero(
-                    ones,
-                    epsilon=epsilon
-                )
-                result_payload["value"] = float(value)
-
-            elif query_key == "histogram":
-                # bins 這裡先寫死 10，之後你可以改成由 GUI 設定
-                bins = 10
-                hist, bin_edges = dpt.histogram(
-                    clipped,
-                    epsilon=epsilon,
-                    bins=bins,
-                    range=(data_min, data_max)
-                )
-                result_payload["hist"] = hist
-                result_payload["bin_edges"] = bin_edges
-            else:
-                return {
-                    "ok": False,
-                    "message": f"不支援的統計操作：{query_key}",
-                    "result": None
-                }
 
-        except Exception as e:
-            return {
-                "ok": False,
-                "message": f"差分隱私運算失敗（Laplace）：{e}",
-                "result": None
-            }
+def run_dp_covariance(dataset, params: dict):
+    """
+    共變異數 / 相關係數矩陣：分塊掃過 params["columns"]，每列範數 clip 到 norm_bound 後
+    累加 XᵀX 與各欄總和，最後整個矩陣一次加上對稱雜訊。
+    dataset 有 iter_blocks(columns, block_rows)（LazyDataset / SQLiteSource）時串流讀取，否則視為 DataFrame 切塊。
+    """
+    if params["user_column"] is not None:
+        return {
+            "ok": False,
+            "message": "共變異數矩陣尚不支援使用者層級差分隱私",
+            "result": None
+        }
 
-    # ========== Gaussian 機制 ==========
-    elif mech_key == "gaussian":
-        result_payload["delta"] = delta
+    columns = list(params["columns"])
+    block_rows = block_rows_for(len(columns))
+    try:
+        if hasattr(dataset, "iter_blocks"):
+            blocks = dataset.iter_blocks(columns, block_rows)
+        else:
+            blocks = iter_frame_blocks(dataset, columns, block_rows)
+        stats = covariance_stats(blocks, len(columns), params["norm_bound"])
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"共變異數彙總失敗：{e}",
+            "result": None
+        }
+    return _release_covariance(stats, params)
 
-        try:
-            if query_key == "mean":
-                # mean 的 sensitivity = (max - min) / n
-                n = clipped.size
-                sensitivity = (data_max - data_min) / n
-                base_value = float(clipped.mean())
-
-            elif query_key == "sum":
-                # sum 的 sensitivity = (max - min)
-                sensitivity = (data_max - data_min)
-                base_value = float(clipped.sum())
-
-            elif query_key == "count":
-                sensitivity = 1.0
-                base_value = float(clipped.size)
-
-            elif query_key == "histogram":
-                # 先算一般 histogram，再對每個 bin 的 count 加 Gaussian 雜訊
-                bins = 10
-                counts, bin_edges = np.histogram(
-                    clipped,
-                    bins=bins,
-                    range=(data_min, data_max)
-                )
-                sensitivity = 1.0
-
-                mech = GaussianAnalytic(
-                    epsilon=epsilon,
-                    delta=delta,
-                    sensitivity=sensitivity
-                )
-
-                noisy_counts = np.array([
-                    mech.randomise(float(c)) for c in counts
-                ])
-
-                result_payload["hist"] = noisy_counts
-                result_payload["bin_edges"] = bin_edges
 
-                return {
-                    "ok": True,
-                    "message": "Gaussian 機制直方圖運算完成",
-                    "result": result_payload
-                }
+def _release_covariance(stats: dict, params: dict):
+    """release_covariance 外層包上 GUI 使用的 {"ok", "message", "result"} 格式"""
+    if stats["n"] < 2:
+        return {
+            "ok": False,
+            "message": "有效的完整資料列不足（需至少 2 列所有欄位皆為數值）",
+            "result": None
+        }
 
-            else:
-                return {
-                    "ok": False,
-                    "message": f"不支援的統計操作：{query_key}",
-                    "result": None
-                }
+    try:
+        released = release_covariance(
+            stats, params["norm_bound"], params["epsilon"], params["mechanism"], params["delta"]
+        )
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"差分隱私運算失敗：{e}",
+            "result": None
+        }
 
-            mech = GaussianAnalytic(
-                epsilon=epsilon,
-                delta=delta,
-                sensitivity=sensitivity
-            )
-            noisy_value = mech.randomise(base_value)
-            result_payload["value"] = float(noisy_value)
+    result_payload = {
+        "epsilon": params["epsilon"],
+        "mechanism": params["mechanism"],
+        "query": "covariance",
+        "column": None,
+        "bounds": None,
+        "columns": [str(c) for c in params["columns"]],
+        "norm_bound": params["norm_bound"],
+        "rows_dropped": int(stats["rows_dropped"]),
+        **released,
+    }
+    if params["mechanism"] == "gaussian":
+        result_payload["delta"] = params["delta"]
+
+    return {
+        "ok": True,
+        "message": "差分隱私共變異數矩陣運算完成",
+        "result": result_payload
+    }
+
+
+def run_dp_synthetic(df, params: dict):
+    """
+    合成資料：對 params["columns"] 量測雜訊 1-way / 2-way 邊際並建立樹狀圖模型。
+    結果 payload 帶有整個模型（synth_* 欄位），GUI 可依需要產生任意列數的合成資料。
+    """
+    if params["user_column"] is not None:
+        return {
+            "ok": False,
+            "message": "合成資料尚不支援使用者層級差分隱私",
+            "result": None
+        }
+
+    bounds_by_column = {name: (lo, hi) for name, lo, hi in params["column_bounds"]}
+    try:
+        model = fit_synthesizer(
+            df, params["columns"], bounds_by_column,
+            params["epsilon"], params["mechanism"], params["delta"],
+            domains_by_column=params["category_domains"]
+        )
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"合成資料建模失敗：{e}",
+            "result": None
+        }
+
+    result_payload = {
+        "epsilon": params["epsilon"],
+        "mechanism": params["mechanism"],
+        "query": "synthetic",
+        "column": None,
+        "bounds": None,
+        "columns": [str(c) for c in params["columns"]],
+        **model.to_payload(),
+    }
+    if params["mechanism"] == "gaussian" or params["domain_threshold"]:
+        result_payload["delta"] = params["delta"]
+
+    return {
+        "ok": True,
+        "message": "差分隱私合成資料模型建立完成",
+        "result": result_payload
+    }
+
+
+def run_dp_on_source(source, settings=None):
+    """
+    對「可下推運算」的資料來源（例如 SQLiteSource）做差分隱私統計。
+
+    source 需提供：
+        - columns：可選欄位列表
+        - compute_stats(column, bounds, query_key, bins)：回傳充分統計量 dict
+
+    clip 與彙總都交給資料來源處理，這裡只拿到少量數字後再加噪。
+    回傳格式與 run_dp_from_settings 相同。
+    """
+    params, error = _read_settings(source.columns, settings=settings)
+    if error is not None:
+        return error
+
+    unsupported = _unsupported_on_source(params, source)
+    if unsupported is not None:
+        return {
+            "ok": False,
+            "message": unsupported,
+            "result": None
+        }
 
+    if params["query"] == "topk":
+        try:
+            categories, counts = source.category_counts(params["column"])
         except Exception as e:
             return {
                 "ok": False,
-                "message": f"差分隱私運算失敗（Gaussian）：{e}",
+                "message": f"資料來源彙總失敗：{e}",
                 "result": None
             }
+        return _release_top_k(categories, counts, params)
 
-    else:
+    if params["query"] == "distinct":
+        return run_dp_distinct(source, params)
+
+    if params["query"] == "join":
+        return run_dp_join(source, params)
+
+    if params["query"] == "covariance":
+        return run_dp_covariance(source, params)
+
+    query_key, bins = _stats_request(params)
+    try:
+        stats = source.compute_stats(
+            params["column"],
+            params["bounds"],
+            query_key,
+            bins
+        )
+    except Exception as e:
         return {
             "ok": False,
-            "message": f"不支援的機制：{mech_key}",
+            "message": f"資料來源彙總失敗：{e}",
             "result": None
         }
 
-    # 正常結束
+    return _release_result(stats, params)
+
+
+def _release_result(stats: dict, params: dict):
+    """release_from_stats 外層包上 GUI 使用的 {"ok", "message", "result"} 格式"""
+    if stats["n"] == 0:
+        return {
+            "ok": False,
+            "message": "目標欄位沒有有效的數值資料",
+            "result": None
+        }
+
+    try:
+        result_payload = release_from_stats(stats, params)
+    except Exception as e:
+        return {
+            "ok": False,
+            "message": f"差分隱私運算失敗：{e}",
+            "result": None
+        }
+
+    if "rows_dropped" in stats:
+        result_payload["rows_dropped"] = int(stats["rows_dropped"])
+
     return {
         "ok": True,
         "message": "差分隱私運算完成",
         "result": result_payload
     }
+
+
+def run_dp_for_columns(executor, columns, bounds_by_column=None, settings=None):
+    """
+    對多個欄位各做一次差分隱私統計（機制 / 查詢 / ε / δ 取自 dp_settings）。
+
+    executor: 例如 ParallelExecutor（需提供 columns 與 compute_many()），
+              或可下推彙總的資料來源（只有 compute_stats() 時逐欄計算）
+    bounds_by_column: {欄位: (min, max)}，未指定的欄位使用 dp_settings 的資料邊界
+
+    注意：每個欄位各自花費一次 ε。
+    回傳 {欄位: 與 run_dp_from_settings 相同格式的 dict}
+    """
+    bounds_by_column = bounds_by_column or {}
+    if settings is None:
+        settings = dp_settings.snapshot()
+    results = {}
+    requests = []
+    params_list = []
+
+    for column in columns:
+        params, error = _read_settings(executor.columns, column=column,
+                                       bounds=bounds_by_column.get(column), settings=settings)
+        if error is None and _unsupported_on_source(params, executor) is not None:
+            error = {
+                "ok": False,
+                "message": _unsupported_on_source(params, executor),
+                "result": None
+            }
+        if error is not None:
+            results[column] = error
+            continue
+        params_list.append(params)
+        requests.append((column, params["bounds"], *_stats_request(params)))
+
+    try:
+        if hasattr(executor, "compute_many"):
+            all_stats = executor.compute_many(requests)
+        else:
+            all_stats = [executor.compute_stats(*request) for request in requests]
+    except Exception as e:
+        for params in params_list:
+            results[params["column"]] = {
+                "ok": False,
+                "message": f"平行彙總失敗：{e}",
+                "result": None
+            }
+        return results
+
+    for params, stats in zip(params_list, all_stats):
+        results[params["column"]] = _release_result(stats, params)
+    return results
@@ -0,0 +1,246 @@
+# 串流式加噪資料集匯出：分塊讀取、向量化加噪、逐塊寫出 (CSV / gzip CSV / Parquet)
+# 記憶體用量只與 chunksize 有關，與資料集大小無關
+# 數值欄位加 Laplace / Gaussian 雜訊；類別欄位以本地 DP（k-RR / OUE，見 ldp.py）隨機化
+# Parquet 的 schema 在讀取前就由欄位與加噪設定決定（加噪欄位 float64、k-RR 字串、OUE uint8），
+# 其餘欄位以原始文字讀取並存成字串，不會因為各 chunk 推斷出的 dtype 不同而寫入失敗
+
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.core.ldp import ldp_block, oue_columns
+from src.core.noise import noise_scale, sample_noise
+from src.core.rng import noise_rng, rng_mode, rng_seed
+
+
+# 每次讀取 / 加噪 / 寫出的筆數
+EXPORT_CHUNK_ROWS = 200_000
+
+
+def detect_format(out_path: str) -> str:
+    """依副檔名決定輸出格式：csv / csv.gz / parquet"""
+    lower = out_path.lower()
+    if lower.endswith(".parquet"):
+        return "parquet"
+    if lower.endswith(".gz"):
+        return "csv.gz"
+    return "csv"
+
+
+def make_noise_spec(column, bounds, mechanism, epsilon, delta=1e-5):
+    """
+    單一欄位的加噪設定。
+    每一筆值 clip 到 bounds 後加上獨立雜訊，敏感度為 max - min（與原本逐值 randomise 相同）。
+    """
+    # 延遲匯入：worker process 只需要 noise_block，不必載入 engine / diffprivlib
+    from src.core.engine import _normalize_mechanism_name
+
+    lower, upper = float(bounds[0]), float(bounds[1])
+    mech_key = _normalize_mechanism_name(mechanism)
+    return {
+        "column": column,
+        "bounds": (lower, upper),
+        "mechanism": mech_key,
+        "scale": noise_scale(mech_key, epsilon, delta, upper - lower),
+    }
+
+
+def noise_block(block: pd.DataFrame, specs, seed) -> pd.DataFrame:
+    """
+    對一個 chunk 的指定欄位加噪（可在 worker process 內執行）。
+    seed 為這個 chunk 專屬的 SeedSequence，各 chunk 的亂數串流互相獨立；
+    seed 為 None 時使用全域亂數來源 noise_rng()（secure 模式下每個 worker process 各自讀取 os.urandom）。
+    """
+    rng = noise_rng() if seed is None else np.random.default_rng(seed)
+    block = block.copy()
+    for spec in specs:
+        if spec.get("kind") == "ldp":
+            block = ldp_block(block, spec, rng)
+            continue
+        values = pd.to_numeric(block[spec["column"]], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        clipped = np.clip(values, *spec["bounds"])
+        noisy = clipped + sample_noise(spec["mechanism"], spec["scale"], clipped.shape, rng)
+        # 原本是空值 / 非數值的格子維持空值
+        block[spec["column"]] = np.where(np.isnan(values), np.nan, noisy)
+    return block
+
+
+def output_columns(columns, specs):
+    """加噪後的欄位順序（OUE 會把類別欄換成每個類別一欄）"""
+    columns = list(columns)
+    for spec in specs:
+        if spec.get("kind") == "ldp" and spec["mode"] == "oue":
+            position = columns.index(spec["column"])
+            columns[position:position + 1] = oue_columns(spec["column"], spec["categories"])
+    return columns
+
+
+def _noise_and_format(block: pd.DataFrame, specs, seed, fmt: str):
+    """
+    worker 端：加噪後若輸出 CSV，連同文字格式化一起在 worker 內完成
+    （CSV 格式化通常比加噪更花時間），主程序只需依序寫入字串。
+    """
+    noisy = noise_block(block, specs, seed)
+    if fmt == "parquet":
+        return noisy
+    return noisy.to_csv(index=False, header=False)
+
+
+def parquet_schema(columns, specs):
+    """
+    加噪後資料的 Parquet schema（columns 為 output_columns() 的輸出欄位）：
+    加噪的數值欄位為 float64，k-RR 為字串，OUE 各類別欄為 uint8，其餘欄位保留原始文字（字串）
+    """
+    import pyarrow as pa
+
+    types = {column: pa.string() for column in columns}
+    for spec in specs:
+        if spec.get("kind") != "ldp":
+            types[spec["column"]] = pa.float64()
+        elif spec["mode"] == "oue":
+            types.update((name, pa.uint8()) for name in oue_columns(spec["column"], spec["categories"]))
+    return pa.schema([(str(column), types[column]) for column in columns])
+
+
+def _source_columns(source_path: str):
+    """來源檔案的欄位（只讀標題列）"""
+    if source_path.lower().endswith(".xlsx"):
+        return pd.read_excel(source_path, nrows=0).columns
+    return pd.read_csv(source_path, nrows=0).columns
+
+
+def _iter_chunks(source_path: str, chunksize: int, dtype=None):
+    """逐塊讀取來源檔案，回傳 (chunk, 進度 0~1)；dtype=str 時所有欄位以原始文字讀取"""
+    if source_path.lower().endswith(".xlsx"):
+        # Excel 無法串流讀取，只能整份讀入後再分塊處理
+        df = pd.read_excel(source_path, dtype=dtype)
+        total = max(len(df), 1)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize], min(1.0, (start + chunksize) / total)
+        return
+
+    total_bytes = max(os.path.getsize(source_path), 1)
+    with open(source_path, "rb") as fh:
+        for chunk in pd.read_csv(fh, chunksize=chunksize, dtype=dtype):
+            yield chunk, min(1.0, fh.tell() / total_bytes)
+
+
+class _ChunkWriter:
+    """依輸出格式逐塊寫出；Parquet 的 schema 由欄位與加噪設定決定（parquet_schema），每塊都轉成同一個 schema"""
+
+    def __init__(self, out_path: str, fmt: str, specs=()):
+        self.out_path = out_path
+        self.fmt = fmt
+        self.specs = list(specs)
+        self._fh = None
+        self._parquet = None
+        self._schema = None
+        self._wrote_header = False
+
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+                import pyarrow.parquet  # noqa: F401
+            except ImportError as e:
+                raise RuntimeError("輸出 Parquet 需要安裝 pyarrow（pip install pyarrow）") from e
+        elif fmt == "csv.gz":
+            self._fh = gzip.open(out_path, "wt", newline="", encoding="utf-8")
+        else:
+            self._fh = open(out_path, "w", newline="", encoding="utf-8")
+
+    def write(self, block):
+        """block 為 DataFrame，或 worker 已格式化好的 CSV 文字（不含標題列）"""
+        if isinstance(block, str):
+            self._fh.write(block)
+            return
+
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet is None:
+                self._schema = parquet_schema(block.columns, self.specs)
+                self._parquet = pq.ParquetWriter(self.out_path, self._schema)
+            block = block.set_axis([str(c) for c in block.columns], axis=1)
+            self._parquet.write_table(pa.Table.from_pandas(block, schema=self._schema, preserve_index=False))
+        else:
+            block.to_csv(self._fh, index=False, header=not self._wrote_header)
+            self._wrote_header = True
+
+    def write_header(self, columns):
+        if self.fmt != "parquet" and not self._wrote_header:
+            pd.DataFrame(columns=columns).to_csv(self._fh, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._fh is not None:
+            self._fh.close()
+
+
+def _chunk_seed(seed_root):
+    """每個 chunk 的獨立 SeedSequence；seed_root 為 None（密碼學安全亂數）時回傳 None"""
+    return None if seed_root is None else seed_root.spawn(1)[0]
+
+
+def export_noisy_dataset(source_path: str, out_path: str, specs, chunksize: int = EXPORT_CHUNK_ROWS,
+                         workers: int = 1, fmt: str = None, seed=None, progress=None):
+    """
+    匯出加噪後的完整資料集。
+
+    specs:     make_noise_spec() / make_ldp_spec() 建立的加噪設定列表（可同時處理多個欄位）
+    workers:   > 1 時以 process pool 平行加噪；同時在途的 chunk 數量有上限，記憶體維持固定
+    fmt:       "csv" / "csv.gz" / "parquet"，預設依副檔名判斷
+    seed:      整體亂數種子；每個 chunk 由 SeedSequence.spawn 取得獨立串流。
+               None 時依全域亂數模式：secure 使用密碼學安全亂數，fast 使用 set_rng_mode 指定的 seed
+    progress:  progress(0~1) 回呼，會在呼叫端的 thread 內被呼叫
+
+    回傳寫出的總筆數。
+    """
+    fmt = fmt or detect_format(out_path)
+    seed_root = None
+    if seed is not None or rng_mode() != "secure":
+        seed_root = np.random.SeedSequence(seed if seed is not None else rng_seed())
+    writer = _ChunkWriter(out_path, fmt, specs)
+    # Parquet：非加噪欄位以原始文字讀取，各 chunk 的型別才會與 schema 一致
+    dtype = str if fmt == "parquet" else None
+    rows = 0
+
+    try:
+        if workers <= 1:
+            for chunk, frac in _iter_chunks(source_path, chunksize, dtype):
+                writer.write(noise_block(chunk, specs, _chunk_seed(seed_root)))
+                rows += len(chunk)
+                if progress is not None:
+                    progress(frac)
+        else:
+            max_in_flight = 2 * workers
+            in_flight = []  # [(future, 進度, 筆數)]，依讀取順序寫出
+            # worker 回傳的 CSV 文字不含標題列：先由來源的標題列寫出（只有標題列的檔案也會有標題）
+            writer.write_header(output_columns(_source_columns(source_path), specs))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for chunk, frac in _iter_chunks(source_path, chunksize, dtype):
+                    future = pool.submit(_noise_and_format, chunk, specs, _chunk_seed(seed_root), fmt)
+                    in_flight.append((future, frac, len(chunk)))
+                    if len(in_flight) >= max_in_flight:
+                        rows += _drain_one(in_flight, writer, progress)
+                while in_flight:
+                    rows += _drain_one(in_flight, writer, progress)
+    finally:
+        writer.close()
+
+    if progress is not None:
+        progress(1.0)
+    return rows
+
+
+def _drain_one(in_flight, writer, progress):
+    future, frac, n_rows = in_flight.pop(0)
+    writer.write(future.result())
+    if progress is not None:
+        progress(frac)
+    return n_rows
@@ -0,0 +1,156 @@
+# 階層式 (tree-based) 差分隱私直方圖：一次發布，之後任意區間查詢都不再花費隱私預算
+#
+# - 值域切成 b^L 個細葉節點，往上每 b 個節點加總成一層，形成 b 叉樹（以每層一個 numpy 陣列儲存）
+# - 每筆資料在每一層只落在一個節點 → 整棵樹的敏感度為「層數」，一次對所有節點加噪
+# - 加噪後做一致性後處理（Hay et al., 2010），讓父節點等於子節點加總、誤差也更小
+# - 區間查詢拆成 O(b·log_b N) 個節點相加
+
+import math
+
+import numpy as np
+
+from src.core.noise import noise_scale, sample_integer_noise
+
+
+def leaves_for(n_leaves: int, branching: int) -> int:
+    """不少於 n_leaves 的最小 branching 次方（葉節點數必須剛好填滿整棵樹）"""
+    if branching < 2:
+        raise ValueError("分支數需 >= 2")
+    depth = max(1, math.ceil(math.log(max(n_leaves, 2), branching) - 1e-9))
+    return branching ** depth
+
+
+def build_levels(leaf_counts, branching: int):
+    """由葉節點 counts 逐層加總，回傳 [根, ..., 葉] 的陣列列表"""
+    leaves = np.asarray(leaf_counts, dtype=np.float64)
+    if leaves.size < branching or leaves.size != leaves_for(leaves.size, branching):
+        raise ValueError(f"葉節點數 {leaves.size} 不是分支數 {branching} 的次方")
+    levels = [leaves]
+    while levels[0].size > 1:
+        levels.insert(0, levels[0].reshape(-1, branching).sum(axis=1))
+    return levels
+
+
+def make_consistent(levels, branching: int):
+    """
+    一致性後處理（Hay et al., 2010 的 b 叉樹版本），全部以每層一次的向量運算完成：
+    1. 由下往上：每個節點取「自己的雜訊值」與「子節點加總」的加權平均
+    2. 由上往下：把父節點與子節點加總的差距平均分給子節點
+    結果滿足 父 = 子節點加總，且是原始雜訊值的最小平方估計。
+    """
+    b = branching
+    height = len(levels)
+    z = [None] * height
+    z[-1] = levels[-1].astype(np.float64, copy=True)
+    for depth in range(height - 2, -1, -1):
+        i = height - depth  # 葉節點高度為 1
+        child_sum = z[depth + 1].reshape(-1, b).sum(axis=1)
+        z[depth] = ((b ** i - b ** (i - 1)) * levels[depth] + (b ** (i - 1) - 1) * child_sum) / (b ** i - 1)
+
+    out = [z[0]]
+    for depth in range(1, height):
+        child_sum = z[depth].reshape(-1, b).sum(axis=1)
+        correction = (out[depth - 1] - child_sum) / b
+        out.append(z[depth] + np.repeat(correction, b))
+    return out
+
+
+class HierarchicalHistogram:
+    """
+    已發布（或尚未加噪）的階層直方圖。
+    levels[0] 為根節點，levels[-1] 為葉節點；bounds 為值域 (min, max)。
+    """
+
+    def __init__(self, levels, bounds, branching: int):
+        self.levels = [np.asarray(level, dtype=np.float64) for level in levels]
+        self.bounds = (float(bounds[0]), float(bounds[1]))
+        self.branching = int(branching)
+
+    @classmethod
+    def release(cls, leaf_counts, bounds, epsilon: float, mech_key: str = "laplace", delta: float = 1e-5,
+                branching: int = 16, sensitivity: float = 1.0, consistent: bool = True, rng=None):
+        """
+        對葉節點 counts 建樹並一次加噪。
+        sensitivity 為單一節點的敏感度（列層級為 1；使用者層級為每人最多列數 k）。
+        每筆資料影響每層各一個節點：Laplace 的 L1 敏感度為 層數·Δ，Gaussian 的 L2 敏感度為 √層數·Δ。
+        """
+        levels = build_levels(leaf_counts, branching)
+        height = len(levels)
+        if mech_key == "gaussian":
+            tree_sensitivity = math.sqrt(height) * sensitivity
+        else:
+            tree_sensitivity = height * sensitivity
+        scale = noise_scale(mech_key, epsilon, delta, tree_sensitivity)
+
+        # 所有節點串成一個陣列一次抽整數雜訊（節點都是筆數），再切回各層
+        sizes = [level.size for level in levels]
+        noisy = np.concatenate(levels) + sample_integer_noise(mech_key, scale, sum(sizes), rng)
+        levels = np.split(noisy, np.cumsum(sizes)[:-1])
+
+        if consistent:
+            levels = make_consistent(levels, branching)
+        return cls(levels, bounds, branching)
+
+    # ============
+    # 查詢
+    # ============
+
+    @property
+    def n_leaves(self) -> int:
+        return self.levels[-1].size
+
+    @property
+    def leaf_width(self) -> float:
+        return (self.bounds[1] - self.bounds[0]) / self.n_leaves
+
+    def leaf_range(self, start: int, stop: int) -> float:
+        """葉節點 [start, stop) 的加總，只取 O(b·log_b N) 個節點"""
+        b = self.branching
+        start = max(0, int(start))
+        stop = min(self.n_leaves, int(stop))
+        total = 0.0
+        depth = len(self.levels) - 1
+        while start < stop:
+            level = self.levels[depth]
+            # 左右兩端湊不滿一個父節點的部分在這一層直接相加，其餘交給上一層
+            while start < stop and start % b:
+                total += level[start]
+                start += 1
+            while start < stop and stop % b:
+                stop -= 1
+                total += level[stop]
+            start //= b
+            stop //= b
+            depth -= 1
+        return float(total)
+
+    def range_query(self, low: float, high: float) -> float:
+        """
+        值域 [low, high) 內的筆數估計（不花費額外隱私預算）。
+        解析度為葉節點寬度：與查詢區間有交集的葉節點都會計入。
+        """
+        lo, hi = self.bounds
+        low, high = min(low, high), max(low, high)
+        if high < lo or low > hi:
+            return 0.0
+        start = math.floor((max(low, lo) - lo) / self.leaf_width + 1e-9)
+        stop = math.ceil((min(high, hi) - lo) / self.leaf_width - 1e-9)
+        return self.leaf_range(start, max(stop, start + 1))
+
+    def histogram(self, bins: int):
+        """把整個值域切成 bins 個區間（對齊葉節點邊界），回傳 (counts, bin_edges) 給 GUI 畫圖"""
+        cuts = np.round(np.linspace(0, self.n_leaves, bins + 1)).astype(np.int64)
+        counts = np.array([self.leaf_range(a, b) for a, b in zip(cuts[:-1], cuts[1:])])
+        bin_edges = self.bounds[0] + cuts * self.leaf_width
+        return counts, bin_edges
+
+    # ============
+    # 序列化（放進結果 payload / 發布紀錄）
+    # ============
+
+    def to_payload(self) -> dict:
+        return {"tree_levels": self.levels, "tree_branching": self.branching}
+
+    @classmethod
+    def from_payload(cls, payload: dict):
+        return cls(payload["tree_levels"], payload["bounds"], payload["tree_branching"])
@@ -0,0 +1,223 @@
+# 差分隱私運算工作佇列：每個工作帶著送出當下的設定快照，由 worker pool 平行執行
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from src.core.engine import run_dp
+
+
+class Job:
+    """一個運算工作：資料集 + 設定快照 + 執行狀態 / 結果"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, job_id, dataset, settings, priority=0):
+        self.id = job_id
+        self.dataset = dataset
+        self.settings = settings      # SettingsSnapshot，送出後不會再變
+        self.priority = priority      # 數字越大越先執行
+        self.status = Job.PENDING
+        self.result = None            # engine 回傳的 {"ok", "message", "result"}
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def key(self):
+        """判斷是否為「相同工作」：同一份資料集 + 相同設定"""
+        return (id(self.dataset), self.settings)
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def __repr__(self):
+        return f"<Job #{self.id} {self.status} priority={self.priority}>"
+
+
+class JobScheduler:
+    """
+    以固定數量的 worker thread 執行 Job：
+        - 依 priority 由大到小、同 priority 先送先做
+        - 相同資料集 + 相同設定的待執行工作只保留一份（回傳既有的 Job）
+        - 完成的工作保留在 history（最多 history_size 筆）
+        - max_pending 限制待執行數量，超過時 submit() 丟出 QueueFullError
+
+    on_finish(job) 會在 worker thread 內被呼叫；GUI 端請自行轉回主執行緒。
+    """
+
+    def __init__(self, runner=run_dp, max_workers=2, history_size=200,
+                 max_pending=None, on_finish=None):
+        self.runner = runner
+        self.max_pending = max_pending
+        self.on_finish = on_finish
+
+        self._heap = []
+        self._pending = {}            # key -> Job，用於去除重複
+        self._running = {}            # job_id -> Job
+        self._history = deque(maxlen=history_size)
+        self._jobs = {}               # job_id -> Job（仍在佇列、執行中或在 history 內）
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"dp-job-worker-{i}", daemon=True)
+            for i in range(max(1, int(max_workers)))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # ============
+    # 對外 API
+    # ============
+
+    def submit(self, dataset, settings, priority=0) -> Job:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("JobScheduler 已關閉")
+
+            key = (id(dataset), settings)
+            existing = self._pending.get(key)
+            if existing is not None:
+                # 相同工作還在排隊：只調高優先序，不重複排入
+                if priority > existing.priority:
+                    existing.priority = priority
+                    heapq.heappush(self._heap, (-priority, next(self._seq), existing))
+                return existing
+
+            if self.max_pending is not None and len(self._pending) >= self.max_pending:
+                raise QueueFullError(f"待執行工作已達上限 ({self.max_pending})")
+
+            job = Job(next(self._ids), dataset, settings, priority)
+            self._pending[key] = job
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (-priority, next(self._seq), job))
+            self._cond.notify()
+            return job
+
+    def cancel(self, job_id) -> bool:
+        """取消尚未開始的工作"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != Job.PENDING:
+                return False
+            job.status = Job.CANCELLED
+            job.finished_at = time.time()
+            self._pending.pop(job.key, None)
+            self._remember(job)
+            # 叫醒正在 wait() 這個工作的呼叫端
+            self._cond.notify_all()
+            return True
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """等待工作完成，回傳 Job（逾時回傳 None）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job.status in (Job.DONE, Job.FAILED, Job.CANCELLED):
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def pending(self):
+        with self._cond:
+            return sorted(self._pending.values(), key=lambda j: (-j.priority, j.id))
+
+    def running(self):
+        with self._cond:
+            return list(self._running.values())
+
+    def history(self):
+        with self._cond:
+            return list(self._history)
+
+    def counts(self):
+        with self._cond:
+            return {"pending": len(self._pending), "running": len(self._running)}
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    # ============
+    # worker
+    # ============
+
+    def _next_job(self):
+        """取出下一個要執行的工作（呼叫端需持有 _cond）"""
+        while self._heap:
+            neg_priority, _, job = heapq.heappop(self._heap)
+            # 已取消、已執行，或因調高優先序而留下的舊項目都略過
+            if job.status != Job.PENDING or -neg_priority != job.priority:
+                continue
+            return job
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+
+                self._pending.pop(job.key, None)
+                self._running[job.id] = job
+                job.status = Job.RUNNING
+                job.started_at = time.time()
+
+            try:
+                job.result = self.runner(job.dataset, job.settings)
+                status = Job.DONE
+            except Exception as e:
+                job.error = e
+                job.result = {"ok": False, "message": f"工作執行失敗：{e}", "result": None}
+                status = Job.FAILED
+
+            with self._cond:
+                job.status = status
+                job.finished_at = time.time()
+                self._running.pop(job.id, None)
+                self._remember(job)
+                self._cond.notify_all()
+
+            if self.on_finish is not None:
+                try:
+                    self.on_finish(job)
+                except Exception as e:
+                    print(f"on_finish 回呼失敗: {e}")
+
+    def _remember(self, job):
+        """放進 history；history 滿了之後被擠掉的工作不再保留（呼叫端需持有 _cond）"""
+        if len(self._history) == self._history.maxlen:
+            self._jobs.pop(self._history[0].id, None)
+        self._history.append(job)
+
+
+class QueueFullError(RuntimeError):
+    """待執行工作數量超過 max_pending"""
@@ -0,0 +1,273 @@
+# 兩個資料集的關聯查詢（join）：限制每個關聯鍵的配對列數後，對關聯結果做差分隱私統計
+#
+# - 已載入的資料集登記在 loaded_datasets（GUI 每次載入檔案、HTTP 服務註冊資料集時加入），
+#   設定快照只記錄名稱，運算時才取出資料集物件
+# - hash join：較小的一邊整份讀入 key（與數值欄位），factorize 成編號後建查詢表
+#   （密集的整數 id 直接查陣列，其餘用 pd.Index 雜湊）；較大的一邊分塊串流，每塊一次查出所有列的編號
+# - 配對上限：兩邊各自每個 key 只保留最先出現的 max_matches 列，
+#   任一列最多出現在 max_matches 個關聯結果列中，敏感度乘上 max_matches（與使用者層級的 k 相同）
+# - 不產生關聯結果本身：關聯結果的每一列都是某一邊的一列重複 w 次（w = 另一邊同 key 的保留列數），
+#   n / 總和 / 直方圖直接以 w 為權重累加，5,000 萬列 × 100 萬列的關聯記憶體只需一個分塊
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.core.covariance import iter_frame_blocks
+from src.core.planner import estimate_rows
+
+
+JOIN_SIDES = ("left", "right")
+
+# 串流那一邊每次讀取的列數
+JOIN_CHUNK_ROWS = 1_000_000
+
+# 無法以換行估計列數的檔案（gzip / Excel）：每列約略的位元組數
+COMPRESSED_ROW_BYTES = 16
+
+# 整數 key 的值域不超過 key 數的這個倍數時，以陣列直接查表取代雜湊查詢
+DENSE_KEY_RATIO = 8
+
+
+class LoadedDatasets:
+    """已載入資料集的名稱 → 資料集物件（thread-safe）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datasets = {}
+
+    def register(self, name: str, dataset) -> str:
+        """登記資料集；同名時覆蓋（重新載入同一個檔案）"""
+        with self._lock:
+            self._datasets[str(name)] = dataset
+        return str(name)
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._datasets.pop(str(name), None)
+
+    def get(self, name):
+        with self._lock:
+            return self._datasets.get(str(name))
+
+    def names(self):
+        with self._lock:
+            return list(self._datasets)
+
+    def columns(self):
+        """{名稱: 欄位列表}（GUI 選單用）"""
+        with self._lock:
+            return {name: [str(c) for c in dataset.columns] for name, dataset in self._datasets.items()}
+
+
+# 單例化：GUI 與 HTTP 服務共用
+loaded_datasets = LoadedDatasets()
+
+
+# =====================================================
+# 工具
+# =====================================================
+
+def estimate_dataset_rows(dataset) -> int:
+    """估計資料集列數（只用來決定哪一邊分塊串流，不需精確）"""
+    if isinstance(dataset, pd.DataFrame):
+        return len(dataset)
+    if hasattr(dataset, "row_count"):
+        return int(dataset.row_count())
+    paths = getattr(dataset, "partitions", None) or [getattr(dataset, "file_path", None)]
+    total = 0
+    for path in paths:
+        if path is None:
+            continue
+        if path.lower().endswith(".csv"):
+            total += estimate_rows(path)
+        else:
+            total += os.path.getsize(path) // COMPRESSED_ROW_BYTES
+    return total
+
+
+def _iter_columns(dataset, columns, block_rows: int):
+    """DataFrame 依列切塊，其他資料集使用各自的 iter_blocks（串流 / 分頁讀取）"""
+    columns = list(dict.fromkeys(columns))
+    if isinstance(dataset, pd.DataFrame):
+        return iter_frame_blocks(dataset, columns, block_rows)
+    return dataset.iter_blocks(columns, block_rows)
+
+
+def _read_columns(dataset, columns, block_rows: int) -> pd.DataFrame:
+    blocks = list(_iter_columns(dataset, columns, block_rows))
+    if not blocks:
+        return pd.DataFrame(columns=list(dict.fromkeys(columns)))
+    return pd.concat(blocks, ignore_index=True)
+
+
+def _key_array(values) -> np.ndarray:
+    """
+    關聯鍵正規化：數值一律轉 float64（同一個 id 在 int / float 欄位都對得上），其餘保留原值。
+    空值為 NaN / None，不會與任何 key 配對。
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values.to_numpy(dtype=object)
+
+
+def _rank_within_keys(codes: np.ndarray) -> np.ndarray:
+    """每一列在同一個 key 中依資料順序的名次（0 起算）；codes 需皆 >= 0"""
+    n = codes.size
+    rank = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return rank
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    is_start = np.empty(n, dtype=bool)
+    is_start[0] = True
+    np.not_equal(sorted_codes[1:], sorted_codes[:-1], out=is_start[1:])
+    starts = np.flatnonzero(is_start)
+    lengths = np.diff(np.append(starts, n))
+    rank[order] = np.arange(n) - np.repeat(starts, lengths)
+    return rank
+
+
+class _KeyIndex:
+    """
+    build 端 key → 編號的查詢表。
+    整數 key 且值域夠密（例如流水號 id）時用陣列直接查表，否則使用 pd.Index 的雜湊查詢。
+    """
+
+    def __init__(self, uniques):
+        self.size = len(uniques)
+        self._index = None
+        self._table = None
+        keys = np.asarray(uniques)
+        if self.size and keys.dtype == np.float64 and np.array_equal(keys, np.floor(keys)):
+            self._low, high = keys.min(), keys.max()
+            if high - self._low < DENSE_KEY_RATIO * self.size + 1024:
+                self._table = np.full(int(high - self._low) + 1, -1, dtype=np.int64)
+                self._table[(keys - self._low).astype(np.int64)] = np.arange(self.size)
+        if self._table is None:
+            self._index = pd.Index(uniques)
+
+    def get_indexer(self, keys: np.ndarray) -> np.ndarray:
+        """每個 key 的編號，找不到（或空值）為 -1"""
+        if self._index is not None:
+            return self._index.get_indexer(keys)
+        if keys.dtype != np.float64:
+            # build 端是數值 key、這一塊不是：不會有任何配對
+            return np.full(len(keys), -1, dtype=np.int64)
+        offsets = keys - self._low
+        valid = (offsets >= 0) & (offsets < self._table.size) & (offsets == np.floor(offsets))
+        positions = np.full(len(keys), -1, dtype=np.int64)
+        positions[valid] = self._table[offsets[valid].astype(np.int64)]
+        return positions
+
+
+def _cap_block(codes: np.ndarray, seen: np.ndarray, max_matches: int) -> np.ndarray:
+    """
+    串流分塊的配對上限：每個 key 依跨塊累計的出現順序只保留前 max_matches 列。
+    已額滿的 key 直接捨棄、本塊結束後仍未額滿的 key 全部保留，只有跨過上限的 key 需要排名次。
+    會更新 seen（各 key 到目前為止出現的列數）。
+    """
+    counts = np.bincount(codes, minlength=seen.size)
+    before = seen[codes]
+    keep = before < max_matches
+    boundary = np.flatnonzero(keep & ((before + counts[codes]) > max_matches))
+    if boundary.size:
+        keep[boundary] = (_rank_within_keys(codes[boundary]) + before[boundary]) < max_matches
+    seen += counts
+    return keep
+
+
+class _WeightedStats:
+    """以整數權重累加 clip 後的 n / 總和 / 直方圖（每個值代表關聯結果中的 w 列）"""
+
+    def __init__(self, bounds, bins=None):
+        self.lower, self.upper = float(bounds[0]), float(bounds[1])
+        self.bins = bins
+        self.stats = {"n": 0, "sum": 0.0}
+        if bins is not None:
+            self.stats["hist"] = np.zeros(int(bins), dtype=np.int64)
+            self.stats["bin_edges"] = np.linspace(self.lower, self.upper, int(bins) + 1)
+
+    def add(self, values, weights):
+        values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        weights = np.asarray(weights, dtype=np.int64)
+        valid = ~np.isnan(values) & (weights > 0)
+        clipped = np.clip(values[valid], self.lower, self.upper)
+        weights = weights[valid]
+        self.stats["n"] += int(weights.sum())
+        self.stats["sum"] += float(np.dot(clipped, weights))
+        if self.bins is not None:
+            hist, _ = np.histogram(clipped, bins=int(self.bins), range=(self.lower, self.upper), weights=weights)
+            self.stats["hist"] += np.rint(hist).astype(np.int64)
+
+
+# =====================================================
+# 關聯後的充分統計量
+# =====================================================
+
+def join_stats(left, right, left_key, right_key, value_side: str, column, bounds, bins=None,
+               max_matches: int = 1, chunk_rows: int = JOIN_CHUNK_ROWS) -> dict:
+    """
+    left ⋈ right（inner join，left[left_key] == right[right_key]）後，
+    value_side 那一邊的 column 欄位 clip 到 bounds 的充分統計量。
+
+    每個 key 兩邊各自最多保留最先出現的 max_matches 列；
+    回傳格式同 engine.release_from_stats 所需（另加 rows_dropped：因配對上限捨棄的列數）。
+    列數較多的一邊分塊串流，另一邊只讀 key 與（需要時的）數值欄位建索引。
+    """
+    if value_side not in JOIN_SIDES:
+        raise ValueError(f"value_side 需為 {' / '.join(JOIN_SIDES)}")
+    if max_matches < 1:
+        raise ValueError("每個關聯鍵最多配對列數需 >= 1")
+    if left_key not in left.columns:
+        raise ValueError(f"找不到關聯鍵：{left_key}")
+    if right_key not in right.columns:
+        raise ValueError(f"關聯資料集找不到關聯鍵：{right_key}")
+    if column not in (left if value_side == "left" else right).columns:
+        raise ValueError(f"找不到數值欄位：{column}")
+
+    # 列數較少的一邊建索引（build），另一邊分塊串流（probe）
+    if estimate_dataset_rows(left) >= estimate_dataset_rows(right):
+        build, build_key, probe, probe_key, build_side = right, right_key, left, left_key, "right"
+    else:
+        build, build_key, probe, probe_key, build_side = left, left_key, right, right_key, "left"
+    value_on_build = value_side == build_side
+
+    # build：factorize key，每個 key 保留最先出現的 max_matches 列
+    frame = _read_columns(build, [build_key] + ([column] if value_on_build else []), chunk_rows)
+    codes, uniques = pd.factorize(_key_array(frame[build_key]))
+    codes = codes.astype(np.int64, copy=False)
+    matched = np.flatnonzero(codes >= 0)
+    kept = np.zeros(codes.size, dtype=bool)
+    kept[matched] = _rank_within_keys(codes[matched]) < max_matches
+    n_keys = len(uniques)
+    build_count = np.bincount(codes[kept], minlength=n_keys)
+    rows_dropped = int(matched.size - kept.sum())
+    index = _KeyIndex(uniques)
+
+    # probe：逐塊查出每列的 key 編號，依跨塊累計的名次套用配對上限
+    accumulator = _WeightedStats(bounds, bins)
+    seen = np.zeros(n_keys, dtype=np.int64)
+    probe_count = np.zeros(n_keys, dtype=np.int64)
+    probe_columns = [probe_key] + ([] if value_on_build else [column])
+    for block in _iter_columns(probe, probe_columns, chunk_rows):
+        positions = index.get_indexer(_key_array(block[probe_key]))
+        rows = np.flatnonzero(positions >= 0)
+        block_codes = positions[rows]
+        keep = _cap_block(block_codes, seen, max_matches)
+        rows_dropped += int(keep.size - keep.sum())
+        rows, block_codes = rows[keep], block_codes[keep]
+        if value_on_build:
+            probe_count += np.bincount(block_codes, minlength=n_keys)
+        else:
+            accumulator.add(block[column].iloc[rows], build_count[block_codes])
+
+    if value_on_build:
+        accumulator.add(frame[column][kept], probe_count[codes[kept]])
+
+    stats = accumulator.stats
+    stats["rows_dropped"] = rows_dropped
+    return stats
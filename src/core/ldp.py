@@ -0,0 +1,211 @@
+# 類別欄位的本地差分隱私 (local DP)：每一列各自隨機化後才匯出
+#
+# - k-RR（k-ary randomized response）：以機率 p 保留原類別，否則均勻換成其他 k-1 個類別之一
+# - OUE（optimized unary encoding, Wang et al., 2017）：one-hot 編碼後，
+#   真實位元以 1/2 保留為 1，其他位元以 1/(e^ε+1) 翻成 1
+# - 整個 factorize 後的 code 陣列一次隨機化（沒有逐列迴圈）
+# - 對應的不偏頻率估計：只需各類別在匯出檔中的次數（k-RR）或各位元的總和（OUE）
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.core.rng import noise_rng
+
+
+# 一次產生 OUE 亂數矩陣的格數上限（列數 × 類別數），控制記憶體用量
+OUE_BLOCK_CELLS = 4_000_000
+
+# OUE 每個類別輸出一欄，類別太多時匯出檔會過寬
+OUE_MAX_CATEGORIES = 256
+
+LDP_MODES = ("krr", "oue")
+
+
+def normalize_ldp_mode(text: str) -> str:
+    """把 GUI 顯示的文字（例如 'OUE'）轉成 LDP_MODES 的 key，預設為 krr"""
+    return "oue" if "oue" in (text or "").lower() else "krr"
+
+
+def krr_probabilities(k: int, epsilon: float):
+    """k-RR 的 (p, q)：p 為保留原類別的機率，q 為回報某個特定其他類別的機率"""
+    denom = math.exp(epsilon) + k - 1
+    return math.exp(epsilon) / denom, 1.0 / denom
+
+
+def oue_probabilities(epsilon: float):
+    """OUE 的 (p, q)：p 為真實位元回報 1 的機率，q 為其他位元回報 1 的機率"""
+    return 0.5, 1.0 / (math.exp(epsilon) + 1)
+
+
+def encode_categories(values, categories):
+    """
+    依公開類別清單把值轉成 code（0 ~ k-1）。
+    空值為 -1；不在類別清單中的非空值為 -2（由呼叫端決定如何處理）。
+    以字串比對，不受各 chunk 推斷出的 dtype 不同影響。
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    missing = values.isna().to_numpy()
+    index = pd.Index(np.asarray(categories).astype(str))
+    codes = index.get_indexer(values.astype(str))
+    codes[(codes < 0) & ~missing] = -2
+    codes[missing] = -1
+    return codes
+
+
+def krr_perturb(codes, k: int, epsilon: float, rng=None) -> np.ndarray:
+    """
+    k-RR：對整個 code 陣列一次隨機化，每列只用一個均勻亂數：
+    u < p 時保留原 code，否則 (u - p) / (1 - p) 均勻落在其他 k-1 個類別上。
+    code < 0（空值）的位置維持不變。
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    if k <= 1:
+        return codes.copy()
+    rng = rng if rng is not None else noise_rng()
+    p, _ = krr_probabilities(k, epsilon)
+
+    u = rng.random(codes.shape)
+    other = np.minimum(((u - p) / (1.0 - p) * (k - 1)).astype(np.int64), k - 2)
+    other += other >= codes  # 跳過原本的類別
+    out = np.where(u < p, codes, other)
+    return np.where(codes < 0, codes, out)
+
+
+def oue_perturb(codes, k: int, epsilon: float, rng=None) -> np.ndarray:
+    """
+    OUE：回傳 (列數, k) 的 uint8 位元矩陣；空值列全部為 0（由呼叫端標成空值）。
+    每列的 k 個位元各用一個亂數，分段產生以限制記憶體。
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    rng = rng if rng is not None else noise_rng()
+    p, q = oue_probabilities(epsilon)
+    bits = np.zeros((codes.size, k), dtype=np.uint8)
+    step = max(1, OUE_BLOCK_CELLS // max(k, 1))
+
+    for start in range(0, codes.size, step):
+        block = codes[start:start + step]
+        rows = np.arange(block.size)
+        valid = block >= 0
+        thresholds = np.full((block.size, k), q, dtype=np.float32)
+        thresholds[rows[valid], block[valid]] = p
+        out = rng.random((block.size, k), dtype=np.float32) < thresholds
+        out[~valid] = False
+        bits[start:start + step] = out
+    return bits
+
+
+def krr_estimate(counts, n: int, epsilon: float) -> np.ndarray:
+    """由 k-RR 匯出檔中各類別的次數還原真實次數的不偏估計：(c - n·q) / (p - q)"""
+    counts = np.asarray(counts, dtype=np.float64)
+    p, q = krr_probabilities(counts.size, epsilon)
+    return (counts - n * q) / (p - q)
+
+
+def oue_estimate(bit_sums, n: int, epsilon: float) -> np.ndarray:
+    """由 OUE 各位元的總和還原真實次數的不偏估計：(s - n·q) / (p - q)"""
+    bit_sums = np.asarray(bit_sums, dtype=np.float64)
+    p, q = oue_probabilities(epsilon)
+    return (bit_sums - n * q) / (p - q)
+
+
+def oue_columns(column, categories):
+    """OUE 匯出時取代原欄位的各類別欄名"""
+    return [f"{column}={c}" for c in categories]
+
+
+def make_ldp_spec(column, categories, epsilon, mode="krr"):
+    """
+    單一類別欄位的本地 DP 匯出設定。
+    categories 為公開類別清單（公開的類別清單或 top-k 已發布的類別，不可直接取自原始資料）；
+    epsilon 為每一列各自的本地隱私預算。
+    """
+    mode = normalize_ldp_mode(mode)
+    categories = np.asarray(pd.unique(np.asarray(categories, dtype=object)).astype(str))
+    if categories.size == 0:
+        raise ValueError("類別清單為空")
+    if mode == "oue" and categories.size > OUE_MAX_CATEGORIES:
+        raise ValueError(f"OUE 最多支援 {OUE_MAX_CATEGORIES} 個類別（目前 {categories.size} 個），請改用 k-RR")
+    return {
+        "kind": "ldp",
+        "column": column,
+        "categories": categories,
+        "mode": mode,
+        "epsilon": float(epsilon),
+    }
+
+
+def ldp_block(block: pd.DataFrame, spec, rng) -> pd.DataFrame:
+    """
+    對一個 chunk 的類別欄位做本地 DP（block 會被原地修改）。
+    不在類別清單中的非空值先換成隨機類別，再一起隨機化，輸出仍只包含清單內的類別。
+    """
+    column = spec["column"]
+    categories = spec["categories"]
+    k = categories.size
+    codes = encode_categories(block[column], categories)
+    unknown = codes == -2
+    if unknown.any():
+        codes[unknown] = rng.integers(0, k, int(unknown.sum()))
+
+    if spec["mode"] == "oue":
+        bits = oue_perturb(codes, k, spec["epsilon"], rng)
+        position = block.columns.get_loc(column)
+        # 空值列的各位元欄也輸出為空值，估計時才能排除
+        missing = codes == -1
+        onehot = pd.DataFrame({
+            name: pd.arrays.IntegerArray(bits[:, j], missing)
+            for j, name in enumerate(oue_columns(column, categories))
+        }, index=block.index)
+        return pd.concat([block.iloc[:, :position], onehot, block.iloc[:, position + 1:]], axis=1)
+
+    noisy = krr_perturb(codes, k, spec["epsilon"], rng)
+    labels = np.where(noisy >= 0, categories[np.maximum(noisy, 0)], None)
+    block[column] = labels
+    return block
+
+
+def estimate_frequencies(noisy, spec):
+    """
+    由匯出後的資料還原各類別的次數估計，回傳 (categories, 估計次數)。
+    noisy: k-RR 為匯出後的類別欄（Series / array）；OUE 為包含 oue_columns 各欄的 DataFrame
+    """
+    counts, n = ldp_counts(noisy, spec)
+    return spec["categories"], ldp_estimate(counts, n, spec)
+
+
+def ldp_counts(noisy, spec):
+    """匯出資料的充分統計量 (各類別次數或位元總和, 有效列數)，可分塊計算後相加"""
+    categories = spec["categories"]
+    if spec["mode"] == "oue":
+        bits = noisy[oue_columns(spec["column"], categories)].apply(pd.to_numeric, errors="coerce").to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+        valid = ~np.isnan(bits).all(axis=1)
+        return np.nansum(bits[valid], axis=0).astype(np.int64), int(valid.sum())
+    codes = encode_categories(noisy, categories)
+    codes = codes[codes >= 0]
+    return np.bincount(codes, minlength=categories.size), codes.size
+
+
+def ldp_estimate(counts, n: int, spec) -> np.ndarray:
+    if spec["mode"] == "oue":
+        return oue_estimate(counts, n, spec["epsilon"])
+    return krr_estimate(counts, n, spec["epsilon"])
+
+
+def estimate_export_frequencies(path: str, spec, chunksize: int = 1_000_000):
+    """串流讀取匯出的 CSV（可為 .gz），逐塊累計次數後還原頻率估計，回傳 (categories, 估計次數)"""
+    if spec["mode"] == "oue":
+        usecols = oue_columns(spec["column"], spec["categories"])
+    else:
+        usecols = [spec["column"]]
+
+    total_counts = np.zeros(spec["categories"].size, dtype=np.int64)
+    total_n = 0
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize, dtype=str):
+        counts, n = ldp_counts(chunk if spec["mode"] == "oue" else chunk[spec["column"]], spec)
+        total_counts += counts
+        total_n += n
+    return spec["categories"], ldp_estimate(total_counts, total_n, spec)
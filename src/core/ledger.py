@@ -0,0 +1,205 @@
+# 差分隱私發布紀錄 (release ledger)：以 SQLite 保存每一次發布的結果
+# - 完全相同的查詢直接回傳先前發布的答案：不重算、也不再花費隱私預算
+# - 依資料集內容雜湊累計已花費的 ε / δ
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+DEFAULT_LEDGER_PATH = os.path.join(os.path.expanduser("~"), ".simple_dp", "ledger.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS releases (
+    id           INTEGER PRIMARY KEY,
+    release_key  TEXT NOT NULL UNIQUE,
+    dataset_hash TEXT NOT NULL,
+    column_name  TEXT NOT NULL,
+    query        TEXT NOT NULL,
+    lower        REAL NOT NULL,
+    upper        REAL NOT NULL,
+    mechanism    TEXT NOT NULL,
+    epsilon      REAL NOT NULL,
+    delta        REAL NOT NULL,
+    bins         INTEGER NOT NULL,
+    result_json  TEXT NOT NULL,
+    created_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_releases_dataset ON releases (dataset_hash);
+CREATE TABLE IF NOT EXISTS budget (
+    dataset_hash  TEXT PRIMARY KEY,
+    epsilon_total REAL NOT NULL,
+    delta_total   REAL NOT NULL,
+    releases      INTEGER NOT NULL
+);
+"""
+
+
+def file_content_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """以 BLAKE2b 分塊計算檔案內容雜湊（不需整份讀入記憶體）"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as fh:
+        while True:
+            block = fh.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode(value):
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": value.tolist()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if "__ndarray__" in value:
+            return np.asarray(value["__ndarray__"])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+class ReleaseLedger:
+    """
+    SQLite 發布紀錄。release_key 有唯一索引，即使有數十萬筆紀錄查詢也在 1 ms 內。
+    可在多個 thread 之間共用（內部以 lock 序列化存取）。
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _key_fields(dataset_hash, params, bins):
+        mech = params["mechanism"]
+        # Laplace 不使用 δ（以門檻篩選類別時除外），避免 GUI 上殘留的 δ 值讓相同查詢對不上
+        delta = float(params["delta"]) if mech == "gaussian" or params.get("domain_threshold") else 0.0
+        lower, upper = params["bounds"] or (0.0, 0.0)  # 類別次數沒有資料邊界
+        fields = {
+            "dataset_hash": dataset_hash,
+            "column": str(params["column"]),
+            "query": params["query"],
+            "lower": float(lower),
+            "upper": float(upper),
+            "mechanism": mech,
+            "epsilon": float(params["epsilon"]),
+            "delta": delta,
+            "bins": int(bins) if params["query"] in ("histogram", "range") else 0,
+        }
+        # 使用者層級 DP 的貢獻上限也是查詢的一部分（列層級查詢維持原本的 key）
+        if params.get("user_column") is not None:
+            fields["user_column"] = str(params["user_column"])
+            fields["max_rows_per_user"] = int(params["max_rows_per_user"])
+        if params["query"] == "topk":
+            fields["top_k"] = int(params["top_k"])
+            domain = (params.get("category_domains") or {}).get(params["column"])
+            if domain is not None:
+                fields["category_domain"] = list(domain)
+        if params["query"] == "timeseries":
+            fields["time_column"] = str(params["time_column"])
+            fields["time_bucket"] = params["time_bucket"]
+            # 持續發布模式的終點預設為目前時間，只以起點識別同一個查詢
+            start, end = params["time_range"]
+            fields["time_start"] = str(start)
+            if not params["continual"]:
+                fields["time_end"] = str(end)
+            fields["continual"] = bool(params["continual"])
+        if params["query"] == "covariance":
+            fields["columns"] = [str(c) for c in params["columns"]]
+            fields["norm_bound"] = float(params["norm_bound"])
+        if params["query"] == "synthetic":
+            fields["columns"] = [str(c) for c in params["columns"]]
+            fields["column_bounds"] = [[str(c), float(lo), float(hi)] for c, lo, hi in params["column_bounds"]]
+            domains = params.get("category_domains") or {}
+            used = [[str(c), list(domains[c])] for c in params["columns"] if c in domains]
+            if used:
+                fields["category_domains"] = used
+        if params["query"] == "join":
+            # 關聯資料集以內容雜湊識別（取不到時退回名稱）
+            fields["join_dataset"] = params.get("join_hash") or str(params["join_dataset"])
+            fields["join_keys"] = [str(c) for c in params["join_keys"]]
+            fields["join_side"] = params["join_column"][0]
+            fields["join_aggregate"] = params["join_aggregate"]
+            fields["max_matches"] = int(params["max_matches"])
+        return fields
+
+    @staticmethod
+    def _release_key(fields) -> str:
+        text = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=20).hexdigest()
+
+    def lookup(self, dataset_hash: str, params: dict, bins: int):
+        """找先前完全相同的發布；找到回傳 result_payload，否則回傳 None"""
+        key = self._release_key(self._key_fields(dataset_hash, params, bins))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result_json FROM releases WHERE release_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return _decode(json.loads(row[0]))
+
+    def record(self, dataset_hash: str, params: dict, bins: int, payload: dict) -> bool:
+        """
+        保存一次發布並累計該資料集的 ε / δ。
+        已存在相同發布時不重複記錄（回傳 False）。
+        """
+        fields = self._key_fields(dataset_hash, params, bins)
+        key = self._release_key(fields)
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO releases (release_key, dataset_hash, column_name, query, lower, upper, "
+                "mechanism, epsilon, delta, bins, result_json, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, fields["dataset_hash"], fields["column"], fields["query"], fields["lower"],
+                 fields["upper"], fields["mechanism"], fields["epsilon"], fields["delta"], fields["bins"],
+                 json.dumps(_encode(payload)), time.time())
+            )
+            if cur.rowcount == 0:
+                return False
+            self._conn.execute(
+                "INSERT INTO budget (dataset_hash, epsilon_total, delta_total, releases) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(dataset_hash) DO UPDATE SET "
+                "epsilon_total = epsilon_total + excluded.epsilon_total, "
+                "delta_total = delta_total + excluded.delta_total, "
+                "releases = releases + 1",
+                (dataset_hash, fields["epsilon"], fields["delta"])
+            )
+        return True
+
+    def budget(self, dataset_hash: str):
+        """該資料集累計花費的 {"epsilon", "delta", "releases"}"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT epsilon_total, delta_total, releases FROM budget WHERE dataset_hash = ?",
+                (dataset_hash,)
+            ).fetchone()
+        if row is None:
+            return {"epsilon": 0.0, "delta": 0.0, "releases": 0}
+        return {"epsilon": row[0], "delta": row[1], "releases": row[2]}
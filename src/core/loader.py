@@ -0,0 +1,238 @@
+# 欄位投影的延遲載入：上傳時只讀 header 與預覽，欄位數值在第一次使用時才解析
+# 另有分塊串流（StreamingDataset）與區塊抽樣（SampledDataset）兩種給大檔案的資料集，
+# 由 planner.plan_execution 依檔案大小與可用記憶體選擇；CSV 的解析與彙總交給 backends 的執行後端
+
+import hashlib
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.core.backends import get_backend
+from src.core.hll import HyperLogLog
+from src.core.ledger import file_content_hash
+
+
+# 預覽表格顯示的筆數
+PREVIEW_ROWS = 15
+
+# 分塊串流模式每次讀取的列數
+STREAM_CHUNK_ROWS = 1_000_000
+
+# 抽樣模式每個區塊的大小（區塊在檔案中隨機挑選，不重疊）；固定 seed 讓同一檔案每次抽到相同的列
+SAMPLE_BLOCK_BYTES = 4 * 1024 * 1024
+SAMPLE_SEED = 0
+
+
+class _FileHashMixin:
+    """檔案內容雜湊（給發布紀錄使用）；檔案修改時間或大小改變才重新計算"""
+
+    _hash = None
+    _hash_signature = None
+
+    @property
+    def content_hash(self) -> str:
+        stat = os.stat(self.file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._hash_signature != signature:
+            self._hash = file_content_hash(self.file_path)
+            self._hash_signature = signature
+        return self._hash
+
+
+class LazyDataset(_FileHashMixin):
+    """
+    CSV / XLSX 的延遲載入資料集。
+
+    - 建立時只讀取 header 與前 PREVIEW_ROWS 筆（給預覽表格用）
+    - dataset[column] 第一次被使用時才以 usecols=[column] 解析該欄位，之後重複使用快取
+    - eager=True（整份載入模式）時，第一次使用任一欄位就一次解析全部欄位
+    - backend 為執行後端名稱（None 為目前的全域後端），決定 CSV 欄位以哪個 parser 解析
+    - 提供 columns 與 __getitem__，可以直接交給 engine.run_dp_from_settings()
+    """
+
+    def __init__(self, file_path: str, preview_rows: int = PREVIEW_ROWS, eager: bool = False, backend: str = None):
+        self.file_path = file_path
+        self.is_excel = file_path.lower().endswith(".xlsx")
+        self.eager = eager
+        self.backend = get_backend(backend)
+        self.preview = self._read(nrows=preview_rows)
+        self.columns = self.preview.columns
+        self.n_rows = None  # 解析過任一欄位後才知道總筆數
+        self._cache = {}
+        self._lock = threading.Lock()  # 多個運算工作同時要求同一欄位時只解析一次
+
+    def _read(self, **kwargs) -> pd.DataFrame:
+        if self.is_excel:
+            return pd.read_excel(self.file_path, **kwargs)
+        if "nrows" in kwargs:
+            # 預覽只讀前幾列，固定使用 pandas
+            return pd.read_csv(self.file_path, **kwargs)
+        return self.backend.read_csv(self.file_path, kwargs.get("usecols"))
+
+    def __contains__(self, column) -> bool:
+        return column in self.columns
+
+    def __getitem__(self, column) -> pd.Series:
+        if column not in self.columns:
+            raise KeyError(column)
+        self.load_columns([column])
+        return self._cache[column]
+
+    def load_columns(self, columns):
+        """一次解析多個尚未快取的欄位（只讀這些欄位）"""
+        with self._lock:
+            missing = [c for c in columns if c not in self._cache]
+            if not missing:
+                return
+            if self.eager:
+                missing = [c for c in self.columns if c not in self._cache]
+            df = self._read(usecols=missing)
+            for col in missing:
+                self._cache[col] = df[col]
+            self.n_rows = len(df)
+
+    def iter_blocks(self, columns, block_rows: int):
+        """
+        依列分塊讀取多個欄位（給需要整列資料的多欄位查詢，例如共變異數矩陣）。
+        CSV 以 chunksize 串流讀取、不放進快取；Excel 無法串流，整欄載入後再切塊。
+        """
+        columns = list(columns)
+        if not self._can_stream() or all(c in self._cache for c in columns):
+            self.load_columns(columns)
+            frame = pd.DataFrame({c: self._cache[c] for c in columns})
+            for start in range(0, len(frame), block_rows):
+                yield frame.iloc[start:start + block_rows]
+            return
+        yield from self.backend.iter_csv(self.file_path, columns, block_rows)
+
+    def _can_stream(self) -> bool:
+        return not self.is_excel and not self.eager
+
+    def cached_columns(self):
+        return list(self._cache)
+
+    def load_all(self) -> pd.DataFrame:
+        """讀取完整資料（例如下載加噪後的完整資料集時才需要）"""
+        self.load_columns(list(self.columns))
+        return pd.DataFrame({col: self._cache[col] for col in self.columns})
+
+
+class SampledDataset(LazyDataset):
+    """
+    大型 CSV 的區塊抽樣資料集：在檔案中隨機挑選不重疊的位元組區塊（對齊到換行），
+    只解析這些區塊內的完整列。讀取量固定為約 fraction × 檔案大小，與檔案多大無關。
+
+    - 抽樣結果在第一次使用欄位時才讀取，之後同樣以欄位為單位快取
+    - 統計結果只代表樣本（count / sum 約為全體的 sample_fraction 倍）
+    - 欄位值內含換行（引號包住的多行欄位）的檔案不適用
+    """
+
+    def __init__(self, file_path: str, fraction: float, preview_rows: int = PREVIEW_ROWS,
+                 block_bytes: int = SAMPLE_BLOCK_BYTES, seed: int = SAMPLE_SEED):
+        if file_path.lower().endswith(".xlsx"):
+            raise ValueError("Excel 檔案無法依位元組區塊抽樣")
+        self.fraction = min(max(float(fraction), 0.0), 1.0)
+        self.block_bytes = int(block_bytes)
+        self.seed = seed
+        self.sample_fraction = None  # 實際讀取的位元組比例（讀取樣本後才知道）
+        self._sample = None
+        # 樣本是記憶體中的位元組，以 pandas 解析
+        super().__init__(file_path, preview_rows, backend="pandas")
+
+    def _sample_bytes(self) -> bytes:
+        """header + 抽中區塊內的完整列"""
+        size = os.path.getsize(self.file_path)
+        n_blocks = max(1, size // self.block_bytes)
+        take = min(n_blocks, max(1, int(round(n_blocks * self.fraction))))
+        starts = np.sort(np.random.default_rng(self.seed).choice(n_blocks, take, replace=False)) * self.block_bytes
+
+        parts = []
+        with open(self.file_path, "rb") as fh:
+            header = fh.readline()
+            for start in starts:
+                if start > len(header):
+                    # 從前一個位元組讀到換行：丟掉被切斷的第一列（屬於上一個區塊），剛好在列首時不丟任何列
+                    fh.seek(int(start) - 1)
+                    fh.readline()
+                else:
+                    fh.seek(len(header))
+                end = int(start) + self.block_bytes
+                block = fh.read(max(0, end - fh.tell()))
+                if block and not block.endswith(b"\n"):
+                    block += fh.readline()  # 補完最後一列
+                parts.append(block)
+        body = b"".join(parts)
+        self.sample_fraction = min(1.0, (len(header) + len(body)) / max(size, 1))
+        return header + body
+
+    def _read(self, **kwargs) -> pd.DataFrame:
+        if "nrows" in kwargs:
+            return pd.read_csv(self.file_path, **kwargs)
+        if self._sample is None:
+            self._sample = self._sample_bytes()
+        return pd.read_csv(io.BytesIO(self._sample), **kwargs)
+
+    def _can_stream(self) -> bool:
+        return False
+
+    @property
+    def content_hash(self) -> str:
+        """樣本不等於整份檔案：雜湊另外帶上抽樣參數，發布紀錄不會把樣本結果當成整份資料的結果重播"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(super().content_hash.encode("ascii"))
+        digest.update(f"|sample|{self.fraction!r}|{self.block_bytes}|{self.seed}".encode("ascii"))
+        return digest.hexdigest()
+
+
+class StreamingDataset(_FileHashMixin):
+    """
+    大型 CSV 的分塊串流資料集：不快取任何欄位，每次查詢由執行後端掃過需要的欄位
+    （pandas 以 chunksize 分塊；Polars / Arrow 以 lazy scan 直接彙總）。
+    提供與 SQLiteSource 相同的 compute_stats() / category_counts() / distinct_sketch() / iter_blocks() 介面，
+    engine.run_dp() 會走「彙總下推」路徑，記憶體只與 chunk_rows 有關。
+    """
+
+    def __init__(self, file_path: str, preview_rows: int = PREVIEW_ROWS, chunk_rows: int = STREAM_CHUNK_ROWS,
+                 backend: str = None):
+        if file_path.lower().endswith(".xlsx"):
+            raise ValueError("Excel 檔案無法串流讀取")
+        self.file_path = file_path
+        self.chunk_rows = int(chunk_rows)
+        self.backend = get_backend(backend)
+        self.preview = pd.read_csv(file_path, nrows=preview_rows)
+        self.columns = self.preview.columns
+
+    def _chunks(self, columns):
+        return self.backend.iter_csv(self.file_path, columns, self.chunk_rows)
+
+    def compute_stats(self, column: str, bounds, query_key: str, bins: int):
+        """由執行後端掃描並 clip 後累加 n / 總和（/ 直方圖），與 DataFrame 路徑的結果相同"""
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+        hist_bins = int(bins) if query_key == "histogram" else None
+        return self.backend.column_stats(self.file_path, column, bounds, hist_bins, self.chunk_rows)
+
+    def compute_many(self, requests):
+        """requests: [(column, bounds, query_key, bins), ...]，回傳同順序的 stats list"""
+        return [self.compute_stats(*request) for request in requests]
+
+    def category_counts(self, column: str):
+        """逐塊累計類別次數（空值不計），回傳 (categories, counts)"""
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+        return self.backend.category_counts(self.file_path, column, self.chunk_rows)
+
+    def distinct_sketch(self, column: str, precision: int):
+        """逐塊更新同一個 HyperLogLog sketch（相異值個數）"""
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+        sketch = HyperLogLog(precision)
+        for chunk in self._chunks([column]):
+            sketch.update(chunk[column])
+        return sketch
+
+    def iter_blocks(self, columns, block_rows: int):
+        return self.backend.iter_csv(self.file_path, columns, block_rows)
@@ -0,0 +1,148 @@
+# 多欄位平行運算：數值欄位一次放進 shared memory，再由 process pool 分工計算
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.core.engine import merge_stats
+
+
+# 每個 row block 至少這麼多筆，避免 task 太碎反而被排程成本拖慢
+MIN_BLOCK_ROWS = 256_000
+
+# worker 端已 attach 的 shared memory（同一個 worker 重複使用，不必每個 task 重新打開）
+_attached = {}
+
+
+def _attach(shm_name: str, shape):
+    """在 worker 內取得 shared memory 上的 (欄位數, 筆數) float64 陣列"""
+    if shm_name not in _attached:
+        # pool 內的 worker 與主程序共用同一個 resource_tracker，
+        # 重複登記不會造成提早 unlink；unlink 由建立者 (SharedColumnStore) 負責
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _attached[shm_name] = (shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+    return _attached[shm_name][1]
+
+
+def _block_stats(shm_name, shape, col_idx, start, stop, bounds, bins):
+    """
+    worker 執行的 task：對某欄位的一段 row block 做 clip + 彙總，
+    只回傳少量的部分充分統計量（不回傳資料本身）。
+    """
+    values = _attach(shm_name, shape)[col_idx, start:stop]
+    values = values[~np.isnan(values)]
+    clipped = np.clip(values, bounds[0], bounds[1])
+
+    stats = {"n": int(clipped.size), "sum": float(clipped.sum())}
+    if bins is not None:
+        hist, bin_edges = np.histogram(clipped, bins=bins, range=bounds)
+        stats["hist"] = hist
+        stats["bin_edges"] = bin_edges
+    return stats
+
+
+class SharedColumnStore:
+    """
+    把資料集的數值欄位轉成 float64（非數值 → NaN）後，
+    以「一欄一段連續記憶體」的方式放進一塊 shared memory。
+    worker 只需要 (name, shape) 就能 attach，不必 pickle DataFrame。
+
+    data 可以是 DataFrame 或 LazyDataset：LazyDataset 先以 load_columns() 一次解析需要的欄位。
+    """
+
+    def __init__(self, data, columns=None):
+        if columns is None:
+            columns = [c for c in data.columns if pd.api.types.is_numeric_dtype(data[c])]
+        self.columns = list(columns)
+        if hasattr(data, "load_columns"):
+            data.load_columns(self.columns)
+        n_rows = len(data[self.columns[0]]) if self.columns else 0
+        self.shape = (len(self.columns), n_rows)
+
+        nbytes = max(1, self.shape[0] * self.shape[1] * 8)
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.array = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+
+        for i, col in enumerate(self.columns):
+            self.array[i] = pd.to_numeric(data[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        """釋放 shared memory（只有建立者需要 unlink）"""
+        if self.shm is None:
+            return
+        self.array = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+class ParallelExecutor:
+    """
+    以 process pool 平行計算多個欄位的充分統計量：
+        - 每個 task 處理「一個欄位 × 一段 row block」
+        - 部分統計量在主程序用 merge_stats() 合併後才交給 engine 加噪
+
+    提供與 SQLiteSource 相同的 columns / compute_stats() 介面，
+    因此也可以直接交給 engine.run_dp_on_source()；多欄位查詢由 engine.run_dp_columns() 建立。
+    """
+
+    def __init__(self, data, columns=None, max_workers=None, block_rows=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.store = SharedColumnStore(data, columns)
+        self.columns = self.store.columns
+
+        n_rows = self.store.shape[1]
+        if block_rows is None:
+            block_rows = max(MIN_BLOCK_ROWS, math.ceil(n_rows / self.max_workers))
+        self.block_rows = max(1, int(block_rows))
+
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        self.store.close()
+
+    def _blocks(self):
+        n_rows = self.store.shape[1]
+        for start in range(0, max(n_rows, 1), self.block_rows):
+            yield start, min(start + self.block_rows, n_rows)
+
+    def compute_many(self, requests):
+        """
+        requests: [(column, bounds, query_key, bins), ...]
+        一次把所有欄位的所有 row block 丟進 pool，回傳與 requests 同順序的 stats list。
+        """
+        futures = []
+        for column, bounds, query_key, bins in requests:
+            if column not in self.columns:
+                raise ValueError(f"找不到數值欄位：{column}")
+            col_idx = self.columns.index(column)
+            hist_bins = bins if query_key == "histogram" else None
+            futures.append([
+                self.pool.submit(
+                    _block_stats, self.store.name, self.store.shape,
+                    col_idx, start, stop, (float(bounds[0]), float(bounds[1])), hist_bins
+                )
+                for start, stop in self._blocks()
+            ])
+
+        return [merge_stats(f.result() for f in column_futures) for column_futures in futures]
+
+    def compute_stats(self, column, bounds, query_key, bins):
+        return self.compute_many([(column, bounds, query_key, bins)])[0]
@@ -0,0 +1,212 @@
+# 分割檔資料來源：一個目錄（或 glob 樣式）底下的多個 CSV 視為同一份資料集
+#
+# - map：每個分割檔各自算出部分充分統計量（n / clip 後總和 / 直方圖 counts / 類別次數 / 相異值 sketch / 剖析 sketch），
+#        以 process pool 平行計算
+# - reduce：主程序合併部分統計量後只加噪一次（與單一檔案的結果相同）
+# - 部分統計量依「檔案路徑 + mtime + 大小 + 查詢參數」快取：新增一個分割檔只需計算那一個檔
+
+import copy
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.core.engine import merge_stats
+from src.core.hll import HyperLogLog
+from src.core.ledger import file_content_hash
+from src.core.profiler import DatasetProfile, profile_file
+
+
+# 目錄來源預設收集的分割檔
+PARTITION_PATTERNS = ("*.csv", "*.csv.gz")
+
+# 部分統計量快取的筆數上限（超過時淘汰最久未使用的）
+PARTIAL_CACHE_ENTRIES = 50_000
+
+_partial_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def is_partitioned_path(path: str) -> bool:
+    """目錄或含萬用字元的路徑視為分割檔資料集"""
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+def list_partitions(path: str):
+    """依檔名排序列出分割檔（part-0000.csv, part-0001.csv, ...）"""
+    if os.path.isdir(path):
+        files = [f for pattern in PARTITION_PATTERNS for f in glob.glob(os.path.join(path, pattern))]
+    else:
+        files = glob.glob(path)
+    return sorted(f for f in set(files) if os.path.isfile(f))
+
+
+def _get_pool():
+    """所有分割檔來源共用一個 process pool（第一次需要時才建立）"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return _pool
+
+
+def _file_signature(path: str):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+# =====================================================
+# map：單一分割檔的部分統計量（在 worker process 內執行）
+# =====================================================
+
+def _partition_stats(path, column, bounds, bins):
+    """單一分割檔某欄位的 n / clip 後總和（/ 直方圖），只讀這一欄"""
+    values = pd.to_numeric(pd.read_csv(path, usecols=[column])[column], errors="coerce")
+    values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    clipped = np.clip(values[~np.isnan(values)], bounds[0], bounds[1])
+    stats = {"n": int(clipped.size), "sum": float(clipped.sum())}
+    if bins is not None:
+        stats["hist"], stats["bin_edges"] = np.histogram(clipped, bins=bins, range=bounds)
+    return stats
+
+
+def _partition_category_counts(path, column):
+    """單一分割檔的類別次數（空值不計），回傳 value → count 的 Series"""
+    return pd.read_csv(path, usecols=[column])[column].value_counts(dropna=True)
+
+
+def _partition_distinct(path, column, precision):
+    """單一分割檔的相異值 sketch（4 KB，合併時逐位 OR）"""
+    return HyperLogLog(precision).update(pd.read_csv(path, usecols=[column])[column])
+
+
+def _partition_hash(path):
+    return file_content_hash(path)
+
+
+def _partition_profile(path):
+    return profile_file(path)
+
+
+class PartitionedSource:
+    """
+    多個 CSV 分割檔組成的資料來源。
+    提供與 SQLiteSource 相同的 columns / compute_stats() / category_counts() / distinct_sketch() / iter_blocks() 介面，
+    engine.run_dp() 會走「彙總下推」路徑：只取回部分統計量，合併後加噪一次。
+    """
+
+    def __init__(self, path: str):
+        self.file_path = path
+        self.partitions = list_partitions(path)
+        if not self.partitions:
+            raise ValueError("找不到任何分割檔（*.csv / *.csv.gz）")
+        self.preview = pd.read_csv(self.partitions[0], nrows=15)
+        self.columns = self.preview.columns
+
+    def refresh(self):
+        """重新列出分割檔（新增的分割檔在下次運算時才會被計入）"""
+        partitions = list_partitions(self.file_path)
+        if partitions:
+            self.partitions = partitions
+        return self.partitions
+
+    # ============
+    # map / reduce
+    # ============
+
+    def _map(self, kind, fn, *args):
+        """
+        對每個分割檔計算 fn(path, *args)，依 (kind, 檔案簽章, args) 快取。
+        只有快取沒有的分割檔才送進 process pool；只缺一個時直接在本程序計算。
+        回傳與 self.partitions 同順序的部分結果列表。
+        """
+        self.refresh()
+        keys = [(kind, _file_signature(p), args) for p in self.partitions]
+        results = [None] * len(keys)
+        missing = []
+        with _cache_lock:
+            for i, key in enumerate(keys):
+                if key in _partial_cache:
+                    _partial_cache.move_to_end(key)
+                    results[i] = _partial_cache[key]
+                else:
+                    missing.append(i)
+
+        if len(missing) == 1:
+            results[missing[0]] = fn(self.partitions[missing[0]], *args)
+        elif missing:
+            pool = _get_pool()
+            futures = {i: pool.submit(fn, self.partitions[i], *args) for i in missing}
+            for i, future in futures.items():
+                results[i] = future.result()
+
+        with _cache_lock:
+            for i in missing:
+                _partial_cache[keys[i]] = results[i]
+            while len(_partial_cache) > PARTIAL_CACHE_ENTRIES:
+                _partial_cache.popitem(last=False)
+        return results
+
+    def compute_stats(self, column: str, bounds, query_key: str, bins: int):
+        """各分割檔的部分統計量合併後回傳（engine.release_from_stats 只加噪一次）"""
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+        bounds = (float(bounds[0]), float(bounds[1]))
+        hist_bins = int(bins) if query_key == "histogram" else None
+        return merge_stats(self._map("stats", _partition_stats, column, bounds, hist_bins))
+
+    def compute_many(self, requests):
+        """requests: [(column, bounds, query_key, bins), ...]，回傳同順序的 stats list"""
+        return [self.compute_stats(*request) for request in requests]
+
+    def category_counts(self, column: str):
+        """各分割檔的類別次數加總，回傳 (categories, counts)"""
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+        parts = [p for p in self._map("categories", _partition_category_counts, column) if len(p)]
+        if not parts:
+            return np.array([], dtype=object), np.zeros(0, dtype=np.int64)
+        totals = pd.concat(parts).groupby(level=0, sort=False).sum()
+        return np.asarray(totals.index, dtype=object), totals.to_numpy(dtype=np.int64)
+
+    def distinct_sketch(self, column: str, precision: int):
+        """各分割檔的相異值 sketch 合併（同一個值出現在多個分割檔只算一次）"""
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+        merged = HyperLogLog(precision)
+        for part in self._map("distinct", _partition_distinct, column, int(precision)):
+            merged.merge(part)
+        return merged
+
+    def iter_blocks(self, columns, block_rows: int):
+        """依序串流讀取各分割檔的多個欄位（共變異數矩陣等需要整列資料的查詢）"""
+        columns = list(columns)
+        for path in self.refresh():
+            for chunk in pd.read_csv(path, usecols=columns, chunksize=block_rows):
+                yield chunk[columns]
+
+    def profile(self):
+        """各分割檔剖析（含 KLL sketch）合併成整份資料集的剖析"""
+        merged = DatasetProfile()
+        for part in self._map("profile", _partition_profile):
+            # 快取中的剖析不能被合併改動，先複製
+            merged.merge(copy.deepcopy(part))
+        return merged
+
+    @property
+    def content_hash(self) -> str:
+        """各分割檔內容雜湊（依 mtime 快取）組合成整份資料集的雜湊"""
+        hashes = self._map("hash", _partition_hash)
+        digest = hashlib.blake2b(digest_size=20)
+        for path, part_hash in zip(self.partitions, hashes):
+            digest.update(os.path.basename(path).encode("utf-8"))
+            digest.update(part_hash.encode("ascii"))
+        return digest.hexdigest()
@@ -0,0 +1,208 @@
+# 執行模式規劃：上傳檔案時先估計資料量與可用記憶體，再決定如何開啟資料集
+#
+#   memory     整份載入：第一次運算時一次解析全部欄位（小檔案，之後每個查詢都不必再讀檔）
+#   projected  欄位投影：每個欄位第一次使用時才解析該欄（LazyDataset 預設行為）
+#   chunked    分塊串流：不快取欄位，每次查詢分塊掃過需要的欄位（彙總下推，記憶體固定）
+#   sampled    區塊抽樣：只讀檔案中隨機挑選的區塊（檔案大到連串流掃描都太慢時）
+#
+# 估計只讀檔案開頭與少數隨機位置的位元組，不論檔案多大都在毫秒等級完成。
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.core.loader import LazyDataset, SampledDataset, StreamingDataset
+
+
+PLAN_MODES = ("memory", "projected", "chunked", "sampled")
+
+MODE_LABELS = {
+    "memory": "整份載入",
+    "projected": "欄位投影",
+    "chunked": "分塊串流",
+    "sampled": "區塊抽樣",
+}
+
+# 資料集最多使用可用記憶體的比例
+MEMORY_BUDGET_FRACTION = 0.5
+
+# 整份載入的上限（估計的 DataFrame 大小）：再大就改成只解析用到的欄位
+FULL_LOAD_MAX_BYTES = 512 * 1024 * 1024
+
+# 欄位投影模式預期同時快取的欄位數
+PROJECTED_COLUMNS = 4
+
+# 串流掃描一次的時間估計（CSV 解析速度）；超過 MAX_SCAN_SECONDS 改用抽樣
+SCAN_BYTES_PER_SECOND = 150e6
+MAX_SCAN_SECONDS = 120
+
+# 估計列數 / 每列大小用的取樣：檔案開頭 HEAD_PROBE_BYTES，另外 PROBE_COUNT 個隨機位置各 PROBE_BYTES
+HEAD_PROBE_BYTES = 256 * 1024
+PROBE_COUNT = 16
+PROBE_BYTES = 64 * 1024
+
+# Excel 壓縮過，解析後大約膨脹的倍數
+XLSX_EXPANSION = 8.0
+
+
+def available_memory():
+    """可用記憶體（bytes）：優先讀 /proc/meminfo 的 MemAvailable，取不到時回傳 None"""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_rows(file_path: str, size: int = None, seed: int = 0) -> int:
+    """
+    以隨機位置的換行密度估計 CSV 列數（不含 header）。
+    檔案小於取樣總量時直接數換行，結果為精確值。
+    """
+    size = os.path.getsize(file_path) if size is None else size
+    with open(file_path, "rb") as fh:
+        if size <= PROBE_COUNT * PROBE_BYTES:
+            data = fh.read()
+            return max(0, data.count(b"\n") - 1 + (1 if data and not data.endswith(b"\n") else 0))
+        offsets = np.random.default_rng(seed).integers(0, size - PROBE_BYTES, PROBE_COUNT)
+        newlines = 0
+        for offset in offsets:
+            fh.seek(int(offset))
+            newlines += fh.read(PROBE_BYTES).count(b"\n")
+    return max(0, int(round(size * newlines / (PROBE_COUNT * PROBE_BYTES))) - 1)
+
+
+def _probe_head(file_path: str):
+    """解析檔案開頭的完整列，回傳 (欄位數, 每 byte 原始資料解析後佔用的記憶體)"""
+    with open(file_path, "rb") as fh:
+        head = fh.read(HEAD_PROBE_BYTES)
+    if len(head) == HEAD_PROBE_BYTES and b"\n" in head:
+        head = head[:head.rfind(b"\n") + 1]
+    frame = pd.read_csv(io.BytesIO(head))
+    ratio = frame.memory_usage(index=False, deep=True).sum() / max(len(head), 1)
+    return len(frame.columns), max(float(ratio), 1.0)
+
+
+def _format_bytes(n) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+class ExecutionPlan:
+    """plan_execution() 的結果：選定的模式、估計值與給使用者看的理由"""
+
+    def __init__(self, mode, reason, file_size, est_rows=None, n_columns=None,
+                 est_bytes=None, available=None, sample_fraction=None, overridden=False):
+        self.mode = mode
+        self.reason = reason
+        self.file_size = file_size
+        self.est_rows = est_rows
+        self.n_columns = n_columns
+        self.est_bytes = est_bytes          # 估計整份載入後的記憶體用量
+        self.available = available          # 可用記憶體（取不到時為 None）
+        self.sample_fraction = sample_fraction
+        self.overridden = overridden        # 使用者手動指定模式
+
+    @property
+    def label(self) -> str:
+        return MODE_LABELS[self.mode]
+
+    def describe(self) -> str:
+        """狀態列顯示的一行說明"""
+        text = f"執行模式：{self.label}"
+        if self.overridden:
+            text += "（手動指定）"
+        return f"{text} — {self.reason}"
+
+    def __repr__(self):
+        return f"<ExecutionPlan {self.mode}: {self.reason}>"
+
+
+def plan_execution(file_path: str, override: str = None, available: int = None) -> ExecutionPlan:
+    """
+    決定 CSV / XLSX 的開啟方式。override 為 PLAN_MODES 之一時直接採用（理由仍附上估計值）。
+    available 可指定可用記憶體（bytes），預設讀取系統資訊。
+    """
+    if override is not None and override not in PLAN_MODES:
+        raise ValueError(f"不支援的執行模式：{override}（可用：{', '.join(PLAN_MODES)}）")
+    size = os.path.getsize(file_path)
+    available = available_memory() if available is None else available
+    budget = available * MEMORY_BUDGET_FRACTION if available is not None else None
+    is_excel = file_path.lower().endswith(".xlsx")
+
+    if is_excel:
+        est_rows, n_columns = None, None
+        est_bytes = int(size * XLSX_EXPANSION)
+    else:
+        n_columns, ratio = _probe_head(file_path)
+        est_rows = estimate_rows(file_path, size)
+        est_bytes = int(size * ratio)
+
+    summary = f"檔案 {_format_bytes(size)}"
+    if est_rows is not None:
+        summary += f"，約 {est_rows:,} 列 × {n_columns} 欄"
+    summary += f"，載入約需 {_format_bytes(est_bytes)}"
+    if available is not None:
+        summary += f"，可用記憶體 {_format_bytes(available)}"
+
+    def make(mode, reason, fraction=None):
+        if mode == "sampled" and fraction is None:
+            fraction = _sample_fraction(size, est_bytes, budget)
+        if mode == "sampled":
+            reason += f"（讀取約 {fraction:.1%}）"
+        return ExecutionPlan(mode, reason, size, est_rows, n_columns, est_bytes, available,
+                             fraction, overridden=override is not None)
+
+    if override is not None:
+        if is_excel and override in ("chunked", "sampled"):
+            raise ValueError("Excel 檔案無法串流或抽樣，請改用整份載入或欄位投影")
+        return make(override, summary)
+
+    if is_excel:
+        # Excel 無法串流：放得下就整份載入，否則只解析用到的欄位
+        if budget is None or est_bytes <= min(budget, FULL_LOAD_MAX_BYTES):
+            return make("memory", f"{summary}；Excel 無法串流，整份解析一次")
+        return make("projected", f"{summary}；Excel 無法串流，只解析用到的欄位")
+
+    if budget is None:
+        return make("projected", f"{summary}；無法取得可用記憶體，只解析用到的欄位")
+    if est_bytes <= min(budget, FULL_LOAD_MAX_BYTES):
+        return make("memory", f"{summary}；檔案小，整份解析一次")
+    if est_bytes / max(n_columns, 1) * min(PROJECTED_COLUMNS, n_columns) <= budget:
+        return make("projected", f"{summary}；只解析用到的欄位")
+    if size / SCAN_BYTES_PER_SECOND <= MAX_SCAN_SECONDS:
+        return make("chunked", f"{summary}；欄位放不進記憶體，每次查詢分塊串流（結果精確）")
+    return make("sampled", f"{summary}；串流掃描一次約需 {size / SCAN_BYTES_PER_SECOND:.0f} 秒，改用區塊抽樣（結果為近似值）")
+
+
+def _sample_fraction(size, est_bytes, budget) -> float:
+    """抽樣比例：樣本需放得進記憶體預算，讀取時間也不超過 MAX_SCAN_SECONDS"""
+    limit = SCAN_BYTES_PER_SECOND * MAX_SCAN_SECONDS / max(size, 1)
+    if budget is not None:
+        limit = min(limit, budget / max(est_bytes, 1))
+    return float(min(1.0, max(limit, 1e-4)))
+
+
+def open_dataset(file_path: str, plan: ExecutionPlan, backend: str = None):
+    """
+    依 plan 開啟資料集（只讀 header 與預覽，資料在運算時才讀取）。
+    backend 為 CSV 的執行後端（None 為目前的全域後端）；抽樣模式只解析樣本位元組，固定使用 pandas。
+    """
+    if plan.mode == "memory":
+        return LazyDataset(file_path, eager=True, backend=backend)
+    if plan.mode == "chunked":
+        return StreamingDataset(file_path, backend=backend)
+    if plan.mode == "sampled":
+        return SampledDataset(file_path, plan.sample_fraction)
+    return LazyDataset(file_path, backend=backend)
@@ -0,0 +1,225 @@
+# 載入時的欄位剖析：數值比例、空值數量、可合併的 KLL 分位數 sketch
+# 給 GUI 篩選數值欄位、估計截斷比例、建議資料邊界用
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# 非空值中至少這個比例可以轉成數值，才當作「數值欄位」
+NUMERIC_RATIO_THRESHOLD = 0.95
+
+# 分塊剖析時每次讀取的筆數
+PROFILE_CHUNK_ROWS = 200_000
+
+
+class KLLSketch:
+    """
+    KLL 分位數 sketch（Karnin, Lang, Liberty 2016）。
+
+    - 記憶體約 O(k)，與資料量無關
+    - update() 一次吃進一整個 numpy 陣列（分塊 / 串流都適用）
+    - merge() 可以合併其他 chunk 或分割檔的 sketch
+    - 第 h 層的每個元素代表 2^h 筆原始資料
+    """
+
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed=None):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        while self._size() > self._max_size():
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append(np.empty(0, dtype=np.float64))
+                    items = np.sort(self.levels[h])
+                    # 奇數個時保留一個在原層，其餘隨機取奇數位或偶數位晉升
+                    keep = items[:1] if len(items) % 2 else items[:0]
+                    items = items[len(keep):]
+                    offset = int(self._rng.integers(2))
+                    self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[offset::2]])
+                    self.levels[h] = keep
+                    break
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.n += int(values.size)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level), 2 ** h, dtype=np.float64) for h, level in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def quantiles(self, qs):
+        """回傳各分位數 q (0~1) 的估計值"""
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        items, weights = self._weighted_items()
+        cum = np.cumsum(weights) / weights.sum()
+        idx = np.searchsorted(cum, np.asarray(qs, dtype=np.float64), side="left")
+        out = items[np.minimum(idx, len(items) - 1)]
+        # 最小 / 最大值是精確的
+        out = np.where(np.asarray(qs) <= 0, self.min, out)
+        return np.where(np.asarray(qs) >= 1, self.max, out)
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def rank_fraction(self, x: float, inclusive: bool = False) -> float:
+        """估計 < x（inclusive=True 時為 <= x）的資料比例"""
+        if self.n == 0:
+            return 0.0
+        items, weights = self._weighted_items()
+        side = "right" if inclusive else "left"
+        pos = np.searchsorted(items, x, side=side)
+        return float(weights[:pos].sum() / weights.sum())
+
+
+class ColumnProfile:
+    """單一欄位的剖析結果（可分塊累加、可合併）"""
+
+    def __init__(self, name, k: int = 200):
+        self.name = name
+        self.rows = 0            # 總筆數
+        self.null_count = 0      # 原本就是空值的筆數
+        self.numeric_count = 0   # 可轉成數值的筆數
+        self.sketch = KLLSketch(k=k)
+
+    @property
+    def non_null(self) -> int:
+        return self.rows - self.null_count
+
+    @property
+    def numeric_ratio(self) -> float:
+        return self.numeric_count / self.non_null if self.non_null else 0.0
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.numeric_count > 0 and self.numeric_ratio >= NUMERIC_RATIO_THRESHOLD
+
+    def update(self, series: pd.Series):
+        values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        self.rows += len(series)
+        self.null_count += int(series.isna().sum())
+        numeric = values[~np.isnan(values)]
+        self.numeric_count += int(numeric.size)
+        self.sketch.update(numeric)
+
+    def merge(self, other: "ColumnProfile"):
+        self.rows += other.rows
+        self.null_count += other.null_count
+        self.numeric_count += other.numeric_count
+        self.sketch.merge(other.sketch)
+        return self
+
+    def clip_fraction(self, lower: float, upper: float) -> float:
+        """用 sketch 估計邊界 [lower, upper] 會截斷多少比例的數值資料"""
+        below = self.sketch.rank_fraction(lower, inclusive=False)
+        above = 1.0 - self.sketch.rank_fraction(upper, inclusive=True)
+        return below + above
+
+    def suggest_bounds(self, lower_q: float = 0.01, upper_q: float = 0.99):
+        """
+        由 sketch 分位數建議邊界（立即可得，但「不是」差分隱私的結果，
+        建議值本身會透露資料分佈；需要隱私保證時請用 suggest_bounds_dp）。
+        """
+        lo, hi = self.sketch.quantiles([lower_q, upper_q])
+        return float(lo), float(hi)
+
+
+class DatasetProfile:
+    """整份資料集的剖析：{欄位名稱: ColumnProfile}"""
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.columns = {}
+
+    def update(self, chunk: pd.DataFrame):
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col, k=self.k)
+            self.columns[col].update(chunk[col])
+        return self
+
+    def merge(self, other: "DatasetProfile"):
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+        return self
+
+    def numeric_columns(self):
+        return [col for col, p in self.columns.items() if p.is_numeric]
+
+    def __getitem__(self, column) -> ColumnProfile:
+        return self.columns[column]
+
+    def __contains__(self, column) -> bool:
+        return column in self.columns
+
+
+def profile_chunks(chunks, k: int = 200) -> DatasetProfile:
+    """對一連串 DataFrame chunk 做剖析（串流模式）"""
+    profile = DatasetProfile(k=k)
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
+def profile_file(file_path: str, chunksize: int = PROFILE_CHUNK_ROWS, k: int = 200) -> DatasetProfile:
+    """單次分塊掃描 CSV / XLSX 檔案做剖析，記憶體只需一個 chunk"""
+    if file_path.lower().endswith(".xlsx"):
+        return profile_chunks([pd.read_excel(file_path)], k=k)
+    return profile_chunks(pd.read_csv(file_path, chunksize=chunksize), k=k)
+
+
+def suggest_bounds_dp(series: pd.Series, domain, epsilon: float = 0.1,
+                      lower_q: float = 0.01, upper_q: float = 0.99):
+    """
+    差分隱私版本的邊界建議：在公開的粗略範圍 domain 內，
+    以指數機制 (diffprivlib.tools.quantile) 估計兩個分位數，共花費 epsilon。
+    """
+    import diffprivlib.tools as dpt
+
+    values = pd.to_numeric(series, errors="coerce").dropna().to_numpy()
+    lo, hi = dpt.quantile(values, [lower_q, upper_q], epsilon=epsilon, bounds=tuple(domain))
+    return float(lo), float(hi)
@@ -0,0 +1,229 @@
+# 雜訊用的亂數來源
+#
+# - secure（預設）：密碼學安全亂數。背景 thread 持續以 os.urandom 讀取大區塊放進佇列，
+#   取用時整批轉成均勻亂數，再以反函數 / Box-Muller 向量化轉成 Laplace / Gaussian / Gumbel / 幾何分布。
+#   避免逐值呼叫 secrets / os.urandom 的系統呼叫開銷，千萬筆匯出也只需數百次 os.urandom。
+# - fast：numpy PCG64，可指定 seed，給測試與效能量測重現結果用（不適合正式發布）
+#
+# 各模組未指定 rng 時都經由 noise_rng() 取得目前模式的亂數來源；
+# SecureRandom 提供本專案用到的 numpy Generator 介面子集，可直接傳給既有的 rng 參數。
+
+import math
+import os
+import queue
+import threading
+import weakref
+
+import numpy as np
+
+
+RNG_MODES = ("secure", "fast")
+
+# 每次 os.urandom 讀取的大小，以及背景預先讀好的區塊數
+URANDOM_BLOCK_BYTES = 8 * 1024 * 1024
+URANDOM_PREFETCH_BLOCKS = 4
+
+_TWO_POW_53 = float(1 << 53)
+
+
+_buffers = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for buffer in list(_buffers):
+        buffer._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class _UrandomBuffer:
+    """
+    os.urandom 區塊的預讀佇列 + 目前取用中的區塊（皆為 uint64 陣列）。
+    背景 thread 在第一次取用時才啟動；fork 後的子程序會丟棄繼承來的區塊重新讀取，
+    避免多個 worker process 用到相同的亂數。
+    """
+
+    def __init__(self, block_bytes: int = URANDOM_BLOCK_BYTES, prefetch: int = URANDOM_PREFETCH_BLOCKS):
+        self.block_bytes = int(block_bytes) // 8 * 8
+        self.prefetch = int(prefetch)
+        self._reset()
+        _buffers.add(self)
+
+    def _reset(self):
+        # fork 時鎖可能正被其他 thread 持有，子程序一律換新的鎖
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self.prefetch)
+        self._current = np.empty(0, dtype=np.uint64)
+        self._pos = 0
+        self._thread = None
+
+    def _read_block(self):
+        return np.frombuffer(os.urandom(self.block_bytes), dtype=np.uint64)
+
+    def _refill(self, blocks):
+        while True:
+            blocks.put(self._read_block())
+
+    def _next_block(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill, args=(self._queue,), daemon=True)
+            self._thread.start()
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            # 背景還沒讀好：直接在呼叫端讀，不等待
+            return self._read_block()
+
+    def take(self, n: int) -> np.ndarray:
+        """取出 n 個 64-bit 亂數（thread-safe）"""
+        out = np.empty(n, dtype=np.uint64)
+        filled = 0
+        with self._lock:
+            while filled < n:
+                if self._pos >= self._current.size:
+                    self._current = self._next_block()
+                    self._pos = 0
+                take = min(n - filled, self._current.size - self._pos)
+                out[filled:filled + take] = self._current[self._pos:self._pos + take]
+                self._pos += take
+                filled += take
+        return out
+
+
+def _shape_of(size):
+    if size is None:
+        return ()
+    if np.isscalar(size):
+        return (int(size),)
+    return tuple(int(s) for s in size)
+
+
+def _finish(values, size):
+    """size 為 None 時回傳純量，否則回傳指定形狀的陣列"""
+    if size is None:
+        return values.reshape(()).item() if values.size == 1 else values
+    return values.reshape(_shape_of(size))
+
+
+class SecureRandom:
+    """
+    密碼學安全的雜訊亂數來源，介面與 numpy.random.Generator 相同（僅本專案用到的方法）：
+    random / integers / laplace / normal / gumbel / exponential / geometric / standard_normal
+    """
+
+    def __init__(self, block_bytes: int = URANDOM_BLOCK_BYTES, prefetch: int = URANDOM_PREFETCH_BLOCKS):
+        self._buffer = _UrandomBuffer(block_bytes, prefetch)
+
+    def _open_uniform(self, n: int) -> np.ndarray:
+        """(0, 1) 開區間的均勻亂數：53 bits 取中點，不會出現 0 或 1（log 類轉換不需特別處理）"""
+        words = self._buffer.take(n)
+        return ((words >> np.uint64(11)).astype(np.float64) + 0.5) / _TWO_POW_53
+
+    def random(self, size=None, dtype=np.float64, out=None):
+        """[0, 1) 均勻亂數"""
+        n = math.prod(_shape_of(size))
+        words = self._buffer.take(n)
+        if np.dtype(dtype) == np.float32:
+            values = (words >> np.uint64(40)).astype(np.float32) / np.float32(1 << 24)
+        else:
+            values = (words >> np.uint64(11)).astype(np.float64) / _TWO_POW_53
+        values = _finish(values, size)
+        if out is not None:
+            out[...] = values
+            return out
+        return values
+
+    def integers(self, low, high=None, size=None, dtype=np.int64, endpoint=False):
+        """[low, high) 的均勻整數；範圍不超過 2^53 時以乘法取整，偏差小於 2^-53"""
+        if high is None:
+            low, high = 0, low
+        span = int(high) - int(low) + (1 if endpoint else 0)
+        if span <= 0:
+            raise ValueError("high 需大於 low")
+        n = math.prod(_shape_of(size))
+        words = self._buffer.take(n)
+        if span <= 1 << 53:
+            offsets = ((words >> np.uint64(11)).astype(np.float64) * (span / _TWO_POW_53)).astype(np.int64)
+        else:
+            offsets = (words % np.uint64(span)).astype(np.int64)
+        return _finish((int(low) + offsets).astype(dtype), size)
+
+    def laplace(self, loc=0.0, scale=1.0, size=None):
+        u = self._open_uniform(math.prod(_shape_of(size))) - 0.5
+        values = loc - scale * np.sign(u) * np.log1p(-2.0 * np.abs(u))
+        return _finish(values, size)
+
+    def exponential(self, scale=1.0, size=None):
+        return _finish(-scale * np.log(self._open_uniform(math.prod(_shape_of(size)))), size)
+
+    def gumbel(self, loc=0.0, scale=1.0, size=None):
+        u = self._open_uniform(math.prod(_shape_of(size)))
+        return _finish(loc - scale * np.log(-np.log(u)), size)
+
+    def standard_normal(self, size=None, dtype=np.float64):
+        """Box-Muller：每對均勻亂數產生兩個常態亂數"""
+        n = math.prod(_shape_of(size))
+        half = (n + 1) // 2
+        u = self._open_uniform(2 * half)
+        radius = np.sqrt(-2.0 * np.log(u[:half]))
+        angle = 2.0 * math.pi * u[half:]
+        values = np.concatenate([radius * np.cos(angle), radius * np.sin(angle)])[:n]
+        return _finish(values.astype(dtype, copy=False), size)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        return loc + scale * self.standard_normal(size)
+
+    def geometric(self, p, size=None):
+        """成功機率 p 的幾何分布（值域 1, 2, ...，與 numpy 相同）"""
+        u = self._open_uniform(math.prod(_shape_of(size)))
+        if p >= 1:
+            return _finish(np.ones(u.size, dtype=np.int64), size)
+        values = np.floor(np.log(u) / math.log1p(-p)).astype(np.int64) + 1
+        return _finish(values, size)
+
+
+# =====================================================
+# 全域模式（GUI / 服務設定一次，各模組的預設 rng 跟著切換）
+# =====================================================
+
+_mode = "secure"
+_seed = None
+_rng = None
+_mode_lock = threading.Lock()
+
+
+def make_rng(mode: str = "secure", seed=None):
+    """建立指定模式的亂數來源：secure → SecureRandom，fast → numpy Generator（可指定 seed）"""
+    if mode not in RNG_MODES:
+        raise ValueError(f"不支援的亂數模式：{mode}（可用：{', '.join(RNG_MODES)}）")
+    if mode == "fast":
+        return np.random.default_rng(seed)
+    return SecureRandom()
+
+
+def set_rng_mode(mode: str, seed=None):
+    """切換全域雜訊亂數模式；seed 只在 fast 模式有效"""
+    global _mode, _seed, _rng
+    rng = make_rng(mode, seed)
+    with _mode_lock:
+        _mode, _seed, _rng = mode, (seed if mode == "fast" else None), rng
+
+
+def rng_mode() -> str:
+    return _mode
+
+
+def rng_seed():
+    """fast 模式指定的 seed（secure 模式為 None）"""
+    return _seed
+
+
+def noise_rng():
+    """目前模式的共用亂數來源（各模組未指定 rng 時使用）"""
+    global _rng
+    with _mode_lock:
+        if _rng is None:
+            _rng = make_rng(_mode, _seed)
+        return _rng
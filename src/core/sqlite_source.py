@@ -0,0 +1,194 @@
+# SQLite 資料來源：clip 與彙總直接下推到 SQL，資料不會整份載入記憶體
+
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.core.hll import HyperLogLog
+from src.core.ledger import file_content_hash
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+# 只把 SQLite 儲存型別為整數 / 浮點數的值當作有效數值
+# （對應 pandas 版本中 pd.to_numeric(errors="coerce").dropna() 的效果）
+_NUMERIC_FILTER = "typeof({col}) IN ('integer', 'real')"
+
+# 相異值 sketch 每次 fetchmany 的列數
+SKETCH_BLOCK_ROWS = 262_144
+
+
+def is_sqlite_file(file_path: str) -> bool:
+    return file_path.lower().endswith(SQLITE_EXTENSIONS)
+
+
+def _quote_identifier(name: str) -> str:
+    """SQLite 識別字加上雙引號（表名、欄名不能用參數綁定）"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class SQLiteSource:
+    """
+    以唯讀模式開啟 SQLite 檔案。
+    - 預覽：LIMIT / OFFSET 分頁
+    - 差分隱私運算：compute_stats() 只取回 n / clip 後總和 / 直方圖 counts
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.table = None
+        self._hash = None
+        self._hash_signature = None
+
+        tables = self.list_tables()
+        if not tables:
+            raise ValueError("資料庫內沒有任何資料表")
+        self.set_table(tables[0])
+
+    def _connect(self):
+        uri = Path(self.file_path).resolve().as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True)
+
+    # ============
+    # 結構資訊
+    # ============
+
+    def list_tables(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' "
+                "ORDER BY name"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def list_columns(self, table: str):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"PRAGMA table_info({_quote_identifier(table)})").fetchall()
+        return [r[1] for r in rows]
+
+    def set_table(self, table: str):
+        if table not in self.list_tables():
+            raise ValueError(f"找不到資料表：{table}")
+        self.table = table
+        self.columns = self.list_columns(table)
+
+    @property
+    def content_hash(self) -> str:
+        """資料庫檔案內容雜湊 + 資料表名稱（給發布紀錄使用）"""
+        stat = os.stat(self.file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._hash_signature != signature:
+            self._hash = file_content_hash(self.file_path)
+            self._hash_signature = signature
+        return f"{self._hash}:{self.table}"
+
+    def row_count(self) -> int:
+        with closing(self._connect()) as conn:
+            (count,) = conn.execute(
+                f"SELECT COUNT(*) FROM {_quote_identifier(self.table)}"
+            ).fetchone()
+        return int(count)
+
+    # ============
+    # 預覽分頁
+    # ============
+
+    def preview(self, limit: int = 15, offset: int = 0) -> pd.DataFrame:
+        """只讀取一頁資料給表格預覽用"""
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(
+                f"SELECT * FROM {_quote_identifier(self.table)} LIMIT ? OFFSET ?",
+                conn,
+                params=(int(limit), int(offset))
+            )
+
+    # ============
+    # 彙總下推
+    # ============
+
+    def category_counts(self, column: str):
+        """以 GROUP BY 在 SQLite 內算出每個類別的次數（空值不計），回傳 (categories, counts)"""
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+        col = _quote_identifier(column)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT {col}, COUNT(*) FROM {_quote_identifier(self.table)} "
+                f"WHERE {col} IS NOT NULL GROUP BY {col}"
+            ).fetchall()
+        if not rows:
+            return np.array([], dtype=object), np.zeros(0, dtype=np.int64)
+        categories, counts = zip(*rows)
+        return np.array(categories, dtype=object), np.array(counts, dtype=np.int64)
+
+    def distinct_sketch(self, column: str, precision: int):
+        """分塊取回非空值更新 HyperLogLog sketch（相異值個數），記憶體只需一個區塊"""
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+        col = _quote_identifier(column)
+        sketch = HyperLogLog(precision)
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(f"SELECT {col} FROM {_quote_identifier(self.table)} WHERE {col} IS NOT NULL")
+            while True:
+                rows = cursor.fetchmany(SKETCH_BLOCK_ROWS)
+                if not rows:
+                    break
+                sketch.update(pd.Series([r[0] for r in rows]))
+        return sketch
+
+    def iter_blocks(self, columns, block_rows: int):
+        """以 fetchmany 分塊取回多個欄位的整列資料（共變異數矩陣等多欄位查詢使用）"""
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            raise ValueError(f"找不到欄位：{', '.join(map(str, missing))}")
+        select = ", ".join(_quote_identifier(c) for c in columns)
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(f"SELECT {select} FROM {_quote_identifier(self.table)}")
+            while True:
+                rows = cursor.fetchmany(block_rows)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=list(columns))
+
+    def compute_stats(self, column: str, bounds, query_key: str, bins: int):
+        """
+        在 SQLite 內完成 clip 與彙總，回傳 engine.release_from_stats 需要的充分統計量。
+        """
+        if column not in self.columns:
+            raise ValueError(f"找不到欄位：{column}")
+
+        lo, hi = float(bounds[0]), float(bounds[1])
+        table = _quote_identifier(self.table)
+        col = _quote_identifier(column)
+        where = _NUMERIC_FILTER.format(col=col)
+        clipped = f"MIN(MAX({col}, ?), ?)"
+
+        with closing(self._connect()) as conn:
+            n, total = conn.execute(
+                f"SELECT COUNT({col}), SUM({clipped}) FROM {table} WHERE {where}",
+                (lo, hi)
+            ).fetchone()
+
+            stats = {"n": int(n or 0), "sum": float(total or 0.0)}
+
+            if query_key == "histogram":
+                # 與 np.histogram 相同：左閉右開，最後一個 bin 包含右端點
+                width = (hi - lo) / bins
+                rows = conn.execute(
+                    f"SELECT MIN(CAST(({clipped} - ?) / ? AS INTEGER), ?) AS bucket, COUNT(*) "
+                    f"FROM {table} WHERE {where} GROUP BY bucket",
+                    (lo, hi, lo, width, bins - 1)
+                ).fetchall()
+
+                hist = np.zeros(bins, dtype=np.int64)
+                for bucket, count in rows:
+                    hist[int(bucket)] += int(count)
+                stats["hist"] = hist
+                stats["bin_edges"] = np.linspace(lo, hi, bins + 1)
+
+        return stats
@@ -0,0 +1,382 @@
+# 以雜訊邊際分布產生差分隱私合成資料（MST 風格的樹狀圖模型，McKenna et al., 2021）
+#
+# 1. 離散化：數值欄位依邊界切成等寬區間，類別欄位依類別清單編碼（清單外的值歸入「其他」，空值另成一類）。
+#    類別清單取自公開清單；沒有公開清單的類別欄位先以雜訊次數門檻選出類別（與 top-k 相同的作法）
+# 2. 量測：一次發布所有 1-way 邊際；以 exponential mechanism 挑出最大生成樹的邊，
+#    再發布這些邊的 2-way 邊際。ε（與 δ）平均分給三個步驟（需要選類別時再加上選類別一步）
+# 3. 後處理：合併各量測得到一致的 1-way 邊際，2-way 以 IPF 對齊兩側的 1-way
+# 4. 取樣：依樹的順序，根節點取 1-way、子節點取「給定父節點」的條件分布，
+#    每個欄位都是整批向量化取樣（searchsorted），百萬列只需數秒
+#
+# 合成資料之後可以任意查詢，不再花費隱私預算，也不必再讀原始資料。
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.core.noise import noise_scale, sample_integer_noise
+from src.core.rng import noise_rng
+from src.core.topk import category_counts, selection_threshold
+
+
+# 數值欄位切成的區間數
+SYNTH_NUMERIC_BINS = 32
+
+# 類別欄位最多保留的類別數（其餘合併成 SYNTH_OTHER_LABEL）
+SYNTH_MAX_CATEGORIES = 100
+
+SYNTH_OTHER_LABEL = "(其他)"
+
+# 2-way 邊際 IPF 的迭代次數
+IPF_ITERATIONS = 20
+
+# 取樣 / 寫出時每次處理的列數
+SYNTH_CHUNK_ROWS = 1_000_000
+
+
+# =====================================================
+# 離散化
+# =====================================================
+
+def encode_column(values, bounds=None, bins: int = SYNTH_NUMERIC_BINS, labels=None):
+    """
+    單一欄位轉成整數 code，回傳 (codes, domain)。
+    - bounds 有指定：數值欄位，domain = {"kind": "numeric", "bounds", "bins"}
+      （bounds 需為公開的邊界；domain 會隨模型一起發布，只包含公開設定，不含任何取自資料的資訊）
+    - 否則：類別欄位，labels 為公開（或已以門檻選出）的類別清單，
+      domain = {"kind": "categorical", "labels": labels + [SYNTH_OTHER_LABEL]}，清單外的值編成「其他」
+    空值一律編成最後一個 code（取樣時還原為空值）。
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if bounds is not None:
+        lo, hi = float(bounds[0]), float(bounds[1])
+        numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(numeric)
+        scaled = (np.clip(np.nan_to_num(numeric, nan=lo), lo, hi) - lo) / (hi - lo) * bins
+        codes = np.minimum(scaled.astype(np.int64), bins - 1)
+        codes[missing] = bins
+        return codes, {"kind": "numeric", "bounds": (lo, hi), "bins": bins}
+
+    if labels is None:
+        raise ValueError("類別欄位需要類別清單")
+    labels = [str(label) for label in labels]
+    missing = values.isna().to_numpy()
+    codes = pd.Index(labels).get_indexer(values.astype(str)).astype(np.int64)
+    codes[codes < 0] = len(labels)
+    codes[missing] = len(labels) + 1
+    return codes, {"kind": "categorical", "labels": labels + [SYNTH_OTHER_LABEL]}
+
+
+def select_labels(values, mech_key: str, scale: float, threshold: float, rng,
+                  max_labels: int = SYNTH_MAX_CATEGORIES - 1):
+    """
+    沒有公開類別清單的類別欄位：所有出現過的類別（以字串比對）加上整數雜訊，
+    只保留雜訊次數達門檻的類別，依雜訊次數由大到小最多 max_labels 個。
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    values = values[values.notna()].astype(str)
+    categories, counts = category_counts(values)
+    noisy = counts + sample_integer_noise(mech_key, scale, counts.size, rng)
+    passed = np.flatnonzero(noisy >= threshold)
+    keep = passed[np.argsort(-noisy[passed], kind="stable")[:max_labels]]
+    return [str(label) for label in np.asarray(categories, dtype=object)[keep]]
+
+
+def domain_size(domain) -> int:
+    """含空值類別的 code 數"""
+    if domain["kind"] == "numeric":
+        return domain["bins"] + 1
+    return len(domain["labels"]) + 1
+
+
+# =====================================================
+# 量測 + 挑選
+# =====================================================
+
+def _pair_counts(a, b, size_b, size):
+    return np.bincount(a.astype(np.int64) * size_b + b, minlength=size).astype(np.float64)
+
+
+def _noisy(counts, mech_key, scale, rng):
+    """對 counts 加上整數雜訊（離散 Laplace / 離散 Gaussian），回傳 float 陣列"""
+    counts = np.asarray(counts)
+    noise = sample_integer_noise(mech_key, scale, counts.size, rng).reshape(counts.shape)
+    return counts.astype(np.float64) + noise
+
+
+def select_tree(codes, sizes, one_way, epsilon: float, rng):
+    """
+    以 exponential mechanism 逐一挑出最大生成樹的邊（Kruskal 順序，只考慮連接不同子樹的邊）。
+    每條候選邊 (i, j) 的分數為真實 2-way 與「雜訊 1-way 乘積」的 L1 距離，
+    多或少一列時分數最多變動 1；每一輪以 Gumbel 雜訊實作，尺度 2 / ε_round。
+    """
+    d = len(sizes)
+    if d < 2:
+        return []
+    n_total = max(float(one_way[0].sum()), 1.0)
+    probs = [np.maximum(m, 0.0) / max(m.clip(min=0).sum(), 1.0) for m in one_way]
+
+    pairs = [(i, j) for i in range(d) for j in range(i + 1, d)]
+    scores = np.empty(len(pairs))
+    for p, (i, j) in enumerate(pairs):
+        actual = _pair_counts(codes[:, i], codes[:, j], sizes[j], sizes[i] * sizes[j])
+        expected = n_total * np.outer(probs[i], probs[j]).ravel()
+        scores[p] = np.abs(actual - expected).sum()
+
+    eps_round = epsilon / (d - 1)
+    component = list(range(d))
+
+    def find(x):
+        while component[x] != x:
+            component[x] = component[component[x]]
+            x = component[x]
+        return x
+
+    pairs = np.asarray(pairs)
+    edges = []
+    for _ in range(d - 1):
+        roots_i = np.array([find(i) for i in pairs[:, 0]])
+        roots_j = np.array([find(j) for j in pairs[:, 1]])
+        candidates = np.flatnonzero(roots_i != roots_j)
+        noisy = scores[candidates] + rng.gumbel(0.0, 2.0 / eps_round, candidates.size)
+        i, j = pairs[candidates[int(np.argmax(noisy))]]
+        edges.append((int(i), int(j)))
+        component[find(i)] = find(j)
+    return edges
+
+
+# =====================================================
+# 後處理
+# =====================================================
+
+def _project_counts(counts, total):
+    """負值截成 0 後等比例縮放到 total（全為 0 時改為均勻分布）"""
+    counts = np.maximum(counts, 0.0)
+    s = counts.sum()
+    if s <= 0:
+        return np.full(counts.shape, total / counts.size)
+    return counts * (total / s)
+
+
+def make_consistent(one_way, two_way, edges, sizes, one_scale=1.0, two_scale=1.0):
+    """
+    一致性後處理（one_scale / two_scale 為 1-way / 2-way 每格雜訊的尺度）：
+    - 每個欄位的 1-way = 自己的雜訊 1-way 與各 2-way 在該軸的加總，依變異數倒數加權平均
+    - 總列數取各 1-way 加總的平均，1-way 投影成非負且加總為總列數
+    - 每個 2-way 以 IPF 調整成兩側加總等於對應的 1-way
+    """
+    d = len(sizes)
+    # (估計值, 每格變異數)：2-way 在某軸的加總是另一軸 size 格雜訊相加
+    estimates = [[(m, one_scale ** 2)] for m in one_way]
+    for (i, j), table in zip(edges, two_way):
+        estimates[i].append((table.sum(axis=1), sizes[j] * two_scale ** 2))
+        estimates[j].append((table.sum(axis=0), sizes[i] * two_scale ** 2))
+
+    merged = []
+    for k in range(d):
+        weights = np.array([1.0 / max(var, 1e-12) for _, var in estimates[k]])
+        merged.append(sum(w * est for w, (est, _) in zip(weights, estimates[k])) / weights.sum())
+    total = max(float(np.mean([m.sum() for m in merged])), 1.0)
+    merged = [_project_counts(m, total) for m in merged]
+
+    tables = []
+    for (i, j), table in zip(edges, two_way):
+        t = np.maximum(table, 0.0) + 1e-9
+        for _ in range(IPF_ITERATIONS):
+            t *= (merged[i] / np.maximum(t.sum(axis=1), 1e-12))[:, None]
+            t *= (merged[j] / np.maximum(t.sum(axis=0), 1e-12))[None, :]
+        tables.append(t)
+    return merged, tables, total
+
+
+# =====================================================
+# 模型
+# =====================================================
+
+class SyntheticModel:
+    """
+    樹狀圖模型：order 為取樣順序，parents[k] 為欄位 k 的父欄位（根為 -1）。
+    root 的分布來自 1-way，其餘欄位為 P(欄位 | 父欄位) 的條件分布表。
+    """
+
+    def __init__(self, columns, domains, marginals, edges, tables, n_rows):
+        self.columns = list(columns)
+        self.domains = list(domains)
+        self.marginals = [np.asarray(m, dtype=np.float64) for m in marginals]
+        self.edges = [tuple(int(x) for x in e) for e in edges]
+        self.tables = [np.asarray(t, dtype=np.float64) for t in tables]
+        self.n_rows = float(n_rows)
+        self._build()
+
+    def _build(self):
+        d = len(self.columns)
+        neighbours = [[] for _ in range(d)]
+        for (i, j), table in zip(self.edges, self.tables):
+            neighbours[i].append((j, table))       # table[i 的 code, j 的 code]
+            neighbours[j].append((i, table.T))
+
+        self.order = []
+        self.parents = [-1] * d
+        self._cdfs = [None] * d
+        seen = [False] * d
+        for root in range(d):
+            if seen[root]:
+                continue
+            seen[root] = True
+            self.order.append(root)
+            self._cdfs[root] = np.cumsum(self.marginals[root] / self.marginals[root].sum())
+            queue = [root]
+            while queue:
+                node = queue.pop(0)
+                for child, table in neighbours[node]:
+                    if seen[child]:
+                        continue
+                    seen[child] = True
+                    self.parents[child] = node
+                    self.order.append(child)
+                    # 每一列都是給定父節點 code 的條件分布；列總和為 0 時改用子欄位的 1-way
+                    rows = table.sum(axis=1, keepdims=True)
+                    fallback = self.marginals[child] / self.marginals[child].sum()
+                    cond = np.where(rows > 0, table / np.where(rows > 0, rows, 1.0), fallback)
+                    self._cdfs[child] = np.cumsum(cond, axis=1)
+                    queue.append(child)
+
+    def sample_codes(self, n: int, rng=None) -> np.ndarray:
+        """向量化取樣 n 列的 code（n × 欄位數）"""
+        rng = rng if rng is not None else noise_rng()
+        out = np.empty((n, len(self.columns)), dtype=np.int64)
+        u = rng.random((n, len(self.columns)))
+        for k in self.order:
+            cdf = self._cdfs[k]
+            if self.parents[k] < 0:
+                out[:, k] = np.minimum(np.searchsorted(cdf, u[:, k] * cdf[-1], side="right"), cdf.size - 1)
+                continue
+            # 條件分布逐列的 CDF 串接成一個遞增陣列：第 p 列平移 p，一次 searchsorted 完成
+            size = cdf.shape[1]
+            parent = out[:, self.parents[k]]
+            flat = (cdf / cdf[:, -1:] + np.arange(cdf.shape[0])[:, None]).ravel()
+            pos = np.searchsorted(flat, parent + u[:, k], side="right")
+            out[:, k] = np.minimum(pos - parent * size, size - 1)
+        return out
+
+    def decode(self, codes, rng=None) -> pd.DataFrame:
+        """code 還原成資料：數值欄位在區間內均勻取值，空值 code 還原為空值"""
+        rng = rng if rng is not None else noise_rng()
+        data = {}
+        for k, (column, domain) in enumerate(zip(self.columns, self.domains)):
+            c = codes[:, k]
+            if domain["kind"] == "numeric":
+                lo, hi = domain["bounds"]
+                width = (hi - lo) / domain["bins"]
+                values = lo + (c + rng.random(c.size)) * width
+                values[c >= domain["bins"]] = np.nan
+                data[column] = values
+            else:
+                labels = np.append(np.asarray(domain["labels"], dtype=object), None)
+                data[column] = labels[c]
+        return pd.DataFrame(data)
+
+    def sample(self, n: int, rng=None) -> pd.DataFrame:
+        rng = rng if rng is not None else noise_rng()
+        return self.decode(self.sample_codes(n, rng), rng)
+
+    def to_csv(self, path: str, n_rows: int, chunk_rows: int = SYNTH_CHUNK_ROWS, rng=None, progress=None) -> int:
+        """分塊產生並寫出 n_rows 列合成資料（記憶體只與 chunk_rows 有關），回傳寫出的列數"""
+        rng = rng if rng is not None else noise_rng()
+        written = 0
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            while written < n_rows:
+                size = min(chunk_rows, n_rows - written)
+                self.sample(size, rng).to_csv(fh, index=False, header=written == 0)
+                written += size
+                if progress is not None:
+                    progress(written / n_rows)
+        return written
+
+    # ============
+    # 序列化（放進結果 payload / 發布紀錄）
+    # ============
+
+    def to_payload(self) -> dict:
+        return {
+            "synth_columns": [str(c) for c in self.columns],
+            "synth_domains": self.domains,
+            "synth_marginals": self.marginals,
+            "synth_edges": [list(e) for e in self.edges],
+            "synth_tables": self.tables,
+            "synth_rows": self.n_rows,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict):
+        domains = []
+        for domain in payload["synth_domains"]:
+            domain = dict(domain)
+            if domain["kind"] == "numeric":
+                domain["bounds"] = tuple(domain["bounds"])
+            domains.append(domain)
+        return cls(payload["synth_columns"], domains, payload["synth_marginals"], payload["synth_edges"],
+                   payload["synth_tables"], payload["synth_rows"])
+
+
+def fit_synthesizer(df, columns, bounds_by_column, epsilon: float, mech_key: str = "laplace",
+                    delta: float = 1e-5, rng=None, domains_by_column=None) -> SyntheticModel:
+    """
+    由資料 df 的 columns 建立差分隱私合成資料模型。
+    bounds_by_column: {欄位: (min, max)}，有公開邊界的欄位當作數值欄位，其餘當作類別欄位。
+    domains_by_column: {欄位: [公開類別, ...]}；沒有公開清單的類別欄位先以雜訊次數門檻選出類別，
+    這一步另外分到一份 ε / δ（需要 0 < δ < 1）。
+    每列對每個 1-way / 2-way 邊際各貢獻 1：d 個 1-way 的 L1 敏感度為 d、L2 為 √d（2-way 同理）。
+    """
+    rng = rng if rng is not None else noise_rng()
+    columns = list(columns)
+    if not columns:
+        raise ValueError("請至少選擇一個欄位")
+    domains_by_column = domains_by_column or {}
+    d = len(columns)
+    unknown = [c for c in columns if bounds_by_column.get(c) is None and not domains_by_column.get(c)]
+
+    n_steps = (3 if d > 1 else 1) + (1 if unknown else 0)
+    eps_part = epsilon / n_steps
+    delta_part = delta / n_steps
+
+    def scale_for(m, step_delta=None):
+        sensitivity = math.sqrt(m) if mech_key == "gaussian" else float(m)
+        return noise_scale(mech_key, eps_part, delta_part if step_delta is None else step_delta, sensitivity)
+
+    labels_by_column = {c: domains_by_column[c] for c in columns if c not in unknown and c in domains_by_column}
+    for c, labels in labels_by_column.items():
+        if len(labels) > SYNTH_MAX_CATEGORIES - 1:
+            raise ValueError(f"欄位 {c} 的公開類別清單最多 {SYNTH_MAX_CATEGORIES - 1} 個類別")
+    if unknown:
+        # 每列在每個欄位只屬於一個類別：最多新增 len(unknown) 個類別、單一類別次數最多增加 1
+        threshold_delta = delta_part / 2 if mech_key == "gaussian" else delta_part
+        select_scale = scale_for(len(unknown), delta_part - threshold_delta)
+        threshold = selection_threshold(mech_key, select_scale, 1, threshold_delta, partitions=len(unknown))
+        for c in unknown:
+            labels_by_column[c] = select_labels(df[c], mech_key, select_scale, threshold, rng)
+
+    encoded = [encode_column(df[c], bounds_by_column.get(c), labels=labels_by_column.get(c)) for c in columns]
+    # 每個欄位最多約百個 code，以 int16、欄優先 (Fortran order) 保存整份 code 矩陣：
+    # 千萬列 × 數十欄仍放得進記憶體，逐欄 bincount 時也是連續記憶體
+    codes = np.empty((len(encoded[0][0]), len(encoded)), dtype=np.int16, order="F")
+    for k, (column_codes, _) in enumerate(encoded):
+        codes[:, k] = column_codes
+    domains = [e[1] for e in encoded]
+    sizes = [domain_size(dom) for dom in domains]
+
+    one_scale = scale_for(d)
+    one_way = [_noisy(np.bincount(codes[:, k], minlength=sizes[k]), mech_key, one_scale, rng) for k in range(d)]
+
+    edges = select_tree(codes, sizes, one_way, eps_part, rng)
+    two_way = []
+    two_scale = 1.0
+    if edges:
+        two_scale = scale_for(len(edges))
+        for i, j in edges:
+            counts = _pair_counts(codes[:, i], codes[:, j], sizes[j], sizes[i] * sizes[j])
+            two_way.append(_noisy(counts, mech_key, two_scale, rng).reshape(sizes[i], sizes[j]))
+
+    marginals, tables, total = make_consistent(one_way, two_way, edges, sizes, one_scale, two_scale)
+    return SyntheticModel(columns, domains, marginals, edges, tables, total)
@@ -0,0 +1,213 @@
+# 時間分桶的差分隱私時間序列：每小時 / 日 / 週 / 月的筆數與總和
+#
+# - 分桶：to_period 一次把整欄時間轉成桶編號，bincount 算出每桶 count / sum（沒有逐桶迴圈）
+# - 時間範圍：桶的起迄取自使用者給的公開時間範圍（與數值的資料邊界相同），範圍外的列不計，
+#   範圍內沒有資料的桶也照樣加噪發布，資料實際的最早 / 最晚時間不會出現在結果中
+# - 一般模式：所有桶的雜訊一次抽出
+# - 持續發布 (continual release)：二元樹機制（Chan, Shi & Song, 2011），
+#   新的桶可以持續附加，每個桶的誤差只隨時間長度對數成長
+
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.core.noise import noise_scale, sample_integer_noise, sample_noise
+from src.core.rng import noise_rng
+
+
+# 桶大小 → pandas Period 頻率
+TIME_BUCKETS = {
+    "hour": "h",
+    "day": "D",
+    "week": "W",
+    "month": "M",
+}
+
+# 持續發布模式最多可附加的桶數（決定二元樹高度，例如日桶約 11 年）
+CONTINUAL_HORIZON = 4096
+
+# 一般模式單次發布最多的桶數（時間範圍相對於桶大小過長時拒絕，例如小時桶約 114 年）
+MAX_BUCKETS = 1_000_000
+
+
+def normalize_bucket(text: str) -> str:
+    """把 GUI 顯示的文字（例如 '每日 (Day)'）轉成 TIME_BUCKETS 的 key，預設為 day"""
+    text = (text or "").lower()
+    if "hour" in text or "小時" in text:
+        return "hour"
+    if "week" in text or "週" in text:
+        return "week"
+    if "month" in text or "月" in text:
+        return "month"
+    return "day"
+
+
+def bucket_range(start, end, bucket: str) -> pd.PeriodIndex:
+    """
+    公開時間範圍 [start, end] 涵蓋的所有桶（含 start / end 所在的桶），連續不中斷。
+    start / end 可為字串或時間；start 晚於 end、或桶數超過 MAX_BUCKETS 時丟出 ValueError。
+    """
+    freq = TIME_BUCKETS[bucket]
+    first = pd.Period(pd.Timestamp(start), freq=freq)
+    last = pd.Period(pd.Timestamp(end), freq=freq)
+    if last.ordinal < first.ordinal:
+        raise ValueError("時間範圍的起始時間晚於結束時間")
+    if last.ordinal - first.ordinal + 1 > MAX_BUCKETS:
+        raise ValueError(f"時間範圍內的桶數超過上限（{MAX_BUCKETS:,} 個），請縮短範圍或改用較大的桶")
+    return pd.period_range(first, last, freq=freq)
+
+
+def bucket_aggregates(times, values, bounds, index: pd.PeriodIndex, keep=None):
+    """
+    依時間分桶計算每桶的筆數與 clip 後總和。
+
+    times / values: 同長度的時間欄與數值欄（時間或數值無效的列會被排除）
+    index:          bucket_range() 由公開時間範圍建立的連續 PeriodIndex；落在範圍外的列不計
+    keep:           額外的 bool 遮罩（例如使用者貢獻上限保留的列），長度同 times
+    回傳 (counts, sums)，與 index 等長（沒有資料的桶為 0）
+    """
+    lo, hi = float(bounds[0]), float(bounds[1])
+    n_buckets = len(index)
+    times = pd.Series(times).reset_index(drop=True)
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times, errors="coerce")
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+    valid = times.notna().to_numpy() & ~np.isnan(values)
+    if keep is not None:
+        valid &= np.asarray(keep, dtype=bool)
+    if not valid.any() or n_buckets == 0:
+        return np.zeros(n_buckets), np.zeros(n_buckets)
+
+    idx = times[valid].dt.to_period(index.freq).array.asi8 - index[0].ordinal
+    inside = (idx >= 0) & (idx < n_buckets)
+    idx = idx[inside]
+
+    clipped = np.clip(values[valid][inside], lo, hi)
+    counts = np.bincount(idx, minlength=n_buckets).astype(np.float64)
+    sums = np.bincount(idx, weights=clipped, minlength=n_buckets)
+    return counts, sums
+
+
+def release_series(counts, sums, bounds, epsilon: float, mech_key: str = "laplace", delta: float = 1e-5,
+                   contribution: int = 1, rng=None):
+    """
+    一般模式：count 與 sum 各用一半的 ε（Gaussian 時 δ 也各一半），所有桶的雜訊一次抽出。
+    每列只落在一個桶，單列敏感度為 count 1、sum (max - min)；使用者層級再乘上 contribution。
+    count 加整數雜訊（離散 Laplace / 離散 Gaussian），sum 加連續雜訊。
+    """
+    lo, hi = bounds
+    n_buckets = len(counts)
+    scale_count = noise_scale(mech_key, epsilon / 2, delta / 2, contribution)
+    scale_sum = noise_scale(mech_key, epsilon / 2, delta / 2, contribution * (hi - lo))
+
+    noisy_counts = np.asarray(counts, dtype=np.float64) + sample_integer_noise(mech_key, scale_count, n_buckets, rng)
+    noisy_sums = np.asarray(sums, dtype=np.float64) + sample_noise(mech_key, scale_sum, n_buckets, rng)
+    return noisy_counts, noisy_sums
+
+
+class BinaryTreeCounter:
+    """
+    持續發布的二元樹計數器。
+    第 t 個值加入時，只為 t 的最低位元對應的二元樹節點 (p-sum) 抽一次雜訊；
+    前綴總和 = t 的二進位表示中各位元對應節點的雜訊值相加（最多 log2(T) 個）。
+    每個值最多出現在 levels 個節點中，因此每個節點的雜訊以 levels 倍敏感度計算。
+    integer=True 時節點加整數雜訊（用於筆數）。
+    """
+
+    def __init__(self, epsilon: float, horizon: int = CONTINUAL_HORIZON, sensitivity: float = 1.0,
+                 mech_key: str = "laplace", delta: float = 1e-5, rng=None, integer: bool = False):
+        self.horizon = int(horizon)
+        self.levels = max(1, math.ceil(math.log2(self.horizon + 1)))
+        if mech_key == "gaussian":
+            node_sensitivity = math.sqrt(self.levels) * sensitivity
+        else:
+            node_sensitivity = self.levels * sensitivity
+        self.mech_key = mech_key
+        self._sample = sample_integer_noise if integer else sample_noise
+        self.scale = noise_scale(mech_key, epsilon, delta, node_sensitivity)
+        self.rng = rng if rng is not None else noise_rng()
+
+        self.t = 0
+        self._exact = np.zeros(self.levels)   # 各層目前的真實 p-sum
+        self._noisy = np.zeros(self.levels)   # 各層目前的雜訊 p-sum
+        self.prefix = []                      # 每一步的雜訊前綴總和
+
+    def append(self, value: float) -> float:
+        """加入下一個值，回傳加入後的雜訊前綴總和"""
+        if self.t >= self.horizon:
+            raise ValueError(f"已超過持續發布的長度上限（{self.horizon} 個桶）")
+        self.t += 1
+        low = (self.t & -self.t).bit_length() - 1  # t 的最低位元
+
+        self._exact[low] = self._exact[:low].sum() + float(value)
+        self._exact[:low] = 0.0
+        self._noisy[low] = self._exact[low] + self._sample(self.mech_key, self.scale, 1, self.rng)[0]
+        self._noisy[:low] = 0.0
+
+        bits = [i for i in range(self.levels) if (self.t >> i) & 1]
+        total = float(self._noisy[bits].sum())
+        self.prefix.append(total)
+        return total
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def values(self) -> np.ndarray:
+        """每一步的雜訊值（前綴總和相鄰相減）"""
+        return np.diff(np.asarray(self.prefix, dtype=np.float64), prepend=0.0)
+
+
+class ContinualSeries:
+    """
+    同一個查詢（資料來源 + 欄位 + 分桶 + 參數）的持續發布狀態。
+    只發布「已結束」的桶：公開時間範圍的最後一桶（結束時間所在的桶，預設為目前時間）還可能增加資料，
+    之後再執行時才發布；已發布的桶不會因為資料更新而重新發布。
+    """
+
+    def __init__(self, epsilon, mech_key="laplace", delta=1e-5, bounds=(0.0, 1.0), contribution=1,
+                 horizon=CONTINUAL_HORIZON, rng=None):
+        lo, hi = bounds
+        # count 與 sum 各用一半的 ε / δ
+        self.counts = BinaryTreeCounter(epsilon / 2, horizon, contribution, mech_key, delta / 2, rng, integer=True)
+        self.sums = BinaryTreeCounter(epsilon / 2, horizon, contribution * (hi - lo), mech_key, delta / 2, rng)
+        self.periods = []
+        self._lock = threading.Lock()
+
+    def update(self, periods, counts, sums):
+        """
+        附加 periods（公開時間範圍的所有桶）中尚未發布、且已結束的桶。
+        回傳 (已發布的 PeriodIndex, 雜訊 counts, 雜訊 sums, 尚未發布的最新桶)。
+        """
+        with self._lock:
+            pending = periods[-1] if len(periods) else None
+            if pending is not None:
+                # 從上次發布的下一桶（第一次則從時間範圍的第一桶）發布到 pending 的前一桶
+                start = self.periods[-1].ordinal + 1 if self.periods else periods[0].ordinal
+                ordinals = np.arange(start, pending.ordinal)
+                if self.counts.t + ordinals.size > self.counts.horizon:
+                    raise ValueError(f"已超過持續發布的長度上限（{self.counts.horizon} 個桶）")
+                pos = ordinals - periods[0].ordinal
+                inside = pos >= 0
+                safe = np.where(inside, pos, 0)
+                self.counts.extend(np.where(inside, np.asarray(counts)[safe], 0.0))
+                self.sums.extend(np.where(inside, np.asarray(sums)[safe], 0.0))
+                self.periods.extend(pd.Period(ordinal=int(o), freq=periods.freq) for o in ordinals)
+            index = pd.PeriodIndex(self.periods, freq=periods.freq)
+            return index, self.counts.values(), self.sums.values(), pending
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def get_continual_series(key, factory):
+    """依查詢 key 取得（或以 factory() 建立）持續發布狀態；同一程序內的後續執行會沿用"""
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is None:
+            stream = _streams[key] = factory()
+        return stream
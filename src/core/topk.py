@@ -0,0 +1,120 @@
+# 類別欄位的前 k 名次數（top-k）：向量化的 one-shot Gumbel 選取 + 雜訊次數
+#
+# - 次數：factorize + bincount，一次算出所有類別的次數（百萬個類別也沒有逐類別迴圈）
+# - 選取：每個類別加一次 Gumbel 雜訊後取前 k 名（Durfee & Rogers, 2019），
+#   等同於依序做 k 次 exponential mechanism（report-noisy-max）
+# - 發布：只對選中的 k 個類別以另一部分的 ε 加上整數雜訊（離散 Laplace / 離散 Gaussian）
+# - 類別清單：有公開類別清單時只在清單內選取（ε-DP）；沒有時所有出現過的類別一次加噪，
+#   只發布雜訊次數達門檻的類別（stability-based histogram，(ε, δ)-DP），
+#   只出現在少數列的類別標籤不會被發布
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.core.noise import noise_scale, sample_integer_noise
+from src.core.rng import noise_rng
+
+
+def category_counts(values, keep=None):
+    """
+    回傳 (categories, counts)，空值不計。
+    keep: 額外的 bool 遮罩（例如使用者貢獻上限保留的列）
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if keep is not None:
+        values = values[np.asarray(keep, dtype=bool)]
+    codes, categories = pd.factorize(values, sort=False)
+    codes = codes[codes >= 0]
+    counts = np.bincount(codes, minlength=len(categories))
+    return np.asarray(categories), counts
+
+
+def restrict_to_domain(categories, counts, domain):
+    """
+    只保留公開類別清單 domain 中的類別；domain 中沒出現在資料裡的類別次數為 0。
+    類別以字串比對（清單通常由使用者輸入），字串相同的類別次數合併。
+    """
+    domain = pd.Index(pd.unique(np.asarray(domain, dtype=object).astype(str)))
+    pos = domain.get_indexer(pd.Index(np.asarray(categories, dtype=object).astype(str)))
+    found = pos >= 0
+    restricted = np.bincount(pos[found], weights=np.asarray(counts)[found], minlength=len(domain))
+    return np.asarray(domain, dtype=object), restricted.astype(np.int64)
+
+
+def selection_threshold(mech_key: str, scale: float, max_count: int, delta: float, partitions: int = 1) -> int:
+    """
+    沒有公開類別清單時的發布門檻。
+    只出現在相鄰資料集其中一邊的類別最多 partitions 個、次數最多 max_count，
+    門檻讓「任何一個這種類別的雜訊次數達到門檻」的機率合計不超過 δ：
+    離散 Laplace 的尾機率 P(X ≥ t) ≤ e^(-t/b)；離散 Gaussian 為 subgaussian，P(X ≥ t) ≤ e^(-t²/2σ²)。
+    """
+    if not 0 < delta < 1:
+        raise ValueError("沒有公開類別清單時需要 0 < δ < 1（以門檻篩選類別）")
+    tail = math.log(partitions / delta)
+    margin = scale * tail if mech_key == "laplace" else scale * math.sqrt(2.0 * tail)
+    return int(math.ceil(max_count + margin))
+
+
+def gumbel_top_k(counts, k: int, epsilon: float, sensitivity: float = 1.0, rng=None):
+    """
+    one-shot Gumbel top-k：所有類別一次抽 Gumbel 雜訊，argpartition 取前 k 名（O(類別數)）。
+    每次選取分到 ε/k，exponential mechanism 的 Gumbel 尺度為 2·Δ·k / ε。
+    回傳依雜訊分數由大到小排序的類別索引。
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    k = min(int(k), counts.size)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    rng = rng if rng is not None else noise_rng()
+    scale = 2.0 * sensitivity * k / float(epsilon)
+    scores = counts + rng.gumbel(0.0, scale, counts.size)
+
+    if k < counts.size:
+        top = np.argpartition(scores, -k)[-k:]
+    else:
+        top = np.arange(counts.size)
+    return top[np.argsort(scores[top])[::-1]]
+
+
+def release_top_k(categories, counts, k: int, epsilon: float, mech_key: str = "laplace", delta: float = 1e-5,
+                  select_fraction: float = 0.5, contribution: int = 1, rng=None):
+    """
+    選出前 k 名並發布其雜訊次數。
+    - select_fraction 的 ε 用於選取，其餘用於次數（Gaussian 時 δ 全部用於次數）
+    - 每列只計入一個類別：次數向量的 L1 / L2 敏感度都是 1；使用者層級再乘上 contribution
+    回傳 (選中的類別, 雜訊次數)，依雜訊次數由大到小排列。
+    """
+    eps_select = epsilon * select_fraction
+    eps_count = epsilon - eps_select
+    rng = rng if rng is not None else noise_rng()
+
+    top = gumbel_top_k(counts, k, eps_select, contribution, rng)
+    scale = noise_scale(mech_key, eps_count, delta, contribution)
+    noisy = np.asarray(counts, dtype=np.int64)[top] + sample_integer_noise(mech_key, scale, top.size, rng)
+    noisy = np.maximum(noisy, 0).astype(np.float64)
+
+    order = np.argsort(noisy)[::-1]
+    return np.asarray(categories)[top][order], noisy[order]
+
+
+def release_top_k_thresholded(categories, counts, k: int, epsilon: float, mech_key: str = "laplace",
+                              delta: float = 1e-5, contribution: int = 1, rng=None):
+    """
+    沒有公開類別清單時的 top-k：所有出現過的類別一次加上整數雜訊（整個 ε），
+    只保留雜訊次數達 selection_threshold 的類別，再取雜訊次數最大的 k 個（後處理，不另外花費預算）。
+    每人最多 contribution 列：最多新增 contribution 個類別、單一類別最多增加 contribution。
+    Gaussian 時 δ 一半用於雜訊、一半用於門檻；Laplace 時 δ 全部用於門檻。
+    回傳 (選中的類別, 雜訊次數, 門檻)，依雜訊次數由大到小排列。
+    """
+    rng = rng if rng is not None else noise_rng()
+    threshold_delta = delta / 2 if mech_key == "gaussian" else delta
+    scale = noise_scale(mech_key, epsilon, delta - threshold_delta, contribution)
+    threshold = selection_threshold(mech_key, scale, contribution, threshold_delta, partitions=contribution)
+
+    counts = np.asarray(counts, dtype=np.int64)
+    noisy = counts + sample_integer_noise(mech_key, scale, counts.size, rng)
+    passed = np.flatnonzero(noisy >= threshold)
+    top = passed[np.argsort(-noisy[passed], kind="stable")[:max(int(k), 0)]]
+    return np.asarray(categories)[top], noisy[top].astype(np.float64), threshold
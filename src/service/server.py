@@ -0,0 +1,381 @@
+# 本機 HTTP 服務模式：讓其他內部工具透過 HTTP 呼叫差分隱私引擎
+#
+# 啟動：python -m src.service.server --port 8765
+#
+# API：
+#   POST /datasets            {"path": "..."}                   註冊資料集（常駐記憶體；path 可為分割檔目錄 / glob）
+#   GET  /datasets                                               列出已註冊資料集
+#   POST /queries[?wait=1]    {"dataset", "column", "query", "mechanism",
+#                              "epsilon", "delta", "bounds": [min, max],
+#                              "user_column", "max_rows_per_user",
+#                              "time_column", "time_bucket", "time_start", "time_end", "continual", "top_k",
+#                              "columns", "norm_bound", "column_bounds": {欄位: [min, max]},
+#                              "join_dataset": 另一個資料集 id, "join_keys": [key, 關聯 key],
+#                              "join_column": ["left" | "right", 欄位], "join_aggregate", "max_matches",
+#                              "category_domains": {欄位: [公開類別, ...]},
+#                              "parallel_columns": [欄位, ...]}
+#                                                                （使用者 / 時間 / top_k / 共變異數 / 合成資料 / 關聯 / 類別清單欄位可省略；
+#                                                                 parallel_columns 為多欄位查詢：每個欄位各自發布一次，
+#                                                                 邊界取自 column_bounds 或 bounds，以 process pool 平行彙總）
+#                                                                送出查詢（佇列已滿回 503）
+#   GET  /queries/<id>                                           查詢狀態與結果
+
+import argparse
+import functools
+import json
+import os
+import threading
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from src.core.backends import BACKENDS, set_backend
+from src.core.elements import SettingsSnapshot
+from src.core.engine import run_dp
+from src.core.jobs import Job, JobScheduler, QueueFullError
+from src.core.join import loaded_datasets
+from src.core.ledger import ReleaseLedger
+from src.core.loader import LazyDataset
+from src.core.partitions import PartitionedSource, is_partitioned_path
+from src.core.rng import RNG_MODES, set_rng_mode
+from src.core.sqlite_source import SQLiteSource, is_sqlite_file
+
+
+class DatasetRegistry:
+    """已註冊的資料集：同一路徑只載入一次，已解析的欄位在請求之間持續快取"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datasets = {}   # dataset_id -> dataset
+        self._by_path = {}    # 絕對路徑 -> dataset_id
+
+    def register(self, path: str):
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._by_path:
+                return self._by_path[path], self._datasets[self._by_path[path]]
+
+        if is_partitioned_path(path):
+            dataset = PartitionedSource(path)
+        elif not os.path.isfile(path):
+            raise ValueError(f"找不到檔案：{path}")
+        elif is_sqlite_file(path):
+            dataset = SQLiteSource(path)
+        elif path.lower().endswith((".csv", ".xlsx")):
+            dataset = LazyDataset(path)
+        else:
+            raise ValueError("僅支援 CSV / XLSX / SQLite 檔案或分割檔目錄")
+
+        with self._lock:
+            if path not in self._by_path:
+                dataset_id = uuid.uuid4().hex[:12]
+                self._by_path[path] = dataset_id
+                self._datasets[dataset_id] = dataset
+                # 關聯查詢以 id 指定另一個資料集
+                loaded_datasets.register(dataset_id, dataset)
+            dataset_id = self._by_path[path]
+            return dataset_id, self._datasets[dataset_id]
+
+    def get(self, dataset_id):
+        with self._lock:
+            return self._datasets.get(dataset_id)
+
+    def describe(self):
+        with self._lock:
+            return [
+                {"id": dataset_id, "path": path, "columns": [str(c) for c in self._datasets[dataset_id].columns]}
+                for path, dataset_id in self._by_path.items()
+            ]
+
+
+def _to_jsonable(value):
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _scalar(spec: dict, name: str, default=None):
+    """單一值欄位：JSON 陣列 / 物件會讓設定快照無法 hash，直接視為規格錯誤"""
+    value = spec.get(name, default)
+    if isinstance(value, (list, dict)):
+        raise ValueError(f"{name} 需為單一值")
+    return value
+
+
+def _tuple(spec: dict, name: str, length: int = None):
+    """陣列欄位轉成 tuple（元素需為單一值）；未指定時為 None"""
+    value = spec.get(name)
+    if not value:
+        return None
+    if not isinstance(value, list) or any(isinstance(v, (list, dict)) for v in value):
+        raise ValueError(f"{name} 需為單一值組成的陣列")
+    if length is not None and len(value) != length:
+        raise ValueError(f"{name} 需有 {length} 個元素")
+    return tuple(value)
+
+
+def _spec_to_snapshot(spec: dict) -> SettingsSnapshot:
+    """把 HTTP 的查詢規格轉成引擎使用的設定快照（名稱正規化交給 engine）"""
+    bounds = _tuple(spec, "bounds", length=2) or (None, None)
+    return SettingsSnapshot(
+        epsilon=float(_scalar(spec, "epsilon", 1.0)),
+        mechanism=str(_scalar(spec, "mechanism", "laplace")),
+        delta=float(_scalar(spec, "delta", 1e-5)),
+        query=str(_scalar(spec, "query", "mean")),
+        column=_scalar(spec, "column"),
+        sensitivity_min=bounds[0],
+        sensitivity_max=bounds[1],
+        user_column=_scalar(spec, "user_column"),
+        max_rows_per_user=_scalar(spec, "max_rows_per_user", 1),
+        time_column=_scalar(spec, "time_column"),
+        time_bucket=_scalar(spec, "time_bucket", "day"),
+        time_start=_scalar(spec, "time_start"),
+        time_end=_scalar(spec, "time_end"),
+        continual=bool(_scalar(spec, "continual", False)),
+        top_k=_scalar(spec, "top_k", 10),
+        feature_columns=_tuple(spec, "columns"),
+        norm_bound=_scalar(spec, "norm_bound", 1.0),
+        column_bounds=_column_bounds(spec.get("column_bounds")),
+        join_dataset=_scalar(spec, "join_dataset"),
+        join_keys=_tuple(spec, "join_keys", length=2),
+        join_column=_tuple(spec, "join_column", length=2),
+        join_aggregate=str(_scalar(spec, "join_aggregate", "mean")),
+        max_matches=_scalar(spec, "max_matches", 1),
+        category_domains=_category_domains(spec.get("category_domains")),
+        parallel_columns=_tuple(spec, "parallel_columns"),
+    )
+
+
+def _column_bounds(value):
+    """{"欄位": [min, max], ...} → ((欄位, min, max), ...)（合成資料 / 多欄位查詢的數值欄位）"""
+    if not value:
+        return None
+    if not isinstance(value, dict):
+        raise ValueError("column_bounds 需為 {欄位: [min, max]}")
+    out = []
+    for column, bounds in value.items():
+        bounds = _tuple({"bounds": bounds}, "bounds", length=2)
+        if bounds is None:
+            raise ValueError(f"column_bounds[{column}] 需為 [min, max]")
+        out.append((column, bounds[0], bounds[1]))
+    return tuple(out)
+
+
+def _category_domains(value):
+    """{"欄位": [類別, ...], ...} → ((欄位, (類別, ...)), ...)（top-k / 合成資料的公開類別清單）"""
+    if not value:
+        return None
+    if not isinstance(value, dict):
+        raise ValueError("category_domains 需為 {欄位: [類別, ...]}")
+    out = []
+    for column, labels in value.items():
+        labels = _tuple({"labels": labels}, "labels")
+        if labels is None:
+            raise ValueError(f"category_domains[{column}] 需為非空的類別陣列")
+        out.append((column, tuple(str(label) for label in labels)))
+    return tuple(out)
+
+
+def _job_to_dict(job: Job):
+    out = {
+        "id": job.id,
+        "status": job.status,
+        "submitted_at": job.submitted_at,
+        "duration": job.duration,
+    }
+    if job.result is not None:
+        out.update(_to_jsonable(job.result))
+    return out
+
+
+class DPService:
+    """HTTP handler 共用的狀態：資料集註冊表 + 有上限的工作佇列"""
+
+    def __init__(self, max_workers=None, max_pending=64, wait_timeout=60.0, ledger_path=None):
+        self.datasets = DatasetRegistry()
+        # 有指定 ledger_path 時，重複的查詢直接重播先前發布的結果
+        self.ledger = ReleaseLedger(ledger_path) if ledger_path else None
+        self.scheduler = JobScheduler(
+            runner=functools.partial(run_dp, ledger=self.ledger),
+            max_workers=max_workers or os.cpu_count() or 1,
+            max_pending=max_pending,
+            history_size=10_000,
+        )
+        self.wait_timeout = wait_timeout
+
+    def shutdown(self):
+        self.scheduler.shutdown(wait=False)
+        if self.ledger is not None:
+            self.ledger.close()
+
+
+class DPRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SimpleDP/0.2"
+    service: DPService = None  # 由 make_server() 設定
+
+    # ---------- 共用工具 ----------
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length == 0:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def _error(self, status, message, headers=None):
+        self._send_json(status, {"ok": False, "message": message}, headers)
+
+    def log_message(self, format, *args):
+        # 壓測時逐筆印 log 會拖慢服務，預設靜音
+        pass
+
+    # ---------- 路由 ----------
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+
+        if parts == ["datasets"]:
+            self._send_json(HTTPStatus.OK, {"datasets": self.service.datasets.describe()})
+        elif len(parts) == 2 and parts[0] == "queries":
+            try:
+                job = self.service.scheduler.get(int(parts[1]))
+            except ValueError:
+                job = None
+            if job is None:
+                self._error(HTTPStatus.NOT_FOUND, f"找不到查詢：{parts[1]}")
+            else:
+                self._send_json(HTTPStatus.OK, _job_to_dict(job))
+        elif parts == ["health"]:
+            self._send_json(HTTPStatus.OK, {"ok": True, **self.service.scheduler.counts()})
+        else:
+            self._error(HTTPStatus.NOT_FOUND, "未知的路徑")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+
+        try:
+            body = self._read_json()
+        except (ValueError, UnicodeDecodeError):
+            self._error(HTTPStatus.BAD_REQUEST, "請求內容不是合法的 JSON")
+            return
+        if not isinstance(body, dict):
+            self._error(HTTPStatus.BAD_REQUEST, "請求內容需為 JSON 物件")
+            return
+
+        if parts == ["datasets"]:
+            self._register_dataset(body)
+        elif parts == ["queries"]:
+            wait = parse_qs(url.query).get("wait", ["0"])[0] not in ("0", "false", "")
+            self._submit_query(body, wait)
+        else:
+            self._error(HTTPStatus.NOT_FOUND, "未知的路徑")
+
+    def _register_dataset(self, body):
+        path = body.get("path")
+        if not path:
+            self._error(HTTPStatus.BAD_REQUEST, "缺少 path")
+            return
+        try:
+            dataset_id, dataset = self.service.datasets.register(path)
+        except Exception as e:
+            self._error(HTTPStatus.BAD_REQUEST, f"註冊資料集失敗：{e}")
+            return
+        self._send_json(HTTPStatus.CREATED, {
+            "id": dataset_id,
+            "columns": [str(c) for c in dataset.columns],
+        })
+
+    def _submit_query(self, body, wait):
+        dataset_id = body.get("dataset")
+        dataset = self.service.datasets.get(dataset_id) if isinstance(dataset_id, str) else None
+        if dataset is None:
+            self._error(HTTPStatus.NOT_FOUND, f"找不到資料集：{dataset_id}")
+            return
+        try:
+            settings = _spec_to_snapshot(body)
+            priority = int(_scalar(body, "priority", 0))
+        except (TypeError, ValueError) as e:
+            self._error(HTTPStatus.BAD_REQUEST, f"查詢規格錯誤：{e}")
+            return
+
+        try:
+            job = self.service.scheduler.submit(dataset, settings, priority=priority)
+        except QueueFullError as e:
+            # backpressure：請呼叫端稍後重試
+            self._error(HTTPStatus.SERVICE_UNAVAILABLE, str(e), headers={"Retry-After": "1"})
+            return
+
+        if wait:
+            finished = self.service.scheduler.wait(job.id, timeout=self.service.wait_timeout)
+            if finished is not None:
+                self._send_json(HTTPStatus.OK, _job_to_dict(finished))
+                return
+
+        self._send_json(HTTPStatus.ACCEPTED, _job_to_dict(job), headers={"Location": f"/queries/{job.id}"})
+
+
+class DPHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 預設 listen backlog 只有 5，高併發時連線會被 TCP 重送拖慢約 1 秒
+    request_queue_size = 128
+
+
+def make_server(host="127.0.0.1", port=8765, max_workers=None, max_pending=64, ledger_path=None):
+    service = DPService(max_workers=max_workers, max_pending=max_pending, ledger_path=ledger_path)
+    handler = type("BoundDPRequestHandler", (DPRequestHandler,), {"service": service})
+    return DPHTTPServer((host, port), handler), service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simple DP System 本機 HTTP 服務")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="運算 worker 數量（預設為 CPU 核心數）")
+    parser.add_argument("--max-pending", type=int, default=64, help="待執行查詢上限，超過回 503")
+    parser.add_argument("--ledger", default=None, help="發布紀錄 SQLite 檔路徑（不指定則不記錄、不重播）")
+    parser.add_argument("--rng", choices=RNG_MODES, default="secure",
+                        help="雜訊亂數來源：secure（密碼學安全，預設）或 fast（可重現，僅供測試 / 效能量測）")
+    parser.add_argument("--seed", type=int, default=None, help="--rng fast 時的亂數種子")
+    parser.add_argument("--backend", choices=BACKENDS, default="pandas",
+                        help="CSV 解析 / 彙總的執行後端（polars / pyarrow 需另外安裝）")
+    args = parser.parse_args(argv)
+
+    set_rng_mode(args.rng, seed=args.seed)
+    try:
+        set_backend(args.backend)
+    except ValueError as e:
+        parser.error(str(e))
+
+    httpd, service = make_server(args.host, args.port, args.workers, args.max_pending, args.ledger)
+    print(f"DP 服務啟動：http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
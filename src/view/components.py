@@ -19,7 +19,7 @@ class FileDropFrame(ctk.CTkFrame):
         # 區域內的文字標籤
         self.label = ctk.CTkLabel(
             self, 
-            text="點擊選擇檔案\n或將 CSV / XLSX 拖曳至此處",
+            text="點擊選擇檔案\n或將 CSV / XLSX / SQLite（或分割檔資料夾）拖曳至此處",
             font=("Arial", 16)
         )
         self.label.place(relx=0.5, rely=0.5, anchor="center")
@@ -62,9 +62,10 @@ class FileDropFrame(ctk.CTkFrame):
         file_path = filedialog.askopenfilename(
             title="選擇資料檔案",
             filetypes=[
-                ("Data Files", "*.csv *.xlsx"),
+                ("Data Files", "*.csv *.xlsx *.db *.sqlite *.sqlite3"),
                 ("CSV Files", "*.csv"),
-                ("Excel Files", "*.xlsx")
+                ("Excel Files", "*.xlsx"),
+                ("SQLite Files", "*.db *.sqlite *.sqlite3")
             ]
         )
         
@@ -0,0 +1,206 @@
+# GUI 事件迴圈延遲監控：定期 after() tick 量測延遲，記錄卡頓當下正在執行的處理函式
+# 並可顯示效能 HUD（事件迴圈延遲 / RSS / 上一個工作耗時）
+
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+import customtkinter as ctk
+
+
+DEFAULT_LOG_PATH = os.path.join(os.path.expanduser("~"), ".simple_dp", "logs", "stalls.log")
+
+
+class _ActivityLog:
+    """記錄最近執行過的 GUI 處理函式 (名稱, 開始, 結束)，供卡頓歸因"""
+
+    def __init__(self, maxlen=256):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=maxlen)
+        self._running = {}  # token -> (name, start)
+
+    def begin(self, name):
+        token = object()
+        with self._lock:
+            self._running[token] = (name, time.perf_counter())
+        return token
+
+    def end(self, token):
+        with self._lock:
+            name, start = self._running.pop(token)
+            self._recent.append((name, start, time.perf_counter()))
+
+    def overlapping(self, start, end):
+        """回傳在 [start, end] 期間執行過的處理函式與耗時 (秒)"""
+        with self._lock:
+            found = [
+                (name, h_end - h_start)
+                for name, h_start, h_end in self._recent
+                if h_end >= start and h_start <= end
+            ]
+            found += [(name, end - h_start) for name, h_start in self._running.values()]
+        return found
+
+
+activity = _ActivityLog()
+
+
+def track(name=None):
+    """
+    裝飾器：標記一個 GUI 處理函式，卡頓發生時可以知道是誰佔住了事件迴圈。
+        @track("handle_file_upload")
+        def handle_file_upload(self, file_path): ...
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = activity.begin(label)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                activity.end(token)
+        return wrapper
+    return decorator
+
+
+def current_rss_mb():
+    """目前程序的常駐記憶體 (MB)；無法取得時回傳 None"""
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # 非 Linux 只拿得到峰值（macOS 單位為 bytes）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+
+def _make_stall_logger(log_path):
+    logger = logging.getLogger("simple_dp.stalls")
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        handler = RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class EventLoopMonitor:
+    """
+    每 interval_ms 排一次 after() tick，實際觸發時間比預期晚多少就是事件迴圈延遲。
+    延遲超過 stall_threshold_ms 視為卡頓，連同當時執行的處理函式寫入輪替 log 檔。
+    """
+
+    def __init__(self, root, interval_ms=100, stall_threshold_ms=250, log_path=DEFAULT_LOG_PATH):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.stall_threshold_ms = stall_threshold_ms
+        self.log_path = log_path
+
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.stalls = deque(maxlen=100)   # 最近的卡頓紀錄 (時間, 延遲 ms, 處理函式)
+        self.last_job_seconds = None
+
+        self._logger = None
+        self._after_id = None
+        self._expected = None
+        self._hud = None
+        self._hud_updated = 0.0
+
+    # ---------- 啟動 / 停止 ----------
+
+    def start(self):
+        if self._after_id is not None:
+            return
+        try:
+            self._logger = _make_stall_logger(self.log_path)
+        except OSError as e:
+            print(f"無法建立卡頓 log 檔: {e}")
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def set_last_job(self, seconds):
+        self.last_job_seconds = seconds
+
+    # ---------- tick ----------
+
+    def _tick(self):
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - self._expected) * 1000)
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+        if lag_ms >= self.stall_threshold_ms:
+            self._record_stall(lag_ms, self._expected, now)
+
+        if self._hud is not None and now - self._hud_updated >= 0.5:
+            self._update_hud()
+            self._hud_updated = now
+
+        self._expected = now + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def _record_stall(self, lag_ms, start, end):
+        handlers = activity.overlapping(start, end)
+        culprit = ", ".join(f"{name} ({dur * 1000:.0f} ms)" for name, dur in handlers) or "(未知)"
+        self.stalls.append((time.time(), lag_ms, culprit))
+        if self._logger is not None:
+            rss = current_rss_mb()
+            rss_text = f"{rss:.0f}MB" if rss is not None else "n/a"
+            self._logger.info(f"stall lag={lag_ms:.0f}ms rss={rss_text} handlers={culprit}")
+
+    # ---------- HUD ----------
+
+    def show_hud(self, parent):
+        if self._hud is None:
+            self._hud = ctk.CTkLabel(
+                parent, text="", font=("Consolas", 11),
+                fg_color=("gray80", "gray15"), corner_radius=6, text_color=("gray20", "gray80")
+            )
+        self._hud.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor="se")
+        self._hud.lift()
+        self._update_hud()
+
+    def hide_hud(self):
+        if self._hud is not None:
+            self._hud.place_forget()
+            self._hud.destroy()
+            self._hud = None
+
+    def toggle_hud(self, parent):
+        if self._hud is None:
+            self.show_hud(parent)
+        else:
+            self.hide_hud()
+
+    def _update_hud(self):
+        rss = current_rss_mb()
+        job = f"{self.last_job_seconds:.2f}s" if self.last_job_seconds is not None else "-"
+        lines = [
+            f"loop lag: {self.last_lag_ms:6.1f} ms (max {self.max_lag_ms:.0f})",
+            f"RSS:      {rss:6.0f} MB" if rss is not None else "RSS:      n/a",
+            f"last job: {job}",
+            f"stalls:   {len(self.stalls)}",
+        ]
+        self._hud.configure(text="\n".join(lines))
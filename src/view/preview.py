@@ -44,6 +44,79 @@ class DataPreviewTable(ctk.CTkFrame):
                              font=('Arial', 10, 'bold'))
         self.style.map("Treeview", background=[('selected', '#1f538d')])
 
+        # 7. 分頁列（SQLite 等大型資料來源才顯示）
+        self.fetch_page = None
+        self.page_size = 15
+        self.page = 0
+        self.total_rows = 0
+
+        self.pager_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.btn_prev = ctk.CTkButton(self.pager_frame, text="上一頁", width=70, command=self._prev_page)
+        self.btn_prev.pack(side="left", padx=(0, 5))
+        self.lbl_page = ctk.CTkLabel(self.pager_frame, text="")
+        self.lbl_page.pack(side="left", padx=5)
+        self.btn_next = ctk.CTkButton(self.pager_frame, text="下一頁", width=70, command=self._next_page)
+        self.btn_next.pack(side="left", padx=(5, 0))
+
+    def show_dataframe(self, preview_df):
+        """把一小段 DataFrame 顯示到表格上"""
+        # 清空舊資料
+        self.tree.delete(*self.tree.get_children())
+
+        # 設定欄位 (Columns)
+        columns = list(preview_df.columns)
+        self.tree["columns"] = columns
+        self.tree["show"] = "headings"
+
+        # 設定欄位寬度：這裡設定 minwidth 避免縮太小，並給一個預設寬度
+        for col in columns:
+            self.tree.heading(col, text=col)
+            # minwidth=100 保證不會被壓扁到看不到字
+            self.tree.column(col, width=120, minwidth=100, anchor="center")
+
+        # 插入資料 (Rows)
+        for index, row in preview_df.iterrows():
+            # 處理可能的空值 (NaN)，轉成空字串顯示，比較美觀
+            safe_values = ["" if pd.isna(x) else x for x in list(row)]
+            self.tree.insert("", "end", values=safe_values)
+
+    # ----------------- 分頁 -----------------
+
+    def enable_paging(self, fetch_page, total_rows, page_size=15):
+        """
+        啟用分頁模式：
+        - fetch_page(limit, offset) 回傳該頁的 DataFrame（例如 SQLite 的 LIMIT 查詢）
+        - 只讀取目前這一頁，不會把整份資料載入記憶體
+        """
+        self.fetch_page = fetch_page
+        self.total_rows = int(total_rows)
+        self.page_size = page_size
+        self.page = 0
+        self.pager_frame.grid(row=2, column=0, sticky="w", padx=5, pady=(0, 5))
+        self._load_page()
+
+    def disable_paging(self):
+        self.fetch_page = None
+        self.pager_frame.grid_remove()
+
+    def _page_count(self):
+        return max(1, -(-self.total_rows // self.page_size))
+
+    def _load_page(self):
+        df = self.fetch_page(self.page_size, self.page * self.page_size)
+        self.show_dataframe(df)
+        self.lbl_page.configure(text=f"第 {self.page + 1} / {self._page_count()} 頁")
+
+    def _prev_page(self):
+        if self.fetch_page is not None and self.page > 0:
+            self.page -= 1
+            self._load_page()
+
+    def _next_page(self):
+        if self.fetch_page is not None and self.page + 1 < self._page_count():
+            self.page += 1
+            self._load_page()
+
     def update_data(self, file_path):
         """
         讀取檔案並更新表格內容
@@ -61,29 +134,10 @@ class DataPreviewTable(ctk.CTkFrame):
             if df.empty:
                 return False, "錯誤：檔案內沒有資料 (Empty DataFrame)"
 
-            # 清空舊資料
-            self.tree.delete(*self.tree.get_children())
-
-            # 設定欄位 (Columns)
-            columns = list(df.columns)
-            self.tree["columns"] = columns
-            self.tree["show"] = "headings"
-
-            # 設定欄位寬度：這裡設定 minwidth 避免縮太小，並給一個預設寬度
-            for col in columns:
-                self.tree.heading(col, text=col)
-                # minwidth=100 保證不會被壓扁到看不到字
-                self.tree.column(col, width=120, minwidth=100, anchor="center")
-
-            # 插入資料 (Rows) - 取前 15 筆
-            # Pandas 的 head(n) 很安全，如果資料只有 5 筆，它就只會回傳 5 筆，不會報錯
-            preview_df = df.head(15)
-            for index, row in preview_df.iterrows():
-                # 處理可能的空值 (NaN)，轉成空字串顯示，比較美觀
-                safe_values = ["" if pd.isna(x) else x for x in list(row)]
-                self.tree.insert("", "end", values=safe_values)
-            
-            return True, f"成功載入：{len(df)} 筆資料，欄位：{len(columns)} 個"
+            self.disable_paging()
+            self.show_dataframe(df.head(15))
+
+            return True, f"成功載入：{len(df)} 筆資料，欄位：{len(df.columns)} 個"
 
         except pd.errors.EmptyDataError:
             return False, "錯誤：檔案完全空白或格式損毀"
@@ -1,10 +1,32 @@
+import os
+import threading
+import time
+
 import customtkinter as ctk
 from tkinter import filedialog
 
+from matplotlib import dates as mdates
+from matplotlib import ticker
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import numpy as np
 import pandas as pd
-from diffprivlib.mechanisms import Laplace, GaussianAnalytic
+
+from src.core.export import export_noisy_dataset, make_noise_spec
+from src.core.hierarchy import HierarchicalHistogram
+from src.core.ldp import make_ldp_spec
+from src.core.synth import SyntheticModel
+from src.view.monitor import track
+
+
+# bins 超過這個數量就改用階梯圖 (stairs) 顯示
+STEP_MODE_BINS = 200
+
+# 熱圖的欄位數不超過這個數量時，刻度標上欄位名稱
+MATRIX_LABEL_COLUMNS = 40
+
+# 匯出加噪資料集時使用的 process 數量（保留一顆核心給 GUI）
+EXPORT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
 
 
 class ResultPanel(ctk.CTkFrame):
@@ -18,9 +40,19 @@ class ResultPanel(ctk.CTkFrame):
 
         # 狀態
         self.current_result = None   # engine 回傳的 payload
-        self.source_df = None        # 原始 DataFrame（給下載用）
+        self.source_df = None        # 原始資料集（來源為 CSV / XLSX 檔，給下載用）
         self.figure = None
         self.canvas = None
+        self.ax = None
+        self._bars = None            # 長條圖的 BarContainer（原地更新用）
+        self._stairs = None          # bins 很多時的階梯圖 StepPatch
+        self._lines = None           # 時間序列折線 Line2D
+        self._image = None           # 共變異 / 相關矩陣熱圖 AxesImage
+        self._colorbar = None        # 熱圖的色階
+        self._chart_kind = None      # 目前圖表種類：histogram / categories / series（決定 x 軸刻度）
+        self.has_chart = False       # 目前是否有圖要顯示
+        self._render_started = None  # 本次圖表更新開始時間
+        self.last_render_ms = None   # 上一次圖表更新耗時 (ms)
         self.collapsed = False       # 是否為收合狀態
 
         # 1. 標題 + 收合按鈕列
@@ -70,7 +102,7 @@ class ResultPanel(ctk.CTkFrame):
 
         self.btn_download = ctk.CTkButton(
             self.btn_frame,
-            text="下載結果 (.csv)",
+            text="下載結果",
             state="disabled",  # 有結果才能按
             fg_color="#3B8ED0",
             width=120,
@@ -78,6 +110,39 @@ class ResultPanel(ctk.CTkFrame):
         )
         self.btn_download.pack(side="right", padx=(10, 0))
 
+        # 類別欄位匯出時的本地 DP 編碼（top-k 結果才顯示）
+        self.menu_ldp = ctk.CTkOptionMenu(self.btn_frame, values=["k-RR", "OUE"], width=90)
+        self.menu_ldp.set("k-RR")
+
+        # 共變異數矩陣：熱圖顯示 / 匯出哪一個矩陣（共變異數結果才顯示）
+        self.menu_matrix = ctk.CTkOptionMenu(
+            self.btn_frame, values=["相關係數", "共變異數"], width=100,
+            command=lambda v: self._plot_matrix()
+        )
+        self.menu_matrix.set("相關係數")
+
+        # 合成資料：要產生的列數（合成資料結果才顯示；預設為模型的雜訊列數）
+        self.entry_synth_rows = ctk.CTkEntry(self.btn_frame, placeholder_text="列數", width=100)
+
+        # 匯出進度（匯出時才顯示）
+        self._export_job = None
+        self.progress_export = ctk.CTkProgressBar(self.btn_frame, width=120)
+
+        self.lbl_render_time = ctk.CTkLabel(self.btn_frame, text="", font=("Arial", 12), text_color="gray")
+        self.lbl_render_time.pack(side="right")
+
+        # 區間查詢（發布階層直方圖後才顯示）：由已發布的樹回答，不再花費隱私預算
+        self._tree = None
+        self.frame_range = ctk.CTkFrame(self.btn_frame, fg_color="transparent")
+        self.entry_range_low = ctk.CTkEntry(self.frame_range, placeholder_text="從", width=70)
+        self.entry_range_low.pack(side="left", padx=(0, 5))
+        self.entry_range_high = ctk.CTkEntry(self.frame_range, placeholder_text="到", width=70)
+        self.entry_range_high.pack(side="left", padx=(0, 5))
+        self.btn_range = ctk.CTkButton(self.frame_range, text="查詢區間", width=80, command=self._on_range_query)
+        self.btn_range.pack(side="left", padx=(0, 5))
+        self.lbl_range = ctk.CTkLabel(self.frame_range, text="", font=("Arial", 12))
+        self.lbl_range.pack(side="left", padx=(0, 10))
+
     # ----------------- 對外 API -----------------
 
     def show_loading(self):
@@ -86,20 +151,19 @@ class ResultPanel(ctk.CTkFrame):
         self.lbl_result_text.configure(
             text="正在進行差分隱私運算... (請稍候)", text_color="#E67E22"
         )
-        self._clear_chart()
-        self.chart_frame.grid_remove()
+        self._hide_chart()
         self.btn_download.configure(state="disabled")
         # 若之前是收合狀態，可以選擇自動展開
         if self.collapsed:
             self._toggle_collapse(force_expand=True)
         self.update_idletasks()
 
-    def update_result(self, payload: dict, result_text: str, source_df: pd.DataFrame | None = None):
+    def update_result(self, payload: dict, result_text: str, source_df=None):
         """
         從 MainWindow 呼叫：
         - payload: engine 回傳的 result['result']
         - result_text: 要顯示在文字區的說明文字
-        - source_df: 原始完整 DataFrame（用來做「整欄加噪後下載」）
+        - source_df: 原始資料集（有 file_path 的 CSV / XLSX 資料集，用來做「整欄加噪後下載」）
         """
         self.current_result = payload
         if source_df is not None:
@@ -108,25 +172,58 @@ class ResultPanel(ctk.CTkFrame):
         # 顯示文字
         self.lbl_result_text.configure(text=result_text, text_color=("black", "white"))
 
+        # 階層直方圖：保留發布的樹供區間查詢
+        if payload.get("tree_levels") is not None:
+            self._tree = HierarchicalHistogram.from_payload(payload)
+            self.lbl_range.configure(text="")
+            self.frame_range.pack(side="left")
+        else:
+            self._tree = None
+            self.frame_range.pack_forget()
+
         # 若是 histogram 則畫圖
         query = payload.get("query")
-        if query == "histogram":
+        if query in ("histogram", "range") or (query == "join" and payload.get("hist") is not None):
             hist = payload.get("hist")
             bin_edges = payload.get("bin_edges")
             if hist is not None and bin_edges is not None:
                 self._plot_histogram(hist, bin_edges)
+        elif query == "timeseries":
+            self._plot_series(payload["series_start"], payload["series_count"])
+        elif query == "topk":
+            self._plot_categories(payload["categories"], payload["counts"])
+        elif query == "covariance":
+            self._plot_matrix()
         else:
-            self._clear_chart()
-            self.chart_frame.grid_remove()
+            self._hide_chart()
+
+        if query == "covariance":
+            self.menu_matrix.pack(side="right", padx=(10, 0), before=self.btn_download)
+        else:
+            self.menu_matrix.pack_forget()
+
+        if query == "topk":
+            self.menu_ldp.pack(side="right", padx=(10, 0), before=self.btn_download)
+        else:
+            self.menu_ldp.pack_forget()
 
-        # 有結果就可以下載
-        self.btn_download.configure(state="normal")
+        if query == "synthetic":
+            self.entry_synth_rows.delete(0, "end")
+            self.entry_synth_rows.insert(0, str(max(int(round(payload["synth_rows"])), 1)))
+            self.entry_synth_rows.pack(side="right", padx=(10, 0), before=self.btn_download)
+        else:
+            self.entry_synth_rows.pack_forget()
+
+        # 有結果且有完整資料集（SQLite 來源不整份載入）才可以下載；矩陣 / 合成資料由結果本身匯出；
+        # 相異值個數與關聯查詢沒有對應的逐列加噪方式
+        can_download = (self.source_df is not None and query not in ("distinct", "join")) or query in ("covariance", "synthetic")
+        self.btn_download.configure(state="normal" if can_download else "disabled")
 
         # 若之前是收合，可以選擇自動展開
         if self.collapsed:
             self._toggle_collapse(force_expand=True)
 
-    def set_source_df(self, df: pd.DataFrame):
+    def set_source_df(self, df):
         """如需先單獨設定 DataFrame 也可以用這個"""
         self.source_df = df
 
@@ -137,12 +234,31 @@ class ResultPanel(ctk.CTkFrame):
         self.lbl_result_text.configure(text="等待執行...", text_color="gray")
         self._clear_chart()
         self.chart_frame.grid_remove()
+        self.lbl_render_time.configure(text="")
         self.btn_download.configure(state="disabled")
+        self._tree = None
+        self.frame_range.pack_forget()
+        self.menu_ldp.pack_forget()
+        self.menu_matrix.pack_forget()
+        self.entry_synth_rows.pack_forget()
 
         # 收合與否保留原狀；如果你想 reset 時也順便收合，可以取消註解：
         # if not self.collapsed:
         #     self._toggle_collapse()
 
+    def _on_range_query(self):
+        """以已發布的階層直方圖回答 [從, 到) 區間的筆數"""
+        if self._tree is None:
+            return
+        try:
+            low = float(self.entry_range_low.get())
+            high = float(self.entry_range_high.get())
+        except ValueError:
+            self.lbl_range.configure(text="請輸入數值", text_color="red")
+            return
+        count = self._tree.range_query(low, high)
+        self.lbl_range.configure(text=f"≈ {count:,.1f} 筆", text_color=("black", "white"))
+
     # ----------------- 收合 / 展開 -----------------
 
     def _toggle_collapse(self, force_expand: bool = False):
@@ -163,120 +279,397 @@ class ResultPanel(ctk.CTkFrame):
             # 展開：把元件都顯示回來
             self.lbl_result_text.grid(row=1, column=0, sticky="w", padx=20, pady=(0, 10))
             # 有圖才顯示圖表區
-            if self.canvas is not None:
+            if self.has_chart:
                 self.chart_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=10)
             # self.btn_frame.grid(row=3, column=0, sticky="e", padx=20, pady=(10, 15))
             # self.btn_toggle.configure(text="收合")
 
     # ----------------- 畫圖相關 -----------------
 
+    def _hide_chart(self):
+        """只隱藏圖表區，保留圖上的 artist 供下次原地更新"""
+        self.has_chart = False
+        self.chart_frame.grid_remove()
+
     def _clear_chart(self):
-        """清除舊的 Matplotlib 圖"""
+        """
+        清除圖上的內容，但保留同一個 Figure / Canvas 重複使用
+        （不再每次銷毀 Tk widget，避免多次運算後累積資源）
+        """
+        for artist in (self._bars, self._stairs, self._lines):
+            if artist is not None:
+                artist.remove()
+        self._bars = None
+        self._stairs = None
+        self._lines = None
+        self._remove_image()
+        self.has_chart = False
+
+    def _remove_image(self):
+        if self._colorbar is not None:
+            self._colorbar.remove()
+            self._colorbar = None
+        if self._image is not None:
+            self._image.remove()
+            self._image = None
+
+    def _ensure_canvas(self):
+        """第一次畫圖時才建立 Figure / Canvas，之後都重複使用"""
         if self.canvas is not None:
-            self.canvas.get_tk_widget().destroy()
-            self.canvas = None
-        self.figure = None
-
-    def _plot_histogram(self, hist, bin_edges):
-        """用 Matplotlib 畫出 DP noisy histogram"""
-        self.chart_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=10)
-
-        # 先清除舊圖
-        self._clear_chart()
+            return
 
-        hist = list(hist)
-        bin_edges = list(bin_edges)
+        self.figure = Figure(figsize=(5, 3), dpi=100)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlabel("Value")
+        self.ax.set_ylabel("Noisy count")
+        self.ax.set_title("Differentially Private Histogram")
 
-        fig = Figure(figsize=(5, 3), dpi=100)
-        ax = fig.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.chart_frame)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.canvas.mpl_connect("draw_event", self._on_chart_drawn)
 
-        if len(bin_edges) == len(hist) + 1:
-            centers = []
-            widths = []
-            for i in range(len(hist)):
-                left = bin_edges[i]
-                right = bin_edges[i + 1]
-                centers.append((left + right) / 2)
-                widths.append(right - left)
+    @track("_plot_histogram")
+    def _plot_histogram(self, hist, bin_edges):
+        """用 Matplotlib 畫出 DP noisy histogram（原地更新既有的 bar）"""
+        self._render_started = time.perf_counter()
+        self.chart_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=10)
+        self._ensure_canvas()
+
+        hist = np.asarray(hist, dtype=float)
+        bin_edges = np.asarray(bin_edges, dtype=float)
+
+        if len(bin_edges) != len(hist) + 1:
+            bin_edges = np.arange(len(hist) + 1) - 0.5
+
+        if self._lines is not None:
+            self._lines.remove()
+            self._lines = None
+        self._remove_image()
+        self._set_axis_kind("histogram")
+        self.ax.set_xlabel("Value")
+        self.ax.set_ylabel("Noisy count")
+        self.ax.set_title("Differentially Private Histogram")
+
+        centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+        widths = np.diff(bin_edges)
+
+        if len(hist) > STEP_MODE_BINS:
+            # bins 很多時改畫階梯圖：只有一個 artist，不會建立上千個 Rectangle
+            if self._bars is not None:
+                self._bars.remove()
+                self._bars = None
+            if self._stairs is None:
+                self._stairs = self.ax.stairs(hist, bin_edges, fill=True)
+            else:
+                self._stairs.set_data(hist, bin_edges)
+        else:
+            if self._stairs is not None:
+                self._stairs.remove()
+                self._stairs = None
+            if self._bars is not None and len(self._bars) == len(hist):
+                # bins 數量相同：直接改高度與位置
+                for rect, height, left, width in zip(self._bars, hist, bin_edges[:-1], widths):
+                    rect.set_height(height)
+                    rect.set_x(left)
+                    rect.set_width(width)
+            else:
+                if self._bars is not None:
+                    self._bars.remove()
+                self._bars = self.ax.bar(centers, hist, width=widths)
+
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.has_chart = True
+        self.canvas.draw_idle()
+
+    def _set_axis_kind(self, kind):
+        """不同種類的圖共用同一個 Axes，切換種類時重設 x 軸刻度"""
+        if kind == self._chart_kind:
+            return
+        if self._chart_kind == "matrix":
+            # 熱圖會固定長寬比並反轉 y 軸，換回其他圖時還原
+            self.ax.set_aspect("auto")
+            if self.ax.yaxis_inverted():
+                self.ax.invert_yaxis()
+            self.ax.yaxis.set_major_locator(ticker.AutoLocator())
+            self.ax.yaxis.set_major_formatter(ticker.ScalarFormatter())
+        self._chart_kind = kind
+        if kind == "series":
+            locator = mdates.AutoDateLocator()
+            self.ax.xaxis.set_major_locator(locator)
+            self.ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        elif kind == "histogram":
+            self.ax.xaxis.set_major_locator(ticker.AutoLocator())
+            self.ax.xaxis.set_major_formatter(ticker.ScalarFormatter())
+        for label in self.ax.get_xticklabels():
+            label.set_rotation(0)
+            label.set_horizontalalignment("center")
+
+    @track("_plot_categories")
+    def _plot_categories(self, categories, counts):
+        """前 k 名類別的雜訊次數長條圖（類別名稱為 x 軸標籤）"""
+        self._render_started = time.perf_counter()
+        self.chart_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=10)
+        self._ensure_canvas()
+
+        for artist in (self._bars, self._stairs, self._lines):
+            if artist is not None:
+                artist.remove()
+        self._stairs = None
+        self._lines = None
+        self._remove_image()
+
+        positions = np.arange(len(categories))
+        labels = [c if len(c) <= 12 else c[:11] + "…" for c in categories]
+        self._bars = self.ax.bar(positions, np.asarray(counts, dtype=float), width=0.8)
+        self._set_axis_kind("categories")
+        self.ax.set_xticks(positions, labels, rotation=45, ha="right", fontsize=8)
+
+        self.ax.set_xlabel("Category")
+        self.ax.set_ylabel("Noisy count")
+        self.ax.set_title(f"Differentially Private Top-{len(categories)}")
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.has_chart = True
+        self.canvas.draw_idle()
+
+    @track("_plot_series")
+    def _plot_series(self, starts, counts):
+        """時間序列折線圖（每個時間桶的雜訊筆數），與直方圖共用同一個 Figure"""
+        self._render_started = time.perf_counter()
+        self.chart_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=10)
+        self._ensure_canvas()
+
+        for artist in (self._bars, self._stairs):
+            if artist is not None:
+                artist.remove()
+        self._bars = None
+        self._stairs = None
+        self._remove_image()
+
+        x = np.asarray(starts, dtype="datetime64[m]")
+        y = np.asarray(counts, dtype=float)
+        if self._lines is None:
+            (self._lines,) = self.ax.plot(x, y, marker="o" if len(y) <= 60 else None, linewidth=1.2)
+        else:
+            self._lines.set_data(x, y)
+            self._lines.set_marker("o" if len(y) <= 60 else "None")
+
+        self._set_axis_kind("series")
+        self.ax.set_xlabel("Time")
+        self.ax.set_ylabel("Noisy count")
+        self.ax.set_title("Differentially Private Time Series")
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.has_chart = True
+        self.canvas.draw_idle()
+
+    def _current_matrix(self):
+        """依選單回傳 (矩陣名稱, 矩陣)：相關係數或共變異數"""
+        if self.menu_matrix.get() == "共變異數":
+            return "Covariance", np.asarray(self.current_result["cov"], dtype=float)
+        return "Correlation", np.asarray(self.current_result["corr"], dtype=float)
+
+    @track("_plot_matrix")
+    def _plot_matrix(self):
+        """共變異 / 相關矩陣熱圖；欄位不多時以欄名作為刻度標籤"""
+        if self.current_result is None or self.current_result.get("query") != "covariance":
+            return
+        self._render_started = time.perf_counter()
+        self.chart_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=10)
+        self._ensure_canvas()
+
+        for artist in (self._bars, self._stairs, self._lines):
+            if artist is not None:
+                artist.remove()
+        self._bars = None
+        self._stairs = None
+        self._lines = None
+        self._remove_image()
+
+        name, matrix = self._current_matrix()
+        limit = 1.0 if name == "Correlation" else float(np.abs(matrix).max() or 1.0)
+        self._set_axis_kind("matrix")
+        self._image = self.ax.imshow(matrix, cmap="RdBu_r", vmin=-limit, vmax=limit, interpolation="nearest")
+        self._colorbar = self.figure.colorbar(self._image, ax=self.ax)
+
+        columns = self.current_result["columns"]
+        if len(columns) <= MATRIX_LABEL_COLUMNS:
+            labels = [c if len(c) <= 12 else c[:11] + "…" for c in columns]
+            positions = np.arange(len(columns))
+            self.ax.set_xticks(positions, labels, rotation=90, fontsize=7)
+            self.ax.set_yticks(positions, labels, fontsize=7)
         else:
-            centers = list(range(len(hist)))
-            widths = 0.8
+            self.ax.xaxis.set_major_locator(ticker.AutoLocator())
+            self.ax.yaxis.set_major_locator(ticker.AutoLocator())
 
-        ax.bar(centers, hist, width=widths)
-        ax.set_xlabel("Value")
-        ax.set_ylabel("Noisy count")
-        ax.set_title("Differentially Private Histogram")
-        fig.tight_layout()
+        self.ax.set_xlabel("")
+        self.ax.set_ylabel("")
+        self.ax.set_title(f"Differentially Private {name} Matrix")
+        self.has_chart = True
+        self.canvas.draw_idle()
 
-        self.canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+    def _export_matrix(self):
+        """匯出目前顯示的矩陣（列與欄皆以欄位名稱標示）"""
+        file_path = filedialog.asksaveasfilename(
+            title="儲存矩陣",
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv"), ("Gzip CSV Files", "*.csv.gz")],
+        )
+        if not file_path:
+            return
+        _, matrix = self._current_matrix()
+        columns = self.current_result["columns"]
+        try:
+            pd.DataFrame(matrix, index=columns, columns=columns).to_csv(file_path)
+        except OSError as e:
+            self.lbl_render_time.configure(text=f"匯出失敗：{e}", text_color="red")
+            return
+        self.lbl_render_time.configure(text=f"已匯出 {len(columns)}×{len(columns)} 矩陣", text_color="gray")
 
-        self.figure = fig
+    def _on_chart_drawn(self, event):
+        """Canvas 實際重繪完成後，回報這次圖表更新花了多久"""
+        if self._render_started is None:
+            return
+        elapsed_ms = (time.perf_counter() - self._render_started) * 1000
+        self._render_started = None
+        self.last_render_ms = elapsed_ms
+        self.lbl_render_time.configure(text=f"圖表更新耗時：{elapsed_ms:.1f} ms", text_color="gray")
 
     # ----------------- 下載整欄加噪後的資料集 -----------------
 
+    @track("_on_download_click")
     def _on_download_click(self):
         """
-        將目前設定下「加了雜訊的完整資料集」輸出成 .csv：
-        - 只針對 current_result['column'] 那一欄加噪
-        - 覆蓋原欄位（不加 *_dp）
+        將目前設定下「加了雜訊的完整資料集」匯出：
+        - 只針對 current_result['column'] 那一欄加噪，覆蓋原欄位（不加 *_dp）
+        - top-k（類別欄位）改以本地 DP 匯出：k-RR 覆蓋原欄位，OUE 換成每個類別一欄 0/1
+        - 分塊讀取 / 加噪 / 寫出，記憶體固定；在背景 thread 執行並顯示進度
+        - 依副檔名輸出 CSV、gzip CSV 或 Parquet
         """
-        if self.current_result is None or self.source_df is None:
+        if self.current_result is None:
+            return
+        if self.current_result.get("query") == "covariance":
+            self._export_matrix()
+            return
+        if self._export_job is not None:
+            return  # 上一次匯出還在進行中
+        if self.current_result.get("query") == "synthetic":
+            self._export_synthetic()
+            return
+        if self.source_df is None:
             return
 
         file_path = filedialog.asksaveasfilename(
-            title="儲存加噪後資料集為 CSV",
+            title="儲存加噪後資料集",
             defaultextension=".csv",
-            filetypes=[("CSV Files", "*.csv")],
+            filetypes=[
+                ("CSV Files", "*.csv"),
+                ("Gzip CSV Files", "*.csv.gz"),
+                ("Parquet Files", "*.parquet"),
+            ],
         )
         if not file_path:
             return  # 使用者取消
 
-        query = self.current_result.get("query")
         eps = self.current_result.get("epsilon")
         mech = self.current_result.get("mechanism")
         bounds = self.current_result.get("bounds")
         col = self.current_result.get("column")
+        categorical = self.current_result.get("query") == "topk"
 
-        if col is None or bounds is None:
+        if col is None or (bounds is None and not categorical):
             return
 
-        lower, upper = bounds
-        df = self.source_df.copy()
-
-        # 只處理選定欄位，其他欄原封不動
-        series = pd.to_numeric(df[col], errors="coerce")
-        clipped = series.clip(lower, upper)
-
-        # 對單一值的敏感度（這裡用 max-min）
-        sensitivity = float(upper) - float(lower)
-        mech_key = (mech or "").lower()
-
-        if "laplace" in mech_key:
-            mechanism = Laplace(epsilon=float(eps), sensitivity=sensitivity)
-        elif "gaussian" in mech_key or "高斯" in mech_key:
-            delta = self.current_result.get("delta", 1e-5)
-            mechanism = GaussianAnalytic(
-                epsilon=float(eps),
-                delta=float(delta),
-                sensitivity=sensitivity,
-            )
-        else:
+        spec = None
+        if not categorical:
+            try:
+                spec = make_noise_spec(
+                    col, bounds, mech, float(eps),
+                    delta=float(self.current_result.get("delta", 1e-5))
+                )
+            except ValueError:
+                return
+        ldp_mode = self.menu_ldp.get()
+
+        job = {"progress": 0.0, "done": False, "error": None, "rows": 0}
+        self._export_job = job
+
+        def worker():
+            nonlocal spec
+            try:
+                if categorical:
+                    # 類別清單只用公開清單或 top-k 已發布的類別（清單外的值會換成清單內的隨機類別）；
+                    # ε 為每列的本地預算
+                    categories = self.current_result.get("category_domain") or self.current_result["categories"]
+                    spec = make_ldp_spec(col, categories, float(eps), ldp_mode)
+                job["rows"] = export_noisy_dataset(
+                    self.source_df.file_path,
+                    file_path,
+                    [spec],
+                    workers=EXPORT_WORKERS,
+                    progress=lambda frac: job.__setitem__("progress", frac),
+                )
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
+
+        self._start_export(worker)
+
+    def _export_synthetic(self):
+        """由已發布的模型分塊產生合成資料並寫出 CSV（只用發布的模型，不讀原始資料、不再花費預算）"""
+        try:
+            n_rows = int(self.entry_synth_rows.get())
+        except ValueError:
+            n_rows = 0
+        if n_rows < 1:
+            self.lbl_render_time.configure(text="合成資料列數需為正整數", text_color="red")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            title="儲存合成資料",
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv")],
+        )
+        if not file_path:
             return
 
-        noisy_values = clipped.copy()
+        model = SyntheticModel.from_payload(self.current_result)
+        job = {"progress": 0.0, "done": False, "error": None, "rows": 0}
+        self._export_job = job
 
-        for idx, val in clipped.items():
-            if pd.isna(val):
-                noisy_values.at[idx] = pd.NA
-            else:
-                noised = mechanism.randomise(float(val))
-                # 若你希望結果被夾在 bounds 內，就保留下面這行：
-                # noised = max(lower, min(upper, noised))
-                noisy_values.at[idx] = noised
+        def worker():
+            try:
+                job["rows"] = model.to_csv(
+                    file_path, n_rows, progress=lambda frac: job.__setitem__("progress", frac)
+                )
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
 
-        # 覆蓋原欄位（不新增 *_dp）
-        df[col] = noisy_values
+        self._start_export(worker)
 
-        df.to_csv(file_path, index=False)
+    def _start_export(self, worker):
+        self.btn_download.configure(state="disabled")
+        self.progress_export.set(0)
+        self.progress_export.pack(side="right", padx=(10, 0))
+        threading.Thread(target=worker, daemon=True).start()
+        self.after(100, self._poll_export)
+
+    def _poll_export(self):
+        job = self._export_job
+        if job is None:
+            return
+        self.progress_export.set(job["progress"])
+        if not job["done"]:
+            self.after(100, self._poll_export)
+            return
+
+        self._export_job = None
+        self.progress_export.pack_forget()
+        synthetic = self.current_result is not None and self.current_result.get("query") == "synthetic"
+        self.btn_download.configure(state="normal" if self.source_df is not None or synthetic else "disabled")
+        if job["error"] is not None:
+            self.lbl_render_time.configure(text=f"匯出失敗：{job['error']}", text_color="red")
+        else:
+            self.lbl_render_time.configure(text=f"已匯出 {job['rows']} 筆", text_color="gray")
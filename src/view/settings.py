@@ -1,10 +1,33 @@
 import customtkinter as ctk
 from src.view.components import CTkToolTip
+from src.core.backends import BACKEND_LABELS, available_backends, set_backend
 from src.core.elements import dp_settings
+from src.core.planner import MODE_LABELS
+from src.core.rng import set_rng_mode
+
+
+# 使用者欄位選單中「不指定」的選項
+NO_USER_COLUMN = "(無：每列視為一人)"
+
+# 取消安全亂數時使用的固定 seed（結果可重現，僅供測試）
+FAST_RNG_SEED = 0
+
+# 執行模式選單：「自動」交給 planner 依檔案大小與可用記憶體決定
+AUTO_EXEC_MODE = "自動 (Auto)"
+
+# 關聯查詢的數值欄位選單：前綴標示欄位屬於哪一個資料集
+JOIN_SIDE_PREFIX = {"left": "目前：", "right": "關聯："}
 
 class SettingsPanel(ctk.CTkFrame):
     def __init__(self, master, **kwargs):
         self.on_run = kwargs.pop("on_run", None)
+        self.on_enqueue = kwargs.pop("on_enqueue", None)
+        self.on_table_change = kwargs.pop("on_table_change", None)
+        self.on_suggest_dp = kwargs.pop("on_suggest_dp", None)
+        self.on_exec_mode_change = kwargs.pop("on_exec_mode_change", None)
+        self.profile = None  # 載入時的欄位剖析結果 (DatasetProfile)
+        self._all_columns = []  # 資料集的全部欄位（類別查詢可選非數值欄位）
+        self._join_columns = {}  # 已載入資料集的名稱 → 欄位（關聯查詢用）
         super().__init__(master, **kwargs)
 
         # 標題
@@ -58,23 +81,189 @@ class SettingsPanel(ctk.CTkFrame):
         # Tooltip for Delta
         CTkToolTip(self.lbl_delta, "δ (Delta) 代表隱私保證失效的極小機率。\n通常設定為遠小於 1/N (例如 1e-5)。")
 
+        # 2-3. 雜訊亂數來源（全域設定，之後送出的運算與匯出都會套用）
+        self.chk_secure_rng = ctk.CTkCheckBox(
+            self, text="密碼學安全亂數 (CSPRNG)", command=self._on_rng_change
+        )
+        self.chk_secure_rng.select()
+        self.chk_secure_rng.pack(pady=(0, 10), padx=10, anchor="w")
+        CTkToolTip(
+            self.chk_secure_rng,
+            "勾選（預設）：雜訊取自作業系統的密碼學安全亂數，正式發布請保持勾選。\n"
+            "取消：改用可重現的快速亂數（固定 seed），僅供測試與效能量測。"
+        )
+
 
         # --- 3. 統計操作類型 ---
         self.create_info_label(
             text="統計操作 (Query):", 
-            tooltip_text="選擇要對資料執行的分析類型：\n• 平均值/總和/計數：單一數值統計。\n• 直方圖：顯示資料的分佈情況。")
-        self.opt_query = ctk.CTkOptionMenu(self, values=["平均值 (Mean)", "總和 (Sum)", "計數 (Count)", "直方圖 (Histogram)"])
+            tooltip_text="選擇要對資料執行的分析類型：\n• 平均值/總和/計數：單一數值統計。\n• 直方圖：顯示資料的分佈情況。\n• 區間查詢：一次發布階層直方圖，之後任意區間筆數都不再花費預算。\n• 相異值個數：以 HyperLogLog sketch 估計不重複的值有幾個（例如不同顧客數）。\n• 共變異 / 相關矩陣：所有數值欄位一起計算，以熱圖顯示。\n• 合成資料：以雜訊邊際分布建模，之後可產生任意列數的合成資料。\n• 跨資料集關聯：與另一個已載入的檔案依 key 關聯後再做統計。")
+        self.opt_query = ctk.CTkOptionMenu(self, values=[
+            "平均值 (Mean)", "總和 (Sum)", "計數 (Count)", "直方圖 (Histogram)",
+            "區間查詢 (Range)", "時間序列 (Time Series)", "前 k 名類別 (Top-K)", "相異值個數 (Distinct Count)",
+            "共變異 / 相關矩陣 (Covariance)", "合成資料 (Synthetic)", "跨資料集關聯 (Join)"
+        ])
         self.opt_query.pack(pady=(5, 10), padx=10, fill="x")
-        self.opt_query.configure(command=lambda v: dp_settings.set_query(v))
+        self.opt_query.configure(command=self._on_query_change)
+
+        # 3-1. 時間序列設定（選擇時間序列查詢時才顯示，放在目標欄位上方）
+        self.frame_time = ctk.CTkFrame(self, fg_color="transparent")
+        self.create_info_label(
+            parent=self.frame_time,
+            text="時間欄位 / 分桶:",
+            tooltip_text="依時間欄位分桶，發布每桶的雜訊筆數與總和（各用一半的 ε）。\n"
+                         "• 起 / 迄為公開的時間範圍（例如 2024-01-01），與資料邊界相同不可取自資料本身；\n"
+                         "  範圍外的列不計，範圍內沒有資料的桶也會發布。\n"
+                         "• 持續發布：資料更新後再執行只會附加新結束的時間桶，\n"
+                         "  誤差只隨時間長度對數成長；迄可留空（使用目前時間）。"
+        )
+        self.opt_time_col = ctk.CTkOptionMenu(
+            self.frame_time, values=["(請先載入檔案)"], command=lambda v: dp_settings.set_time_column(v)
+        )
+        self.opt_time_col.pack(pady=(5, 5), fill="x")
+
+        self.frame_bucket = ctk.CTkFrame(self.frame_time, fg_color="transparent")
+        self.frame_bucket.pack(fill="x")
+        self.opt_bucket = ctk.CTkOptionMenu(
+            self.frame_bucket, values=["每小時 (Hour)", "每日 (Day)", "每週 (Week)", "每月 (Month)"],
+            width=120, command=lambda v: dp_settings.set_time_bucket(v)
+        )
+        self.opt_bucket.set("每日 (Day)")
+        self.opt_bucket.pack(side="left")
+        self.chk_continual = ctk.CTkCheckBox(
+            self.frame_bucket, text="持續發布", width=60,
+            command=lambda: dp_settings.set_continual(self.chk_continual.get())
+        )
+        self.chk_continual.pack(side="right")
+
+        self.frame_time_range = ctk.CTkFrame(self.frame_time, fg_color="transparent")
+        self.frame_time_range.pack(pady=(5, 0), fill="x")
+        self.entry_time_start = ctk.CTkEntry(self.frame_time_range, placeholder_text="起 (2024-01-01)", width=120)
+        self.entry_time_start.pack(side="left", expand=True, fill="x", padx=(0, 5))
+        self.entry_time_end = ctk.CTkEntry(self.frame_time_range, placeholder_text="迄 (2024-12-31)", width=120)
+        self.entry_time_end.pack(side="right", expand=True, fill="x")
+
+        # 3-2. 前 k 名類別設定（選擇 Top-K 查詢時才顯示）
+        self.frame_topk = ctk.CTkFrame(self, fg_color="transparent")
+        self.lbl_topk = ctk.CTkLabel(self.frame_topk, text="前 k 名 (k):", font=("Arial", 14))
+        self.lbl_topk.pack(side="left", padx=(0, 5))
+        self.entry_topk = ctk.CTkEntry(self.frame_topk, placeholder_text="10", width=60)
+        self.entry_topk.pack(side="right", expand=True, fill="x")
+        self.entry_topk.insert(0, "10")
+        CTkToolTip(
+            self.lbl_topk,
+            "發布次數最多的 k 個類別與其雜訊次數：\n• 一半的 ε 用於挑選（one-shot Gumbel），一半用於次數。\n• 目標欄位可以是任何類別欄位，不需資料邊界。"
+        )
+
+        # 3-2-1. 公開類別清單（top-k 使用；沒有清單時只發布雜訊次數達門檻的類別）
+        self.frame_domain = ctk.CTkFrame(self, fg_color="transparent")
+        self.create_info_label(
+            parent=self.frame_domain,
+            text="公開類別清單 (選填):",
+            tooltip_text="事先公開、與資料無關的類別清單，以逗號分隔（例如 A, B, C）：\n"
+                         "• 有清單時只在清單內挑選，清單外的值不會被發布。\n"
+                         "• 留空時所有類別一起加噪，只發布雜訊次數超過門檻的類別\n"
+                         "  （需使用 δ；只出現在少數列的類別不會出現在結果中）。\n"
+                         "• 多個欄位以「欄位=A, B; 欄位2=X, Y」指定。"
+        )
+        self.entry_domain = ctk.CTkEntry(self.frame_domain, placeholder_text="A, B, C")
+        self.entry_domain.pack(pady=(5, 0), fill="x")
+
+        # 3-3. 共變異數矩陣設定（選擇共變異 / 相關矩陣時才顯示）
+        self.frame_cov = ctk.CTkFrame(self, fg_color="transparent")
+        self.lbl_norm = ctk.CTkLabel(self.frame_cov, text="每列範數上限 (C):", font=("Arial", 14))
+        self.lbl_norm.pack(side="left", padx=(0, 5))
+        self.entry_norm = ctk.CTkEntry(self.frame_cov, placeholder_text="1.0", width=60)
+        self.entry_norm.pack(side="right", expand=True, fill="x")
+        self.entry_norm.insert(0, "1.0")
+        CTkToolTip(
+            self.lbl_norm,
+            "以全部數值欄位計算共變異數與相關係數矩陣：\n• 每一列視為向量，L2 範數超過 C 的列會等比例縮小。\n"
+            "• C 決定雜訊大小；欄位多時建議使用 Gaussian 機制。\n• 任一欄缺值的列整列排除。"
+        )
+
+        # 3-4. 合成資料說明（選擇合成資料時才顯示）
+        self.frame_synth = ctk.CTkFrame(self, fg_color="transparent")
+        self.lbl_synth = ctk.CTkLabel(
+            self.frame_synth, text="數值欄位公開邊界 (欄位=min:max):", font=("Arial", 12), text_color="gray"
+        )
+        self.lbl_synth.pack(anchor="w")
+        CTkToolTip(
+            self.lbl_synth,
+            "以 1-way 與挑選出的 2-way 雜訊邊際分布建立樹狀模型（ε 平均分給三個步驟）：\n"
+            "• 有填公開邊界的欄位為數值欄位，依邊界切成區間（例如 age=0:120; income=0:200000）；\n"
+            "  邊界會隨模型發布，請填事先公開、與資料無關的範圍，不要填剖析建議值。\n"
+            "• 其餘欄位視為類別：使用公開類別清單，沒有清單的欄位以雜訊次數門檻選出類別（多花一份 ε / δ）。\n"
+            "• 模型建立後可在結果頁下載任意列數的合成資料，不再花費隱私預算。"
+        )
+        self.entry_synth_bounds = ctk.CTkEntry(self.frame_synth, placeholder_text="age=0:120; income=0:200000")
+        self.entry_synth_bounds.pack(pady=(5, 0), fill="x")
+
+        # 3-5. 跨資料集關聯設定（選擇關聯查詢時才顯示）
+        self.frame_join = ctk.CTkFrame(self, fg_color="transparent")
+        self.create_info_label(
+            parent=self.frame_join,
+            text="關聯資料集 / 關聯鍵:",
+            tooltip_text="與另一個已載入的檔案依 key 做 inner join 後統計數值欄位：\n"
+                         "• 兩邊每個 key 各自最多保留最先出現的 m 列，敏感度放大 m 倍。\n"
+                         "• 較大的一邊分塊串流，不會產生整個關聯結果。\n"
+                         "• 資料邊界填數值欄位的範圍。"
+        )
+        self.opt_join_ds = ctk.CTkOptionMenu(
+            self.frame_join, values=["(請先載入另一個檔案)"], command=lambda v: self._refresh_join_menus()
+        )
+        self.opt_join_ds.pack(pady=(5, 5), fill="x")
+
+        self.frame_join_keys = ctk.CTkFrame(self.frame_join, fg_color="transparent")
+        self.frame_join_keys.pack(fill="x")
+        self.opt_join_key = ctk.CTkOptionMenu(self.frame_join_keys, values=["(目前資料集)"], width=110)
+        self.opt_join_key.pack(side="left", expand=True, fill="x", padx=(0, 5))
+        CTkToolTip(self.opt_join_key, "目前資料集的關聯鍵")
+        self.opt_join_other_key = ctk.CTkOptionMenu(self.frame_join_keys, values=["(關聯資料集)"], width=110)
+        self.opt_join_other_key.pack(side="right", expand=True, fill="x")
+        CTkToolTip(self.opt_join_other_key, "關聯資料集的關聯鍵")
+
+        self.opt_join_value = ctk.CTkOptionMenu(self.frame_join, values=["(數值欄位)"])
+        self.opt_join_value.pack(pady=(5, 0), fill="x")
+
+        self.frame_join_agg = ctk.CTkFrame(self.frame_join, fg_color="transparent")
+        self.frame_join_agg.pack(pady=(5, 0), fill="x")
+        self.opt_join_agg = ctk.CTkOptionMenu(
+            self.frame_join_agg, values=["平均值 (Mean)", "總和 (Sum)", "計數 (Count)", "直方圖 (Histogram)"], width=130
+        )
+        self.opt_join_agg.pack(side="left", expand=True, fill="x")
+        self.entry_max_matches = ctk.CTkEntry(self.frame_join_agg, placeholder_text="m", width=50)
+        self.entry_max_matches.pack(side="right", padx=(5, 0))
+        self.entry_max_matches.insert(0, "1")
+        CTkToolTip(self.entry_max_matches, "每個關聯鍵兩邊各自最多保留的列數 m")
 
         # --- 4. 目標欄位 ---
         self.create_info_label(
             text="目標欄位 (Column):", 
             tooltip_text="選擇要進行隱私保護處理的資料欄位。"
         )
+        self.col_label_frame = self.last_label.master
         self.opt_col = ctk.CTkOptionMenu(self, values=["(請先載入檔案)"])
         self.opt_col.pack(pady=(5, 10), padx=10, fill="x")
-        self.opt_col.configure(command=lambda v: dp_settings.set_column(v))
+        self.opt_col.configure(command=self._on_column_change)
+
+        # --- 4-1. 使用者欄位 (使用者層級 DP) ---
+        self.create_info_label(
+            text="使用者欄位 (User ID):",
+            tooltip_text="同一個人有多列資料時選擇其 ID 欄位：\n• 每人最多計入 k 列（超過的列隨機捨棄）。\n• 敏感度以「一個人」為單位，放大 k 倍。"
+        )
+        self.frame_user = ctk.CTkFrame(self, fg_color="transparent")
+        self.frame_user.pack(pady=(5, 10), padx=10, fill="x")
+
+        self.opt_user_col = ctk.CTkOptionMenu(
+            self.frame_user, values=[NO_USER_COLUMN], command=self._on_user_column_change
+        )
+        self.opt_user_col.pack(side="left", expand=True, fill="x")
+
+        self.entry_max_rows = ctk.CTkEntry(self.frame_user, placeholder_text="k", width=50)
+        self.entry_max_rows.pack(side="right", padx=(5, 0))
+        self.entry_max_rows.insert(0, "1")
+        CTkToolTip(self.entry_max_rows, "每位使用者最多計入的列數 k")
 
         # --- 5. 資料邊界 ---
         self.create_info_label(
@@ -90,6 +279,64 @@ class SettingsPanel(ctk.CTkFrame):
         self.entry_max = ctk.CTkEntry(self.frame_bounds, placeholder_text="Max", width=60)
         self.entry_max.pack(side="left", padx=(5, 0), expand=True, fill="x")
 
+        # 邊界輸入時即時估計截斷比例（來自載入時的欄位剖析，不需重新掃描資料）
+        self.entry_min.bind("<KeyRelease>", lambda e: self.update_clip_estimate())
+        self.entry_max.bind("<KeyRelease>", lambda e: self.update_clip_estimate())
+
+        self.lbl_clip = ctk.CTkLabel(self, text="", font=("Arial", 12), text_color="gray")
+        self.lbl_clip.pack(padx=10, anchor="w")
+
+        # 邊界建議：預設取 sketch 的 1% / 99% 分位數；勾選 DP 則以 ε=0.1 的差分隱私分位數估計
+        self.frame_suggest = ctk.CTkFrame(self, fg_color="transparent")
+        self.frame_suggest.pack(pady=(0, 5), padx=10, fill="x")
+
+        self.btn_suggest = ctk.CTkButton(
+            self.frame_suggest, text="建議邊界", width=90, height=26,
+            state="disabled", command=self._on_suggest_clicked
+        )
+        self.btn_suggest.pack(side="left")
+
+        self.chk_suggest_dp = ctk.CTkCheckBox(self.frame_suggest, text="DP (ε=0.1)", width=60)
+        self.chk_suggest_dp.pack(side="right")
+        CTkToolTip(
+            self.chk_suggest_dp,
+            "勾選後以差分隱私分位數建議邊界（額外花費 ε=0.1），\n此時上方 Min / Max 需填入公開的粗略範圍。"
+        )
+
+        # --- 資料表 (僅 SQLite 來源顯示，放在目標欄位上方) ---
+        self.frame_table = ctk.CTkFrame(self, fg_color="transparent")
+        self.create_info_label(
+            parent=self.frame_table,
+            text="資料表 (Table):",
+            tooltip_text="SQLite 資料庫內要查詢的資料表。"
+        )
+        self.opt_table = ctk.CTkOptionMenu(self.frame_table, values=["(無資料表)"], command=self._on_table_change)
+        self.opt_table.pack(pady=(5, 0), fill="x")
+
+        # --- 執行模式（CSV / XLSX 載入方式；切換後重新開啟目前的檔案）---
+        self.create_info_label(
+            text="執行模式 (Execution):",
+            tooltip_text="CSV / XLSX 的載入方式，預設依檔案大小與可用記憶體自動決定：\n"
+                         "• 整份載入：小檔案一次解析全部欄位。\n• 欄位投影：只解析用到的欄位。\n"
+                         "• 分塊串流：不快取，每次查詢分塊掃描（記憶體固定）。\n"
+                         "• 區塊抽樣：只讀隨機區塊，結果為近似值。"
+        )
+        self.opt_exec_mode = ctk.CTkOptionMenu(
+            self, values=[AUTO_EXEC_MODE, *MODE_LABELS.values()], command=self._on_exec_mode_change
+        )
+        self.opt_exec_mode.pack(pady=(5, 10), padx=10, fill="x")
+
+        # --- 執行後端（CSV 的解析 / 彙總；只列出已安裝的後端，切換後同樣重新開啟目前的檔案）---
+        self.create_info_label(
+            text="執行後端 (Backend):",
+            tooltip_text="CSV 的解析與彙總引擎：\n• pandas：預設。\n"
+                         "• Polars / Arrow：多執行緒解析，分塊串流模式直接在掃描時彙總（需另外安裝）。"
+        )
+        self.opt_backend = ctk.CTkOptionMenu(
+            self, values=[BACKEND_LABELS[name] for name in available_backends()], command=self._on_backend_change
+        )
+        self.opt_backend.pack(pady=(5, 10), padx=10, fill="x")
+
         # --- 執行按鈕 ---
         self.btn_run = ctk.CTkButton(
             self,
@@ -101,6 +348,17 @@ class SettingsPanel(ctk.CTkFrame):
         )
         self.btn_run.pack(pady=(30, 20), padx=10, fill="x", side="bottom")
 
+        # 加入佇列：以目前設定建立快照排入背景執行，可以繼續調整下一組設定
+        self.btn_enqueue = ctk.CTkButton(
+            self,
+            text="加入佇列",
+            fg_color="gray40",
+            hover_color="gray30",
+            height=30,
+            command=self._on_enqueue_clicked
+        )
+        self.btn_enqueue.pack(pady=(0, 0), padx=10, fill="x", side="bottom")
+
     def create_info_label(self, text, tooltip_text, parent=None):
         """
         建立一個帶有 (i) Tooltip 的標題列
@@ -126,6 +384,37 @@ class SettingsPanel(ctk.CTkFrame):
         self.lbl_epsilon.configure(text=f"隱私預算 (ε): {float(value):.1f}")
         dp_settings.set_epsilon(value)
 
+    def get_exec_mode(self):
+        """手動指定的執行模式（PLAN_MODES 之一）；自動時回傳 None"""
+        value = self.opt_exec_mode.get()
+        for mode, label in MODE_LABELS.items():
+            if label == value:
+                return mode
+        return None
+
+    def _on_exec_mode_change(self, value):
+        if self.on_exec_mode_change is not None:
+            self.on_exec_mode_change()
+
+    def get_backend(self):
+        """選取的執行後端名稱"""
+        value = self.opt_backend.get()
+        for name, label in BACKEND_LABELS.items():
+            if label == value:
+                return name
+        return "pandas"
+
+    def _on_backend_change(self, value):
+        set_backend(self.get_backend())
+        if self.on_exec_mode_change is not None:
+            self.on_exec_mode_change()
+
+    def _on_rng_change(self):
+        if self.chk_secure_rng.get():
+            set_rng_mode("secure")
+        else:
+            set_rng_mode("fast", seed=FAST_RNG_SEED)
+
     def _on_mech_change(self, value):
         """當機制改變時，決定是否顯示 Delta 設定"""
         dp_settings.set_mechanism(value)
@@ -138,6 +427,8 @@ class SettingsPanel(ctk.CTkFrame):
             self.frame_delta.pack_forget()
 
     def update_columns(self, columns):
+        self._all_columns = list(columns or [])
+        self.set_profile(None)
         if columns:
             self.opt_col.configure(values=columns)
             self.opt_col.set(columns[0])
@@ -145,17 +436,287 @@ class SettingsPanel(ctk.CTkFrame):
         else:
             self.opt_col.configure(values=["(無可用欄位)"])
 
+        # 關聯查詢：目前資料集的關聯鍵 / 數值欄位跟著換
+        self._refresh_join_menus()
+
+        # 使用者欄位可以是任何型別（不限數值欄位），換資料集時重設為列層級
+        self.opt_user_col.configure(values=[NO_USER_COLUMN] + list(columns or []))
+        self.opt_user_col.set(NO_USER_COLUMN)
+        dp_settings.set_user_column(None)
+
+        # 時間欄位：優先選名稱看起來像時間的欄位
+        columns = list(columns or [])
+        if columns:
+            guess = next(
+                (c for c in columns if any(key in str(c).lower() for key in ("date", "time", "日期", "時間"))),
+                columns[0]
+            )
+            self.opt_time_col.configure(values=columns)
+            self.opt_time_col.set(guess)
+            dp_settings.set_time_column(guess)
+        else:
+            self.opt_time_col.configure(values=["(無可用欄位)"])
+            dp_settings.set_time_column(None)
+
+    def _on_query_change(self, value):
+        dp_settings.set_query(value)
+        if "Time" in value or "時間" in value:
+            self.frame_time.pack(pady=(0, 5), padx=10, fill="x", before=self.col_label_frame)
+        else:
+            self.frame_time.pack_forget()
+        if self._is_topk():
+            self.frame_topk.pack(pady=(0, 5), padx=10, fill="x", before=self.col_label_frame)
+        else:
+            self.frame_topk.pack_forget()
+        if self._is_topk() or self._is_synthetic():
+            self.frame_domain.pack(pady=(0, 5), padx=10, fill="x", before=self.col_label_frame)
+        else:
+            self.frame_domain.pack_forget()
+        if self._is_covariance():
+            self.frame_cov.pack(pady=(0, 5), padx=10, fill="x", before=self.col_label_frame)
+        else:
+            self.frame_cov.pack_forget()
+        if self._is_synthetic():
+            self.frame_synth.pack(pady=(0, 5), padx=10, fill="x", before=self.col_label_frame)
+        else:
+            self.frame_synth.pack_forget()
+        if self._is_join():
+            self.frame_join.pack(pady=(0, 5), padx=10, fill="x", before=self.col_label_frame)
+        else:
+            self.frame_join.pack_forget()
+        self._refresh_column_menu()
+
+    def _is_topk(self):
+        return "Top-K" in self.opt_query.get()
+
+    def _is_distinct(self):
+        return "Distinct" in self.opt_query.get()
+
+    def _is_covariance(self):
+        return "Covariance" in self.opt_query.get()
+
+    def _is_synthetic(self):
+        return "Synthetic" in self.opt_query.get()
+
+    def _is_join(self):
+        return "Join" in self.opt_query.get()
+
+    def update_join_datasets(self, columns_by_name):
+        """已載入資料集改變時呼叫：{名稱: 欄位列表}"""
+        self._join_columns = dict(columns_by_name or {})
+        names = list(self._join_columns)
+        if names:
+            current = self.opt_join_ds.get()
+            self.opt_join_ds.configure(values=names)
+            if current not in names:
+                self.opt_join_ds.set(names[-1])
+        else:
+            self.opt_join_ds.configure(values=["(請先載入另一個檔案)"])
+        self._refresh_join_menus()
+
+    def _refresh_join_menus(self):
+        """依目前資料集與選中的關聯資料集更新關聯鍵 / 數值欄位選單"""
+        other_columns = self._join_columns.get(self.opt_join_ds.get(), [])
+        for menu, columns in ((self.opt_join_key, self._all_columns), (self.opt_join_other_key, other_columns)):
+            if not columns:
+                menu.configure(values=["(無可用欄位)"])
+                continue
+            current = menu.get()
+            menu.configure(values=list(columns))
+            if current not in columns:
+                menu.set(columns[0])
+        values = [JOIN_SIDE_PREFIX["left"] + str(c) for c in self._all_columns]
+        values += [JOIN_SIDE_PREFIX["right"] + str(c) for c in other_columns]
+        if values:
+            current = self.opt_join_value.get()
+            self.opt_join_value.configure(values=values)
+            if current not in values:
+                self.opt_join_value.set(values[0])
+
+    def _join_column(self):
+        """數值欄位選單的值 → (side, 欄位)"""
+        value = self.opt_join_value.get()
+        for side, prefix in JOIN_SIDE_PREFIX.items():
+            if value.startswith(prefix):
+                return side, value[len(prefix):]
+        return "left", None
+
+    def _refresh_column_menu(self):
+        """類別 / 相異值查詢列出全部欄位；其餘查詢在欄位剖析完成後只列出數值欄位"""
+        if self._is_topk() or self._is_distinct() or self.profile is None:
+            choices = self._all_columns
+        else:
+            choices = self.profile.numeric_columns()
+        if not choices:
+            self.opt_col.configure(values=["(無數值欄位)" if self.profile is not None else "(無可用欄位)"])
+            return
+        current = self.opt_col.get()
+        self.opt_col.configure(values=choices)
+        if current not in choices:
+            self.opt_col.set(choices[0])
+            dp_settings.set_column(choices[0])
+
+    def _on_user_column_change(self, value):
+        dp_settings.set_user_column(None if value == NO_USER_COLUMN else value)
+
+    def _on_column_change(self, value):
+        dp_settings.set_column(value)
+        self.update_clip_estimate()
+
+    def set_profile(self, profile):
+        """
+        載入時的欄位剖析完成後呼叫：
+        - 欄位選單只留下數值欄位
+        - 啟用邊界建議與截斷比例估計
+        """
+        self.profile = profile
+        if profile is None:
+            self.btn_suggest.configure(state="disabled")
+            self.lbl_clip.configure(text="")
+            return
+
+        self._refresh_column_menu()
+        self.btn_suggest.configure(state="normal")
+        self.update_clip_estimate()
+
+    def _current_column_profile(self):
+        column = self.opt_col.get()
+        if self.profile is None or column not in self.profile:
+            return None
+        return self.profile[column]
+
+    def update_clip_estimate(self):
+        """依目前輸入的 Min / Max 顯示預估截斷比例"""
+        col_profile = self._current_column_profile()
+        if col_profile is None:
+            self.lbl_clip.configure(text="")
+            return
+        try:
+            lower = float(self.entry_min.get())
+            upper = float(self.entry_max.get())
+        except ValueError:
+            self.lbl_clip.configure(text="")
+            return
+        if lower >= upper:
+            self.lbl_clip.configure(text="")
+            return
+        ratio = col_profile.clip_fraction(lower, upper)
+        self.lbl_clip.configure(
+            text=f"預估截斷比例：{ratio:.1%}",
+            text_color="#E67E22" if ratio > 0.05 else "gray"
+        )
+
+    def _set_bounds(self, lower, upper):
+        self.entry_min.delete(0, "end")
+        self.entry_min.insert(0, f"{lower:.6g}")
+        self.entry_max.delete(0, "end")
+        self.entry_max.insert(0, f"{upper:.6g}")
+        self.update_clip_estimate()
+
+    def _on_suggest_clicked(self):
+        col_profile = self._current_column_profile()
+        if col_profile is None:
+            return
+
+        if self.chk_suggest_dp.get():
+            if self.on_suggest_dp is None:
+                return
+            try:
+                domain = (float(self.entry_min.get()), float(self.entry_max.get()))
+            except ValueError:
+                self.lbl_clip.configure(text="DP 建議需先填入粗略範圍 Min / Max", text_color="red")
+                return
+            bounds = self.on_suggest_dp(self.opt_col.get(), domain)
+            if bounds is None:
+                return
+            self._set_bounds(*bounds)
+        else:
+            self._set_bounds(*col_profile.suggest_bounds())
+
+    def _category_domains(self):
+        """
+        公開類別清單輸入框 → {欄位: [類別, ...]}。
+        格式為「欄位=A, B; 欄位2=X, Y」；省略「欄位=」的部分視為目前的目標欄位。
+        """
+        domains = {}
+        for part in self.entry_domain.get().split(";"):
+            column, sep, labels = part.partition("=")
+            if not sep:
+                column, labels = self.opt_col.get(), part
+            labels = [label.strip() for label in labels.split(",") if label.strip()]
+            if labels:
+                domains[column.strip()] = labels
+        return domains
+
+    def _synthetic_bounds(self):
+        """
+        合成資料的數值欄位公開邊界輸入框 → {欄位: (min, max)}。
+        格式為「欄位=min:max; 欄位2=min:max」；數值格式與大小檢查交給 Engine。
+        不使用剖析建議值：那是原始資料的分位數，會隨模型一起發布。
+        """
+        bounds = {}
+        for part in self.entry_synth_bounds.get().split(";"):
+            column, sep, values = part.partition("=")
+            if not sep:
+                continue
+            lower, _, upper = values.partition(":")
+            bounds[column.strip()] = (lower.strip(), upper.strip())
+        return bounds
+
+    def update_tables(self, tables):
+        """SQLite 來源：顯示資料表選單；傳入 None 則隱藏"""
+        if tables:
+            self.opt_table.configure(values=tables)
+            self.opt_table.set(tables[0])
+            self.frame_table.pack(pady=(5, 0), padx=10, fill="x", before=self.col_label_frame)
+        else:
+            self.frame_table.pack_forget()
+
+    def _on_table_change(self, value):
+        if self.on_table_change is not None:
+            self.on_table_change(value)
+
     def _on_run_clicked(self):
+        self._sync_settings()
+        if self.on_run is not None:
+            self.on_run()
+
+    def _on_enqueue_clicked(self):
+        self._sync_settings()
+        if self.on_enqueue is not None:
+            self.on_enqueue()
+
+    def _sync_settings(self):
+        """把輸入框的值寫回 dp_settings（送出工作前呼叫）"""
         # 1. 寫回敏感度
         dp_settings.set_sensitivity(self.entry_min.get(), self.entry_max.get())
+
+        # 每人最多列數、前 k 名（格式檢查交給 Engine）
+        dp_settings.set_max_rows_per_user(self.entry_max_rows.get() or "1")
+        dp_settings.set_top_k(self.entry_topk.get() or "10")
+        dp_settings.set_time_range(self.entry_time_start.get().strip(), self.entry_time_end.get().strip())
+        dp_settings.set_category_domains(self._category_domains())
+
+        # 共變異數矩陣：欄位剖析完成後只取數值欄位，否則交給 Engine 使用全部欄位
+        dp_settings.set_norm_bound(self.entry_norm.get() or "1.0")
+        if self._is_synthetic():
+            # 合成資料：全部欄位；有填公開邊界的欄位為數值欄位，其餘當作類別
+            dp_settings.set_feature_columns(self._all_columns or None)
+            dp_settings.set_column_bounds(self._synthetic_bounds())
+        else:
+            dp_settings.set_feature_columns(self.profile.numeric_columns() if self.profile is not None else None)
+
+        # 關聯查詢：資料集名稱、兩邊的 key、數值欄位與配對上限（格式檢查交給 Engine）
+        if self._is_join():
+            dp_settings.set_join_dataset(self.opt_join_ds.get() if self._join_columns else None)
+            dp_settings.set_join_keys(self.opt_join_key.get(), self.opt_join_other_key.get())
+            dp_settings.set_join_column(*self._join_column())
+            dp_settings.set_join_aggregate(self.opt_join_agg.get())
+            dp_settings.set_max_matches(self.entry_max_matches.get() or "1")
         
         # 2. 【新增】寫回 Delta (如果是 Gaussian)
         if "Gaussian" in dp_settings.mechanism:
             delta_val = self.entry_delta.get()
             # 簡單驗證或預設值處理交給 Engine，這裡只負責傳值
             if not delta_val: delta_val = "1e-5"
-            dp_settings.set_delta(delta_val)
-
-        # 3. 執行
-        if self.on_run is not None:
-            self.on_run()
\ No newline at end of file
+            dp_settings.set_delta(delta_val)
\ No newline at end of file
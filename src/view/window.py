@@ -1,6 +1,10 @@
 import customtkinter as ctk
 from tkinterdnd2 import TkinterDnD
+import functools
 import os
+import queue
+import threading
+import numpy as np
 import pandas as pd
 
 # 引入所有元件
@@ -9,13 +13,33 @@ from src.view.preview import DataPreviewTable
 from src.view.settings import SettingsPanel
 from src.view.start import StartScreen
 from src.view.results import ResultPanel
+from src.view.monitor import EventLoopMonitor, track
 
+from src.core.backends import BACKEND_LABELS
 from src.core.elements import dp_settings
-from src.core.engine import run_dp_from_settings
+from src.core.engine import BOUNDS_SUGGEST_EPSILON, run_dp, suggest_bounds
+from src.core.jobs import JobScheduler
+from src.core.join import loaded_datasets
+from src.core.ledger import ReleaseLedger
+from src.core.sqlite_source import SQLiteSource, is_sqlite_file
+from src.core.loader import SampledDataset, StreamingDataset
+from src.core.partitions import PartitionedSource, is_partitioned_path
+from src.core.planner import open_dataset, plan_execution
+from src.core.profiler import profile_chunks, profile_file
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
 
+
+def _exportable(dataset) -> bool:
+    """
+    可以「整欄加噪後下載」的資料集：來源是單一 CSV / XLSX 檔（串流 / 抽樣資料集也可以，
+    匯出器自己分塊讀取原始檔案，不需要把資料載入記憶體）；SQLite / 分割檔目錄不適用
+    """
+    path = getattr(dataset, "file_path", None)
+    return isinstance(path, str) and path.lower().endswith((".csv", ".xlsx")) and os.path.isfile(path)
+
+
 class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
     def __init__(self):
         super().__init__()
@@ -44,7 +68,27 @@ class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
         self.init_configs()
 
     def init_configs(self):
-        self.current_df = None  # 暫存目前載入的完整 DataFrame
+        self.current_df = None  # 目前載入的資料集（LazyDataset，欄位用到時才解析）
+        self.current_source = None  # SQLite 等「彙總下推」資料來源（不整份載入）
+        self.current_plan = None    # 目前 CSV / XLSX 的執行模式（ExecutionPlan）
+        self._profile_job = None    # 背景欄位剖析的進度
+
+        # 運算工作佇列：每個工作帶著送出當下的設定快照，在背景 worker 執行
+        self._finished_jobs = queue.Queue()
+        self._active_job_id = None
+        # 發布紀錄：相同資料集 + 相同查詢直接重播先前結果，並累計已花費的 ε / δ
+        self.ledger = ReleaseLedger()
+        self.scheduler = JobScheduler(
+            runner=functools.partial(run_dp, ledger=self.ledger),
+            max_workers=min(4, os.cpu_count() or 1),
+            on_finish=self._on_job_finished
+        )
+        self.after(100, self._poll_jobs)
+
+        # 事件迴圈延遲監控：卡頓寫入 ~/.simple_dp/logs/stalls.log，F12 切換效能 HUD
+        self.monitor = EventLoopMonitor(self)
+        self.monitor.start()
+        self.bind("<F12>", lambda e: self.monitor.toggle_hud(self))
 
         # --- Grid 佈局設定 ---
         # column 0: 設定欄 (固定寬度)
@@ -53,7 +97,14 @@ class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
         self.grid_rowconfigure(0, weight=1)
 
         # --- 1. 左側設定面板 (Sidebar) ---
-        self.settings_panel = SettingsPanel(self, width=250, corner_radius=0, on_run=self.execute_dp)
+        self.settings_panel = SettingsPanel(
+            self, width=250, corner_radius=0,
+            on_run=self.execute_dp,
+            on_enqueue=self.enqueue_dp,
+            on_table_change=self.handle_table_change,
+            on_suggest_dp=self.suggest_bounds_dp,
+            on_exec_mode_change=self.handle_exec_mode_change
+        )
         self.settings_panel.grid(row=0, column=0, sticky="nsew")
 
         # --- 2. 右側主要內容區 (Main Content) ---
@@ -93,6 +144,7 @@ class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
         self.result_panel = ResultPanel(self.right_frame)
         self.result_panel.grid(row=5, column=0, sticky="nsew", pady=(10, 0))
 
+    @track("handle_file_upload")
     def handle_file_upload(self, file_path):
         """處理檔案上傳"""
         print(f"收到檔案：{file_path}")
@@ -101,55 +153,218 @@ class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
         if hasattr(self, "result_panel"):
             self.result_panel.reset()
 
+        if is_sqlite_file(file_path):
+            self.handle_sqlite_upload(file_path)
+            return
+
+        if is_partitioned_path(file_path):
+            self.handle_partitioned_upload(file_path)
+            return
+
         if file_path.lower().endswith(('.csv', '.xlsx')):
             file_name = os.path.basename(file_path)
 
-            # 讀取完整資料，存起來給差分隱私運算用
+            # 先依檔案大小 / 估計列數 / 可用記憶體決定開啟方式，再只讀 header 與預覽
             try:
-                if file_path.endswith(".csv"):
-                    self.current_df = pd.read_csv(file_path)
-                else:
-                    self.current_df = pd.read_excel(file_path)
+                plan = plan_execution(file_path, override=self.settings_panel.get_exec_mode())
+                dataset = open_dataset(file_path, plan, backend=self.settings_panel.get_backend())
+            except pd.errors.EmptyDataError:
+                self.status_label.configure(text="錯誤：檔案完全空白或格式損毀", text_color="red")
+                return
             except Exception as e:
                 self.status_label.configure(text=f"讀取檔案失敗：{e}", text_color="red")
                 return
 
-            # 更新表格資料（預覽）
-            success, message = self.table_frame.update_data(file_path)
+            if dataset.preview.empty:
+                self.status_label.configure(text="錯誤：檔案內沒有資料 (Empty DataFrame)", text_color="red")
+                return
 
-            if success:
-                self.status_label.configure(text=f"已載入：{file_name} | {message}", text_color="green")
+            # 分塊串流的資料集走彙總下推路徑（與 SQLite 來源相同），其餘為可取欄位的資料集
+            streaming = isinstance(dataset, StreamingDataset)
+            self.current_df = None if streaming else dataset
+            self.current_source = dataset if streaming else None
+            self.current_plan = plan
+            self.settings_panel.update_tables(None)
+            self._register_loaded(file_name, dataset)
 
-                # 顯示表格相關元件
-                # Row 2: 顯示「資料預覽」文字
-                self.preview_label.grid(row=2, column=0, sticky="w", pady=(0, 5))
+            # 更新表格資料（預覽）
+            self.table_frame.disable_paging()
+            self.table_frame.show_dataframe(dataset.preview)
+            self.status_label.configure(
+                text=f"已載入：{file_name} | 欄位：{len(dataset.columns)} 個 | {plan.describe()} | "
+                     f"後端：{BACKEND_LABELS[dataset.backend.name]}",
+                text_color="green"
+            )
 
-                # Row 3: 顯示表格，並填滿空間
-                self.table_frame.grid(row=3, column=0, sticky="nsew")
+            # 顯示表格相關元件
+            # Row 2: 顯示「資料預覽」文字
+            self.preview_label.configure(text=f"資料預覽 (前 {len(dataset.preview)} 筆)")
+            self.preview_label.grid(row=2, column=0, sticky="w", pady=(0, 5))
 
-                # Row 4: 確保狀態列在最下方
-                self.status_label.grid(row=4, column=0, sticky="ew", pady=(10, 0))
+            # Row 3: 顯示表格，並填滿空間
+            self.table_frame.grid(row=3, column=0, sticky="nsew")
 
-                # 更新左側欄位選單
-                try:
-                    if file_path.endswith(".csv"):
-                        cols = list(pd.read_csv(file_path, nrows=0).columns)
-                    else:
-                        cols = list(pd.read_excel(file_path, nrows=0).columns)
+            # Row 4: 確保狀態列在最下方
+            self.status_label.grid(row=4, column=0, sticky="ew", pady=(10, 0))
 
-                    self.settings_panel.update_columns(cols)
-                except Exception as e:
-                    print(f"欄位讀取失敗: {e}")
+            # 更新左側欄位選單
+            self.settings_panel.update_columns(list(dataset.columns))
 
+            # 背景執行一次分塊剖析（數值欄位、截斷比例、邊界建議），不阻塞 GUI；
+            # 抽樣模式只剖析樣本，不掃描整份檔案
+            if isinstance(dataset, SampledDataset):
+                self.start_profiling(file_path, profile_fn=lambda _: profile_chunks([dataset.load_all()]))
             else:
-                self.status_label.configure(text=message, text_color="red")
+                self.start_profiling(file_path)
+
         else:
             self.status_label.configure(text="錯誤：僅支援 CSV 或 XLSX 格式", text_color="red")
 
+    def handle_exec_mode_change(self):
+        """手動切換執行模式 / 執行後端：目前載入的是 CSV / XLSX 時，以新設定重新開啟"""
+        dataset = self.current_df if self.current_df is not None else self.current_source
+        if dataset is None or isinstance(dataset, (PartitionedSource, SQLiteSource)):
+            return
+        self.handle_file_upload(dataset.file_path)
+
+    def start_profiling(self, file_path, profile_fn=profile_file):
+        """在背景 thread 做欄位剖析；結果由 GUI thread 以 after() 輪詢取回"""
+        self._profile_job = {"path": file_path, "profile": None, "error": None, "done": False}
+        job = self._profile_job
+
+        def worker():
+            try:
+                job["profile"] = profile_fn(file_path)
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.after(200, self._poll_profiling, job)
+
+    def _poll_profiling(self, job):
+        if job is not self._profile_job:
+            return  # 已經換了檔案，舊的剖析結果丟棄
+        if not job["done"]:
+            self.after(200, self._poll_profiling, job)
+            return
+        if job["error"] is not None:
+            print(f"欄位剖析失敗: {job['error']}")
+            return
+        self.settings_panel.set_profile(job["profile"])
+
+    def suggest_bounds_dp(self, column, domain):
+        """
+        SettingsPanel 的 DP 邊界建議：解析該欄位（LazyDataset 會快取）後以 ε=0.1 估計分位數，
+        花費的 ε 記入發布紀錄（與查詢共用同一個預算）
+        """
+        if self.current_df is None or column not in self.current_df.columns:
+            return None
+        try:
+            bounds, budget = suggest_bounds(self.current_df, column, domain, BOUNDS_SUGGEST_EPSILON, self.ledger)
+        except Exception as e:
+            self.status_label.configure(text=f"DP 邊界建議失敗：{e}", text_color="red")
+            return None
+        if budget is not None:
+            self.status_label.configure(
+                text=f"DP 邊界建議花費 ε = {BOUNDS_SUGGEST_EPSILON}（此資料集累計 ε = {budget['epsilon']:.4g}）",
+                text_color="gray"
+            )
+        return bounds
+
+    def handle_partitioned_upload(self, path):
+        """
+        載入分割檔目錄（或 glob 樣式）：只讀第一個分割檔的預覽，
+        運算時各分割檔的部分統計量在 process pool 平行計算、依 mtime 快取，合併後加噪一次
+        """
+        try:
+            source = PartitionedSource(path)
+        except Exception as e:
+            self.status_label.configure(text=f"讀取分割檔失敗：{e}", text_color="red")
+            return
+
+        self.current_df = None
+        self.current_source = source
+        self.settings_panel.update_tables(None)
+        self._register_loaded(os.path.basename(os.path.normpath(path)), source)
+
+        self.table_frame.disable_paging()
+        self.table_frame.show_dataframe(source.preview)
+        self.preview_label.configure(text=f"資料預覽（{os.path.basename(source.partitions[0])}）")
+        self.preview_label.grid(row=2, column=0, sticky="w", pady=(0, 5))
+        self.table_frame.grid(row=3, column=0, sticky="nsew")
+        self.status_label.grid(row=4, column=0, sticky="ew", pady=(10, 0))
+        self.status_label.configure(
+            text=f"已載入分割檔：{path} | {len(source.partitions)} 個檔案，欄位：{len(source.columns)} 個",
+            text_color="green"
+        )
+        self.settings_panel.update_columns(list(source.columns))
+
+        # 各分割檔的剖析同樣平行計算、依 mtime 快取，合併後給邊界建議使用
+        self.start_profiling(path, profile_fn=lambda _: source.profile())
+
+    def handle_sqlite_upload(self, file_path):
+        """載入 SQLite 資料庫：只讀結構與第一頁預覽，資料留在資料庫內"""
+        file_name = os.path.basename(file_path)
+        try:
+            source = SQLiteSource(file_path)
+        except Exception as e:
+            self.status_label.configure(text=f"讀取資料庫失敗：{e}", text_color="red")
+            return
+
+        self.current_df = None
+        self.current_source = source
+        self._profile_job = None
+
+        self.settings_panel.update_tables(source.list_tables())
+        self._show_sqlite_table(file_name)
+
+    def handle_table_change(self, table):
+        """切換 SQLite 資料表"""
+        if self.current_source is None:
+            return
+        try:
+            self.current_source.set_table(table)
+        except Exception as e:
+            self.status_label.configure(text=f"切換資料表失敗：{e}", text_color="red")
+            return
+        self.result_panel.reset()
+        self._show_sqlite_table(os.path.basename(self.current_source.file_path))
+
+    def _show_sqlite_table(self, file_name):
+        source = self.current_source
+        try:
+            total_rows = source.row_count()
+            self.table_frame.enable_paging(source.preview, total_rows)
+        except Exception as e:
+            self.status_label.configure(text=f"讀取資料表失敗：{e}", text_color="red")
+            return
+
+        self.preview_label.configure(text=f"資料預覽（{source.table}）")
+        self.preview_label.grid(row=2, column=0, sticky="w", pady=(0, 5))
+        self.table_frame.grid(row=3, column=0, sticky="nsew")
+        self.status_label.grid(row=4, column=0, sticky="ew", pady=(10, 0))
+        self.status_label.configure(
+            text=f"已連接：{file_name} | 資料表 {source.table}：{total_rows} 筆資料，欄位：{len(source.columns)} 個",
+            text_color="green"
+        )
+        self.settings_panel.update_columns(source.columns)
+        self._register_loaded(file_name, source)
+
+    def _register_loaded(self, name, dataset):
+        """登記已載入的資料集（之後載入其他檔案時，可在關聯查詢中選擇）"""
+        loaded_datasets.register(name, dataset)
+        self.settings_panel.update_join_datasets(loaded_datasets.columns())
+
+    def _current_dataset(self):
+        """目前要運算的資料集：SQLite 來源優先，否則為 LazyDataset"""
+        return self.current_source if self.current_source is not None else self.current_df
+
+    @track("execute_dp")
     def execute_dp(self):
-        """按下『執行差分隱私運算』時執行的邏輯"""
+        """按下『執行差分隱私運算』時執行的邏輯：以最高優先序送出工作，不阻塞 GUI"""
         # 確認有資料
-        if self.current_df is None:
+        if self._current_dataset() is None:
             self.status_label.configure(text="請先上傳資料檔案再執行差分隱私運算", text_color="red")
             return
 
@@ -157,13 +372,52 @@ class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
         if hasattr(self, "result_panel"):
             self.result_panel.show_loading()
 
-        # 呼叫 DP 引擎
-        result = run_dp_from_settings(self.current_df)
+        # 以送出當下的設定快照建立工作，之後調整設定不會影響這次運算
+        job = self.scheduler.submit(self._current_dataset(), dp_settings.snapshot(), priority=10)
+        self._active_job_id = job.id
+        self._update_queue_status()
+
+    def enqueue_dp(self):
+        """『加入佇列』：以目前設定建立快照排入背景執行"""
+        if self._current_dataset() is None:
+            self.status_label.configure(text="請先上傳資料檔案再加入佇列", text_color="red")
+            return
+
+        job = self.scheduler.submit(self._current_dataset(), dp_settings.snapshot(), priority=0)
+        self._update_queue_status(f"已加入佇列：工作 #{job.id}")
+
+    def _on_job_finished(self, job):
+        """JobScheduler 的回呼（在 worker thread 內），只放進佇列交給 GUI thread 處理"""
+        self._finished_jobs.put(job)
+
+    def _poll_jobs(self):
+        while True:
+            try:
+                job = self._finished_jobs.get_nowait()
+            except queue.Empty:
+                break
+            self._show_job_result(job)
+        self.after(100, self._poll_jobs)
+
+    def _update_queue_status(self, prefix=None):
+        counts = self.scheduler.counts()
+        text = f"佇列：{counts['pending']} 個待執行，{counts['running']} 個執行中"
+        if prefix:
+            text = f"{prefix} | {text}"
+        self.status_label.configure(text=text, text_color="gray")
+
+    @track("_show_job_result")
+    def _show_job_result(self, job):
+        """顯示已完成工作的結果"""
+        self.monitor.set_last_job(job.duration)
+        result = job.result
+        is_active = job.id == self._active_job_id
+        source_df = job.dataset if _exportable(job.dataset) else None
 
         if not result["ok"]:
-            # 發生錯誤：狀態列顯示錯誤，結果區重置
-            self.status_label.configure(text=result["message"], text_color="red")
-            if hasattr(self, "result_panel"):
+            # 發生錯誤：狀態列顯示錯誤；若是正在等待的工作則結果區重置
+            self.status_label.configure(text=f"工作 #{job.id}：{result['message']}", text_color="red")
+            if is_active and hasattr(self, "result_panel"):
                 self.result_panel.reset()
             return
 
@@ -178,6 +432,18 @@ class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
             f"欄位 (column)：{payload.get('column')}\n"
             f"資料邊界 (bounds)：{payload.get('bounds')}\n"
         )
+        if payload.get("user_column") is not None:
+            base_info += (
+                f"使用者層級：{payload['user_column']}（每人最多 {payload['max_rows_per_user']} 列，"
+                f"捨棄 {payload.get('rows_dropped', 0)} 列）\n"
+            )
+        if payload.get("sample_fraction") is not None:
+            base_info += f"區塊抽樣：讀取約 {payload['sample_fraction']:.1%} 的資料，count / sum 只代表樣本\n"
+        budget = payload.get("budget")
+        if budget is not None:
+            base_info += f"此資料集累計花費：ε={budget['epsilon']:g}，δ={budget['delta']:g}（{budget['releases']} 次發布）\n"
+        if payload.get("replayed"):
+            base_info += "（重播先前發布的結果，未再花費隱私預算）\n"
 
         # 標量統計：mean / sum / count
         if query in ("mean", "sum", "count"):
@@ -191,21 +457,127 @@ class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
             # 結果區顯示完整說明
             if hasattr(self, "result_panel"):
                 # self.result_panel.show_result_value(text)
-                self.result_panel.update_result(payload, text, source_df=self.current_df)
+                self.result_panel.update_result(payload, text, source_df=source_df)
+            self._update_queue_status(f"工作 #{job.id} 完成（{job.duration:.2f} 秒）")
+
+        # 相異值個數：HyperLogLog sketch 估計，附上 sketch 本身的誤差
+        elif query == "distinct":
+            text = (
+                base_info
+                + f"\n差分隱私後相異值個數：{payload['value']:,.0f}"
+                + f"\nsketch：{payload['registers']} 個暫存器（{payload['sketch_bytes'] / 1024:.0f} KB），"
+                + f"相對誤差約 ±{payload['relative_error']:.1%}"
+            )
+            self.status_label.configure(
+                text=f"工作 #{job.id}：DP 相異值個數完成",
+                text_color="green"
+            )
+            if hasattr(self, "result_panel"):
+                self.result_panel.update_result(payload, text, source_df=source_df)
+
+        # 前 k 名類別：長條圖 + 文字列出各類別次數
+        elif query == "topk":
+            text = base_info + f"\n前 {payload['top_k']} 名類別（雜訊次數）："
+            if "threshold" in payload:
+                text += f"\n（未提供公開類別清單：只列出雜訊次數 ≥ {payload['threshold']} 的類別）"
+            for rank, (category, count) in enumerate(zip(payload["categories"], payload["counts"]), start=1):
+                text += f"\n  {rank}. {category}：{count:.1f}"
+            self.status_label.configure(
+                text=f"工作 #{job.id}：DP Top-{payload['top_k']} 完成",
+                text_color="green"
+            )
+            if hasattr(self, "result_panel"):
+                self.result_panel.update_result(payload, text, source_df=source_df)
+
+        # 時間序列：折線圖 + 最近幾個時間桶的數值
+        elif query == "timeseries":
+            labels = payload["series_index"]
+            counts = payload["series_count"]
+            sums = payload["series_sum"]
+            mode = "持續發布" if payload.get("continual") else "一次發布"
+            text = base_info + f"\n時間欄位：{payload['time_column']}（{payload['time_bucket']}，{mode}），共 {len(labels)} 個時間桶"
+            if payload.get("pending_bucket"):
+                text += f"\n尚未結束的時間桶 {payload['pending_bucket']} 待下次更新再發布"
+            for label, count, total in list(zip(labels, counts, sums))[-5:]:
+                text += f"\n  {label}：count ≈ {count:.1f}，sum ≈ {total:.2f}"
+            self.status_label.configure(
+                text=f"工作 #{job.id}：DP 時間序列完成，{len(labels)} 個時間桶",
+                text_color="green"
+            )
+            if hasattr(self, "result_panel"):
+                self.result_panel.update_result(payload, text, source_df=source_df)
+
+        # 共變異 / 相關矩陣：熱圖 + 相關程度最高的幾組欄位
+        elif query == "covariance":
+            columns = payload["columns"]
+            corr = np.asarray(payload["corr"], dtype=float)
+            text = base_info + (
+                f"\n{len(columns)} 個欄位，有效列數 ≈ {payload['n']}（缺值排除 {payload.get('rows_dropped', 0)} 列），"
+                f"每列範數上限 C = {payload['norm_bound']:g}"
+            )
+            rows, cols = np.triu_indices(len(columns), k=1)
+            strongest = np.argsort(-np.abs(corr[rows, cols]))[:5]
+            for i in strongest:
+                text += f"\n  {columns[rows[i]]} × {columns[cols[i]]}：r ≈ {corr[rows[i], cols[i]]:.3f}"
+            self.status_label.configure(
+                text=f"工作 #{job.id}：DP 共變異數矩陣完成（{len(columns)}×{len(columns)}）",
+                text_color="green"
+            )
+            if hasattr(self, "result_panel"):
+                self.result_panel.update_result(payload, text, source_df=source_df)
+
+        # 合成資料：列出模型結構，實際資料由結果區的「下載結果」依需要產生
+        elif query == "synthetic":
+            columns = payload["synth_columns"]
+            text = base_info + (
+                f"\n{len(columns)} 個欄位，雜訊列數 ≈ {payload['synth_rows']:.0f}，"
+                f"挑選出 {len(payload['synth_edges'])} 組 2-way 邊際"
+            )
+            for i, j in payload["synth_edges"][:10]:
+                text += f"\n  {columns[i]} — {columns[j]}"
+            text += "\n可在下方輸入列數後下載合成資料（不再花費隱私預算）"
+            self.status_label.configure(
+                text=f"工作 #{job.id}：DP 合成資料模型完成（{len(columns)} 個欄位）",
+                text_color="green"
+            )
+            if hasattr(self, "result_panel"):
+                self.result_panel.update_result(payload, text, source_df=source_df)
+
+        # 跨資料集關聯：依關聯後的統計類型顯示數值或直方圖
+        elif query == "join":
+            side = "目前資料集" if payload["join_side"] == "left" else payload["join_dataset"]
+            text = base_info + (
+                f"關聯：{payload['join_keys'][0]} = {payload['join_dataset']}.{payload['join_keys'][1]}"
+                f"（每個 key 最多 {payload['max_matches']} 列，捨棄 {payload['rows_dropped']} 列）\n"
+                f"數值欄位：{side}.{payload['column']}\n"
+            )
+            aggregate = payload["join_aggregate"]
+            if aggregate == "histogram":
+                text += f"\n直方圖 bins 數量：{len(payload['hist'])}"
+            else:
+                text += f"\n差分隱私後 {aggregate} ：{payload['value']:.4f}"
+            self.status_label.configure(
+                text=f"工作 #{job.id}：DP 關聯 {aggregate} 完成",
+                text_color="green"
+            )
+            if hasattr(self, "result_panel"):
+                self.result_panel.update_result(payload, text, source_df=source_df)
 
-        # 直方圖 histogram
-        elif query == "histogram":
+        # 直方圖 histogram / 區間查詢（階層直方圖，畫圖時同樣以 10 個區間顯示）
+        elif query in ("histogram", "range"):
             hist = payload.get("hist")
             bin_edges = payload.get("bin_edges")
             text = base_info + f"\n直方圖 bins 數量：{len(hist)}"
+            if query == "range":
+                text += f"\n已發布 {len(payload['tree_levels'][-1])} 個葉節點的階層直方圖，可在下方輸入任意區間查詢"
             self.status_label.configure(
-                text=f"DP histogram 完成，bins={len(hist)}",
+                text=f"工作 #{job.id}：DP {query} 完成，bins={len(hist)}",
                 text_color="green"
             )
             # 現階段先用文字顯示；之後你可以在這裡畫圖
             if hasattr(self, "result_panel"):
                 # self.result_panel.show_result_value(text)
-                self.result_panel.update_result(payload, text, source_df=self.current_df)
+                self.result_panel.update_result(payload, text, source_df=source_df)
 
         else:
             self.status_label.configure(
@@ -215,5 +587,5 @@ class MainWindow(ctk.CTk, TkinterDnD.DnDWrapper):
             if hasattr(self, "result_panel"):
                 self.result_panel.show_result_value(base_info + "\n(未知的 query 類型)")
 
-        # Debug 用：也可以看一下目前所有設定
-        print("DP settings:", dp_settings.get_all())
+        # Debug 用：也可以看一下這個工作使用的設定
+        print(f"Job #{job.id} settings:", job.settings.get_all())
@@ -0,0 +1,31 @@
+import threading
+
+from src.core.jobs import Job, JobScheduler
+
+
+def test_cancel_wakes_up_waiter():
+    """取消待執行的工作時，已經在 wait(timeout=None) 的呼叫端要被叫醒"""
+    release = threading.Event()
+
+    def runner(dataset, settings):
+        release.wait(5)
+        return {"ok": True, "message": "", "result": None}
+
+    scheduler = JobScheduler(runner=runner, max_workers=1)
+    try:
+        scheduler.submit("running", "settings")  # 佔住唯一的 worker
+        pending = scheduler.submit("pending", "settings")
+
+        waited = []
+        waiter = threading.Thread(target=lambda: waited.append(scheduler.wait(pending.id)), daemon=True)
+        waiter.start()
+        waiter.join(0.2)
+        assert waiter.is_alive()
+
+        assert scheduler.cancel(pending.id)
+        waiter.join(2)
+        assert not waiter.is_alive()
+        assert waited[0].status == Job.CANCELLED
+    finally:
+        release.set()
+        scheduler.shutdown()